@@ -1,16 +1,37 @@
-from flask import Flask, request, jsonify, render_template, g, redirect, url_for
-from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
+from flask import Flask, Response, copy_current_request_context, has_app_context, has_request_context, request, session, stream_with_context, jsonify, render_template, g, redirect, url_for
+from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_bcrypt import Bcrypt
+from werkzeug.local import LocalProxy
+from werkzeug.security import safe_join
+import click
+import concurrent.futures
+import csv
+import functools
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import queue
+import re
 import sqlite3
 import os
 import secrets
-from datetime import date, datetime
+import threading
+import time
+from contextlib import contextmanager
+import calendar
+from collections import OrderedDict, namedtuple
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 app = Flask(__name__)
 # Securely set the SECRET_KEY.
 # 1. Try to get it from an environment variable (best for production).
 # 2. If not found, generate a new random key for the current session.
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', secrets.token_hex(24))
+# bcrypt work factor for new hashes; read by Flask-Bcrypt, so it must be set before Bcrypt(app).
+app.config['BCRYPT_LOG_ROUNDS'] = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
 
 # --- Extensions ---
 bcrypt = Bcrypt(app)
@@ -20,21 +41,162 @@ login_manager.login_view = 'login'
 
 DATABASE_SUBDIR = 'data'
 DATABASE_FILENAME = 'chore_chart.db'
-DATABASE = os.path.join(DATABASE_SUBDIR, DATABASE_FILENAME) 
+DATABASE = os.environ.get('CHORE_CHART_DB', os.path.join(DATABASE_SUBDIR, DATABASE_FILENAME))
+# Multi-household mode: set HOUSEHOLDS_DIR and every household gets its own HOUSEHOLDS_DIR/<slug>.db
+# (see "Households"); DATABASE is then unused.
+HOUSEHOLDS_DIR = os.environ.get('HOUSEHOLDS_DIR')
+HOUSEHOLD_MAX_OPEN = int(os.environ.get('HOUSEHOLD_MAX_OPEN', 64))
+HOUSEHOLD_IDLE_SECONDS = int(os.environ.get('HOUSEHOLD_IDLE_SECONDS', 600))
+
+# --- Connection pool settings ---
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 8))
+app.config['DB_BUSY_TIMEOUT_MS'] = int(os.environ.get('DB_BUSY_TIMEOUT_MS', 5000))
+app.config['DB_CACHED_STATEMENTS'] = int(os.environ.get('DB_CACHED_STATEMENTS', 256))
+
+# --- Metrics settings (opt-in; off means the database helpers are not wrapped at all) ---
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes')
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+
+# --- Household clock ---
+# Day rollover, due chores and the morning/night timeframe follow the household's IANA zone (e.g.
+# 'Europe/Berlin'): the 'timezone' row of its household_settings table (`flask set-timezone`),
+# else HOUSEHOLD_TIMEZONE; with neither, the server's local time.
+HOUSEHOLD_TIMEZONE = os.environ.get('HOUSEHOLD_TIMEZONE') or None
+if HOUSEHOLD_TIMEZONE: ZoneInfo(HOUSEHOLD_TIMEZONE)
+
+@functools.lru_cache(maxsize=None)
+def _zone_info(name):
+    return ZoneInfo(name)
+
+def zone_now(zone_name):
+    """The wall-clock time in IANA zone `zone_name` (None: the server's) as a naive datetime."""
+    if not zone_name: return datetime.now()
+    return datetime.now(_zone_info(zone_name)).replace(tzinfo=None)
+
+def timezone_setting(db_conn):
+    """The timezone stored in a household database, else HOUSEHOLD_TIMEZONE."""
+    try: row = db_conn.execute("SELECT value FROM household_settings WHERE name = 'timezone'").fetchone()
+    except sqlite3.OperationalError: row = None  # not migrated to version 8 yet
+    return row[0] if row and row[0] else HOUSEHOLD_TIMEZONE
+
+def database_today(db_conn):
+    """The household day of the database behind `db_conn`, for code running outside a household context."""
+    return zone_now(timezone_setting(db_conn)).date()
+
+def household_timezone():
+    """The current household's timezone, re-read only when its data version moves (set-timezone bumps it)."""
+    household = current_household()
+    version = household.data_version.current()
+    if household.timezone_version != version:
+        household.timezone = timezone_setting(get_db()); household.timezone_version = version
+    return household.timezone
+
+def household_now():
+    """The household's wall-clock time as a naive datetime."""
+    return zone_now(household_timezone())
+
+def household_today():
+    return household_now().date()
 
 BALLOONS_PER_STAR = 10
+DAY_NAMES = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+# True when assignment `ca` is due on day `d`, where d supplies the columns produced by
+# schedule_day_params(): day (date ordinal), weekday_bit, month_day and last_month_day.
+SCHEDULE_DUE_PREDICATE = """(ca.weekday_mask & d.weekday_bit) != 0
+    AND (ca.interval_days IS NULL OR (d.day >= ca.anchor_day AND (d.day - ca.anchor_day) % ca.interval_days = 0))
+    AND (ca.month_day IS NULL OR ca.month_day = d.month_day OR (ca.month_day > d.last_month_day AND d.month_day = d.last_month_day))"""
+# Active assignments of one kid due on one day; bind schedule_day_params(day) followed by the kid id.
+DUE_ASSIGNMENTS_FROM = """chore_assignments ca JOIN chores_master cm ON ca.chore_id = cm.id
+    JOIN (SELECT ? AS day, ? AS weekday_bit, ? AS month_day, ? AS last_month_day) d
+    WHERE ca.kid_id = ? AND ca.is_active = 1 AND """ + SCHEDULE_DUE_PREDICATE
+# Every active assignment due on the board day (the single today_board_day row), as today_board rows.
+TODAY_BOARD_COLUMNS = "kid_id, assignment_id, chore_id, chore_name, chore_icon, frequency, timeframe"
+TODAY_BOARD_SELECT = """SELECT ca.kid_id, ca.id, ca.chore_id, cm.name, cm.icon, ca.frequency, ca.timeframe
+    FROM chore_assignments ca JOIN chores_master cm ON ca.chore_id = cm.id JOIN today_board_day d
+    WHERE ca.is_active = 1 AND """ + SCHEDULE_DUE_PREDICATE
+# One kid's board with today's completion flags; bind the day's ISO date, then the kid id.
+TODAY_BOARD_SQL = """
+    SELECT b.assignment_id, b.kid_id, b.chore_id, b.chore_name, b.chore_icon, b.frequency, b.timeframe,
+           EXISTS (SELECT 1 FROM chore_completions cc
+                   WHERE cc.assignment_id = b.assignment_id AND cc.kid_id = b.kid_id AND cc.date_completed = ?) as completed_today
+    FROM today_board b WHERE b.kid_id = ?
+    ORDER BY b.assignment_id
+"""
+KID_COLUMNS = "id, name, avatar_color, balloons, train_track_length, train_laps_completed, stars_count"
+KID_STATS_SQL = "SELECT balloons, train_track_length, train_laps_completed, stars_count FROM kids WHERE id = ?"
+
+# --- Admin users ---
+USER_CACHE_MAX_ENTRIES = 256
+USER_CACHE_TTL_SECONDS = int(os.environ.get('USER_CACHE_TTL_SECONDS', 300))
+# Trust the username stored in the signed session cookie instead of looking the user up at all.
+SESSION_USER_IDENTITY = os.environ.get('SESSION_USER_IDENTITY', '').lower() in ('1', 'true', 'yes')
+
+class User:
+    """Logged-in admin. Implements Flask-Login's user interface itself so instances stay two slots."""
+    __slots__ = ('id', 'username')
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
 
-class User(UserMixin):
     def __init__(self, id, username):
         self.id = id
         self.username = username
 
+    def get_id(self):
+        return str(self.id)
+
+    def __eq__(self, other):
+        return isinstance(other, User) and self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+class UserCache:
+    """LRU of User objects by id; entries expire after `ttl` seconds so edits made by other processes show up."""
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None: return None
+            if entry[1] < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[0]
+
+    def put(self, user):
+        with self._lock:
+            self._entries[user.get_id()] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user.get_id())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None: self._entries.clear()
+            else: self._entries.pop(str(user_id), None)
+
+user_cache = LocalProxy(lambda: current_household().user_cache)
+
 @login_manager.user_loader
 def load_user(user_id):
-    user_data = query_db("SELECT * FROM users WHERE id = ?", (user_id,), one=True)
-    if user_data:
-        return User(id=user_data['id'], username=user_data['username'])
-    return None
+    # User ids are only unique within one household's database.
+    if session.get('household') != current_household().slug: return None
+    if SESSION_USER_IDENTITY and session.get('_user_name') is not None:
+        return User(id=int(user_id), username=session['_user_name'])
+    user = user_cache.get(user_id)
+    if user is None:
+        user_data = query_db("SELECT id, username FROM users WHERE id = ?", (user_id,), one=True)
+        if not user_data: return None
+        user = user_cache.put(User(id=user_data['id'], username=user_data['username']))
+    if SESSION_USER_IDENTITY: session['_user_name'] = user.username
+    return user
 
 def init_db_schema(db_conn):
     """Initializes the database with the schema."""
@@ -42,47 +204,492 @@ def init_db_schema(db_conn):
         print(f"Executing schema on database connection...")
         db_conn.cursor().executescript(SCHEMA_SQL)
         db_conn.commit()
+        migrate_db(db_conn)
         print("Database schema initialized successfully.")
     except sqlite3.Error as e:
         print(f"Error initializing database schema: {e}")
         raise
 
+# Database files this process has already created or migrated. Forked workers inherit the set, so
+# under a preloading server (see create_app) the check runs once in the parent, not per worker.
+_schema_checked = set()
+_schema_lock = threading.Lock()
+
+def ensure_schema(db_path, connect):
+    """Creates or migrates the database at db_path unless this process already has."""
+    if db_path in _schema_checked: return
+    with _schema_lock:
+        if db_path in _schema_checked: return
+        db_dir = os.path.dirname(db_path)
+        if not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        conn = connect()
+        try:
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'kids'").fetchone():
+                init_db_schema(conn)
+            else:
+                migrate_db(conn)
+        finally:
+            conn.close()
+        _schema_checked.add(db_path)
+
+class ConnectionPool:
+    """Keeps tuned SQLite connections open so requests borrow one instead of reconnecting."""
+    def __init__(self, db_path, size, busy_timeout_ms, cached_statements):
+        self.db_path = db_path
+        self.size = size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        self.hits = 0
+        self.misses = 0
+        self.in_use = 0
+        self.closed = False
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        ensure_schema(db_path, self._connect)
+
+    def _connect(self):
+        # check_same_thread is off because a connection may be returned by one
+        # request thread and borrowed by another; it is never shared concurrently.
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000.0,
+                               cached_statements=self.cached_statements, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # Must come before WAL mode to reach a new database (see SCHEMA_SQL). Only on an empty file:
+        # setting it rewrites the header even when unchanged, which other connections see as a commit.
+        if conn.execute("PRAGMA page_count").fetchone()[0] == 0: conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        return conn
+
+    def acquire(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: connections inherited from the parent must not be reused.
+                self._idle = []
+                self._pid = os.getpid()
+            self.in_use += 1
+            if self._idle:
+                self.hits += 1
+                return self._idle.pop()
+            self.misses += 1
+        return self._connect()
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if self._pid == os.getpid(): self.in_use -= 1
+            if not self.closed and self._pid == os.getpid() and len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def close(self):
+        """Closes idle connections now and borrowed ones as they are released."""
+        self.closed = True
+        self.close_all()
+
+    def stats(self):
+        with self._lock:
+            return {"size": self.size, "idle": len(self._idle), "in_use": self.in_use, "hits": self.hits, "misses": self.misses}
+
+def get_pool():
+    return current_household().pool
+
 def get_db():
-    db_path = os.path.join(app.root_path, DATABASE)
-    db_dir = os.path.dirname(db_path)
-    if not os.path.exists(db_dir):
-        os.makedirs(db_dir)
-    db_needs_init = not os.path.exists(db_path)
     db = getattr(g, '_database', None)
     if db is None:
-        db = g._database = sqlite3.connect(db_path)
-        db.row_factory = sqlite3.Row 
-        if db_needs_init:
-            init_db_schema(db)
+        # Remember the pool: the household could be evicted before the connection is released.
+        pool = g._database_pool = get_pool()
+        db = g._database = pool.acquire()
     return db
 
 @app.teardown_appcontext
 def close_connection(exception):
-    db = getattr(g, '_database', None)
+    db = g.pop('_database', None)
     if db is not None:
-        db.close()
+        g.pop('_database_pool').release(db)
+
+# --- Metrics ---
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128)
+_SQL_WHITESPACE = re.compile(r"\s+")
+_SQL_IN_LIST = re.compile(r"\bIN \(\?(?:, \?)*\)", re.IGNORECASE)
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout. Callers hold the registry lock."""
+    __slots__ = ('buckets', 'counts', 'count', 'total')
 
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.count += 1; self.total += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound: self.counts[i] += 1
+
+class Metrics:
+    """Per-process request, SQL statement, commit and lock-error metrics, rendered as Prometheus text."""
+    def __init__(self):
+        self.request_latency = {}   # (endpoint, method) -> Histogram
+        self.request_status = {}    # (endpoint, method, status) -> count
+        self.statements = {}        # normalized sql -> [count, total seconds, max seconds]
+        self.statements_per_request = Histogram(COUNT_BUCKETS)
+        self.commit_latency = Histogram(LATENCY_BUCKETS)
+        self.begin_wait = Histogram(LATENCY_BUCKETS)
+        self.db_errors = {}         # kind -> count
+        self.slow_queries = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize_sql(sql):
+        # IN (?, ?, ?) lists vary in length; collapse them so each statement is one series.
+        return _SQL_IN_LIST.sub("IN (?...)", _SQL_WHITESPACE.sub(" ", sql).strip())
+
+    def observe_statement(self, sql, seconds):
+        key = self.normalize_sql(sql)
+        with self._lock:
+            stat = self.statements.get(key)
+            if stat is None: stat = self.statements[key] = [0, 0.0, 0.0]
+            stat[0] += 1; stat[1] += seconds; stat[2] = max(stat[2], seconds)
+            if seconds * 1000 >= SLOW_QUERY_MS: self.slow_queries += 1
+        if g: g._metrics_statements = g.get('_metrics_statements', 0) + 1
+        if seconds * 1000 >= SLOW_QUERY_MS:
+            app.logger.warning("Slow query (%.1f ms, endpoint %s): %s", seconds * 1000, request.endpoint if has_request_context() else '-', key)
+
+    def observe_db_error(self, error):
+        message = str(error).lower()
+        kind = 'busy' if 'busy' in message else 'locked' if 'locked' in message else type(error).__name__
+        with self._lock: self.db_errors[kind] = self.db_errors.get(kind, 0) + 1
+
+    def observe_request(self, endpoint, method, status, seconds, statements):
+        with self._lock:
+            histogram = self.request_latency.get((endpoint, method))
+            if histogram is None: histogram = self.request_latency[(endpoint, method)] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(seconds)
+            self.request_status[(endpoint, method, status)] = self.request_status.get((endpoint, method, status), 0) + 1
+            self.statements_per_request.observe(statements)
+
+    def timed(self, kind):
+        """Decorator for the database helpers; `kind` is 'statement', 'commit' or 'begin'."""
+        def decorator(fn):
+            if not METRICS_ENABLED: return fn
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                except sqlite3.OperationalError as e:
+                    self.observe_db_error(e); raise
+                finally:
+                    seconds = time.perf_counter() - started
+                    if kind == 'statement': self.observe_statement(args[0], seconds)
+                    else:
+                        with self._lock: (self.commit_latency if kind == 'commit' else self.begin_wait).observe(seconds)
+            return wrapper
+        return decorator
+
+    def render(self):
+        lines = []
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}"); lines.append(f"# TYPE {name} {kind}")
+        def labels(**values):
+            return "{" + ",".join(f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in values.items()) + "}"
+        def histogram(name, h, **label_values):
+            for bound, count in zip(h.buckets, h.counts):
+                lines.append(f"{name}_bucket{labels(**label_values, le=bound)} {count}")
+            lines.append(f"{name}_bucket{labels(**label_values, le='+Inf')} {h.count}")
+            lines.append(f"{name}_sum{labels(**label_values) if label_values else ''} {h.total}")
+            lines.append(f"{name}_count{labels(**label_values) if label_values else ''} {h.count}")
+        with self._lock:
+            metric("chore_chart_http_request_duration_seconds", "histogram", "Request latency by endpoint.")
+            for (endpoint, method), h in sorted(self.request_latency.items()):
+                histogram("chore_chart_http_request_duration_seconds", h, endpoint=endpoint, method=method)
+            metric("chore_chart_http_requests_total", "counter", "Responses by endpoint and status.")
+            for (endpoint, method, status), count in sorted(self.request_status.items()):
+                lines.append(f"chore_chart_http_requests_total{labels(endpoint=endpoint, method=method, status=status)} {count}")
+            metric("chore_chart_db_statements_per_request", "histogram", "SQL statements run by one request.")
+            histogram("chore_chart_db_statements_per_request", self.statements_per_request)
+            metric("chore_chart_db_statement_duration_seconds", "summary", "Time spent per SQL statement, including fetching rows.")
+            for sql, (count, total, _) in sorted(self.statements.items()):
+                lines.append(f"chore_chart_db_statement_duration_seconds_sum{labels(sql=sql)} {total}")
+                lines.append(f"chore_chart_db_statement_duration_seconds_count{labels(sql=sql)} {count}")
+            metric("chore_chart_db_statement_max_seconds", "gauge", "Slowest run of each SQL statement.")
+            for sql, (_, _, slowest) in sorted(self.statements.items()):
+                lines.append(f"chore_chart_db_statement_max_seconds{labels(sql=sql)} {slowest}")
+            metric("chore_chart_db_commit_duration_seconds", "histogram", "Commit latency.")
+            histogram("chore_chart_db_commit_duration_seconds", self.commit_latency)
+            metric("chore_chart_db_begin_wait_seconds", "histogram", "Time waiting for the write lock in BEGIN IMMEDIATE.")
+            histogram("chore_chart_db_begin_wait_seconds", self.begin_wait)
+            metric("chore_chart_db_errors_total", "counter", "SQLite operational errors such as busy or locked.")
+            for kind, count in sorted(self.db_errors.items()):
+                lines.append(f"chore_chart_db_errors_total{labels(kind=kind)} {count}")
+            metric("chore_chart_db_slow_queries_total", "counter", f"Statements slower than {SLOW_QUERY_MS:g} ms.")
+            lines.append(f"chore_chart_db_slow_queries_total {self.slow_queries}")
+        open_households = households.open_households()
+        metric("chore_chart_households_open", "gauge", "Households with an open connection pool in this process.")
+        lines.append(f"chore_chart_households_open {len(open_households)}")
+        for prefix, description, stats_of in (("chore_chart_db_pool", "Connection pool", lambda h: h.pool.stats()),
+                                              ("chore_chart_response_cache", "Response cache", lambda h: h.response_cache.stats())):
+            per_household = [(h.slug or 'default', stats_of(h)) for h in open_households]
+            for key in (per_household[0][1] if per_household else ()):
+                metric(f"{prefix}_{key}", "gauge", f"{description} {key.replace('_', ' ')}.")
+                for slug, stats in per_household:
+                    lines.append(f"{prefix}_{key}{labels(household=slug)} {stats[key]}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+if METRICS_ENABLED:
+    @app.before_request
+    def start_request_timer():
+        g._metrics_started = time.perf_counter()
+        g._metrics_statements = 0
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get('_metrics_started')
+        if started is not None:
+            metrics.observe_request(request.endpoint or 'unmatched', request.method, response.status_code,
+                                    time.perf_counter() - started, g.get('_metrics_statements', 0))
+        return response
+
+@app.route('/metrics')
+def prometheus_metrics():
+    if not METRICS_ENABLED: return jsonify({"error": "Metrics are disabled; set METRICS_ENABLED=1"}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@metrics.timed('statement')
 def query_db(query, args=(), one=False):
     cur = get_db().execute(query, args)
     rv = cur.fetchall()
     cur.close()
     return (rv[0] if rv else None) if one else rv
 
-def execute_db(query, args=()):
+@metrics.timed('statement')
+def execute_db(query, args=(), rowcount=False):
     db = get_db()
     cur = db.cursor()
     cur.execute(query, args)
-    db.commit()
-    last_row_id = cur.lastrowid
+    if not g.get('_tx_depth'):
+        _commit(db)
+    result = cur.rowcount if rowcount else cur.lastrowid
+    cur.close()
+    return result
+
+@metrics.timed('statement')
+def executemany_db(query, seq_of_args):
+    db = get_db()
+    cur = db.cursor()
+    cur.executemany(query, seq_of_args)
+    if not g.get('_tx_depth'):
+        _commit(db)
+    result = cur.rowcount
     cur.close()
-    return last_row_id
+    return result
+
+@metrics.timed('commit')
+def _commit(db):
+    db.commit()
+
+@metrics.timed('begin')
+def _begin_immediate(db):
+    db.execute("BEGIN IMMEDIATE")
+
+@contextmanager
+def transaction():
+    """Runs the enclosed query_db/execute_db calls as one IMMEDIATE transaction with a single commit.
+
+    Inside a write-queue job the group commit's transaction is already open, so the outermost
+    level becomes a savepoint instead: an exception still undoes exactly the enclosed writes.
+    """
+    db = get_db()
+    depth = g.get('_tx_depth', 0)
+    savepoint = g.get('_write_job') is not None and depth == 1
+    if savepoint:
+        db.execute("SAVEPOINT tx")
+    elif depth == 0:
+        _begin_immediate(db)
+    g._tx_depth = depth + 1
+    try:
+        yield db
+    except BaseException:
+        g._tx_depth = depth
+        if savepoint:
+            db.execute("ROLLBACK TO tx"); db.execute("RELEASE tx")
+        elif depth == 0:
+            db.rollback()
+        raise
+    g._tx_depth = depth
+    if savepoint:
+        db.execute("RELEASE tx")
+    elif depth == 0:
+        _commit(db)
+
+# --- Write queue ---
+# Every mutation of a household goes through one writer thread per process. The writer takes all
+# jobs that queued up while it was busy (up to WRITE_BATCH_MAX), runs each inside its own savepoint
+# of a single IMMEDIATE transaction and commits them together: one lock acquisition and one WAL
+# sync for the whole batch, and no request thread ever waits on SQLite's busy handler. A job that
+# raises is rolled back to its savepoint without disturbing the others. Events published by a job
+# are held back until the batch has committed.
+WRITE_BATCH_MAX = int(os.environ.get('WRITE_BATCH_MAX', 64))
+WRITE_TIMEOUT_SECONDS = float(os.environ.get('WRITE_TIMEOUT_SECONDS', 30))
+
+class WriteQueue:
+    def __init__(self, household):
+        self.household = household
+        self.jobs = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def in_writer(self):
+        return self._thread is threading.current_thread()
+
+    def submit(self, fn, args=(), kwargs=None, user=None):
+        future = concurrent.futures.Future()
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                # (Re)start per process: a forked worker inherits the queue but not the thread.
+                self._queue = queue.Queue(); self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name=f"sqlite-writer-{self.household.slug or 'default'}", daemon=True)
+                self._thread.start()
+            self._queue.put((future, fn, args, kwargs or {}, user))
+        return future
+
+    def stop(self):
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid(): self._queue.put(None)
+
+    def _run(self):
+        conn = self.household.pool._connect()
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while batch[-1] is not None and len(batch) < WRITE_BATCH_MAX:
+                    try: batch.append(self._queue.get_nowait())
+                    except queue.Empty: break
+                stop = batch[-1] is None
+                batch = [job for job in batch if job is not None]
+                if batch:
+                    try: self._commit_batch(conn, batch)
+                    except Exception:
+                        # Never let the writer die: every later write would wait on it forever.
+                        app.logger.exception("Write queue batch failed")
+                        for future, *_ in batch:
+                            if not future.done(): future.set_exception(sqlite3.OperationalError("write queue failure"))
+                if stop: return
+        finally:
+            conn.close()
+
+    def _commit_batch(self, conn, batch):
+        outcomes = []
+        try:
+            _begin_immediate(conn)
+            for job in batch:
+                outcomes.append(self._run_job(conn, job))
+            self.household.event_bus.local_commit(lambda: _commit(conn))
+        except BaseException as error:
+            if conn.in_transaction: conn.rollback()
+            self.failed_batches += 1
+            for future, *_ in batch:
+                if not future.done(): future.set_exception(error)
+            return
+        self.batches += 1; self.jobs += len(batch)
+        for (future, *_), (ok, value, callbacks) in zip(batch, outcomes):
+            if ok: future.set_result(value)
+            else: future.set_exception(value)
+        with app.app_context():
+            g._household = self.household
+            for _, _, callbacks in outcomes:
+                for callback in callbacks:
+                    try: callback()
+                    except Exception: app.logger.exception("After-commit callback failed")
 
+    def _run_job(self, conn, job):
+        """Runs one job in its own savepoint. Returns (ok, result or exception, after-commit callbacks)."""
+        future, fn, args, kwargs, user = job
+        if not future.set_running_or_notify_cancel(): return False, concurrent.futures.CancelledError(), []
+        with app.app_context():
+            g._household = self.household; g._database = conn; g._tx_depth = 1
+            g._write_job = True; g._after_commit = []
+            if user is not None: g._login_user = user
+            conn.execute("SAVEPOINT job")
+            try:
+                value = fn(*args, **kwargs)
+            except Exception as error:
+                conn.execute("ROLLBACK TO job"); conn.execute("RELEASE job")
+                return False, error, []
+            finally:
+                # The connection belongs to the writer, not to this context's teardown.
+                g.pop('_database')
+                future.statements = g.get('_metrics_statements', 0)
+            conn.execute("RELEASE job")
+            return True, value, g._after_commit
+
+    def wait(self, future):
+        """Returns a submitted job's result; its statements count towards the waiting request's metrics."""
+        try: return future.result(WRITE_TIMEOUT_SECONDS)
+        finally:
+            if has_app_context(): g._metrics_statements = g.get('_metrics_statements', 0) + getattr(future, 'statements', 0)
+
+    def stats(self):
+        return {"pending": self.pending(), "jobs": self.jobs, "batches": self.batches, "failed_batches": self.failed_batches}
+
+def run_write(fn, *args, **kwargs):
+    """Runs fn(*args, **kwargs) on the current household's writer as part of a group commit and returns its result."""
+    writer = current_household().writer
+    if writer.in_writer() or g.get('_write_job'): return fn(*args, **kwargs)
+    return writer.wait(writer.submit(fn, args, kwargs))
+
+def after_commit(callback):
+    """Calls `callback` once the current write is committed (right away outside a write-queue job)."""
+    pending = g.get('_after_commit') if has_app_context() else None
+    if pending is None: callback()
+    else: pending.append(callback)
+
+def serialized_write(view):
+    """Runs a mutating view on the household's writer, in a copy of the request context."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        writer = current_household().writer
+        if writer.in_writer(): return view(*args, **kwargs)
+        return writer.wait(writer.submit(copy_current_request_context(view), args, kwargs, user=g.get('_login_user')))
+    return wrapper
+
+# auto_vacuum only takes effect before the first table is created; it lets incremental_vacuum
+# hand pages freed by history compaction back to the filesystem.
 SCHEMA_SQL = """
+PRAGMA auto_vacuum = INCREMENTAL;
+DROP TABLE IF EXISTS household_settings;
+DROP TABLE IF EXISTS today_board;
+DROP TABLE IF EXISTS today_board_day;
+DROP TABLE IF EXISTS kid_daily_stats;
+DROP TABLE IF EXISTS kid_chore_stats;
+DROP TABLE IF EXISTS kid_star_type_stats;
+DROP TABLE IF EXISTS kid_streaks;
+DROP TABLE IF EXISTS stats_meta;
+DROP TABLE IF EXISTS completion_daily_summary;
+DROP TABLE IF EXISTS star_daily_summary;
 DROP TABLE IF EXISTS users;
 CREATE TABLE users (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -141,68 +748,1247 @@ CREATE TABLE stars (
     reason TEXT,
     FOREIGN KEY (kid_id) REFERENCES kids (id) ON DELETE CASCADE
 );
+
+PRAGMA user_version = 0;
 """
-def update_train_laps(kid_id):
-    kid_info = query_db("SELECT train_track_length FROM kids WHERE id = ?", (kid_id,), one=True)
-    if not kid_info or kid_info['train_track_length'] <= 0: return
-    stars_count_data = query_db("SELECT COUNT(id) as count FROM stars WHERE kid_id = ?", (kid_id,), one=True)
-    total_stars = stars_count_data['count'] if stars_count_data else 0
-    new_laps = total_stars // kid_info['train_track_length']
-    execute_db("UPDATE kids SET train_laps_completed = ? WHERE id = ?", (new_laps, kid_id))
+
+# --- Schema migrations ---
+# SCHEMA_SQL is schema version 0. Each entry below moves PRAGMA user_version up by
+# one and must be safe against a database that already holds data. A step is
+# either a SQL statement or a callable taking the connection.
+MIGRATIONS = [
+    (  # 1: indexes for the hot lookups; one completion per assignment per day, one daily star per kid per day
+        """DELETE FROM chore_completions WHERE assignment_id IS NOT NULL AND id NOT IN (
+               SELECT MIN(id) FROM chore_completions WHERE assignment_id IS NOT NULL GROUP BY assignment_id, date_completed)""",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_completions_assignment_day ON chore_completions (assignment_id, date_completed)",
+        "CREATE INDEX IF NOT EXISTS idx_completions_kid_day ON chore_completions (kid_id, date_completed)",
+        """DELETE FROM stars WHERE type = 'daily' AND id NOT IN (
+               SELECT MIN(id) FROM stars WHERE type = 'daily' GROUP BY kid_id, date_awarded)""",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_stars_one_daily ON stars (kid_id, date_awarded) WHERE type = 'daily'",
+        "CREATE INDEX IF NOT EXISTS idx_stars_kid_day_type ON stars (kid_id, date_awarded, type)",
+        "CREATE INDEX IF NOT EXISTS idx_assignments_kid_active ON chore_assignments (kid_id, is_active)",
+    ),
+    (  # 2: kids.stars_count kept by triggers on stars; train_laps_completed follows stars_count and track length
+        "ALTER TABLE kids ADD COLUMN stars_count INTEGER NOT NULL DEFAULT 0",
+        "UPDATE kids SET stars_count = (SELECT COUNT(*) FROM stars WHERE stars.kid_id = kids.id)",
+        """CREATE TRIGGER IF NOT EXISTS trg_stars_count_insert AFTER INSERT ON stars BEGIN
+               UPDATE kids SET stars_count = stars_count + 1 WHERE id = NEW.kid_id;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_stars_count_delete AFTER DELETE ON stars BEGIN
+               UPDATE kids SET stars_count = stars_count - 1 WHERE id = OLD.kid_id;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_stars_count_move AFTER UPDATE OF kid_id ON stars WHEN NEW.kid_id IS NOT OLD.kid_id BEGIN
+               UPDATE kids SET stars_count = stars_count - 1 WHERE id = OLD.kid_id;
+               UPDATE kids SET stars_count = stars_count + 1 WHERE id = NEW.kid_id;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_kids_train_laps AFTER UPDATE OF stars_count, train_track_length ON kids
+           WHEN NEW.train_track_length > 0 BEGIN
+               UPDATE kids SET train_laps_completed = NEW.stars_count / NEW.train_track_length WHERE id = NEW.id;
+           END""",
+        "UPDATE kids SET train_laps_completed = stars_count / train_track_length WHERE train_track_length > 0",
+    ),
+    (  # 3: compiled schedule columns next to chore_assignments.frequency
+        "ALTER TABLE chore_assignments ADD COLUMN weekday_mask INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE chore_assignments ADD COLUMN interval_days INTEGER",
+        "ALTER TABLE chore_assignments ADD COLUMN anchor_day INTEGER",
+        "ALTER TABLE chore_assignments ADD COLUMN month_day INTEGER",
+        lambda db_conn: compile_all_schedules(db_conn),
+    ),
+    (  # 4: per-kid per-day rollups of compacted history; kids.stars_count counts archived stars too
+        """CREATE TABLE IF NOT EXISTS completion_daily_summary (
+               kid_id INTEGER NOT NULL REFERENCES kids (id) ON DELETE CASCADE,
+               day TEXT NOT NULL,
+               completions INTEGER NOT NULL,
+               PRIMARY KEY (kid_id, day)
+           ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS star_daily_summary (
+               kid_id INTEGER NOT NULL REFERENCES kids (id) ON DELETE CASCADE,
+               day TEXT NOT NULL,
+               type TEXT NOT NULL,
+               stars INTEGER NOT NULL,
+               PRIMARY KEY (kid_id, day, type)
+           ) WITHOUT ROWID""",
+    ),
+    (  # 5: date-range scans for the history export, in the order it streams rows
+        "CREATE INDEX IF NOT EXISTS idx_completions_day ON chore_completions (date_completed)",
+        "CREATE INDEX IF NOT EXISTS idx_stars_day_type ON stars (date_awarded, type)",
+    ),
+    (  # 6: incrementally maintained kid statistics (see "Kid statistics")
+        """CREATE TABLE IF NOT EXISTS kid_daily_stats (
+               kid_id INTEGER NOT NULL REFERENCES kids (id) ON DELETE CASCADE,
+               day TEXT NOT NULL,
+               due INTEGER,
+               done INTEGER NOT NULL DEFAULT 0,
+               daily_star INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (kid_id, day)
+           ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS kid_chore_stats (
+               kid_id INTEGER NOT NULL REFERENCES kids (id) ON DELETE CASCADE,
+               chore_id INTEGER NOT NULL REFERENCES chores_master (id) ON DELETE CASCADE,
+               due INTEGER NOT NULL DEFAULT 0,
+               done INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (kid_id, chore_id)
+           ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS kid_star_type_stats (
+               kid_id INTEGER NOT NULL REFERENCES kids (id) ON DELETE CASCADE,
+               type TEXT NOT NULL,
+               stars INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (kid_id, type)
+           ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS kid_streaks (
+               kid_id INTEGER PRIMARY KEY REFERENCES kids (id) ON DELETE CASCADE,
+               current_streak INTEGER NOT NULL DEFAULT 0,
+               current_end TEXT,
+               longest_streak INTEGER NOT NULL DEFAULT 0,
+               longest_end TEXT
+           )""",
+        "CREATE TABLE IF NOT EXISTS stats_meta (name TEXT PRIMARY KEY, value TEXT)",
+        """CREATE TRIGGER IF NOT EXISTS trg_stats_completion_insert AFTER INSERT ON chore_completions BEGIN
+               INSERT INTO kid_daily_stats (kid_id, day, done) VALUES (NEW.kid_id, NEW.date_completed, 1)
+               ON CONFLICT (kid_id, day) DO UPDATE SET done = done + 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_stats_completion_delete AFTER DELETE ON chore_completions BEGIN
+               UPDATE kid_daily_stats SET done = done - 1 WHERE kid_id = OLD.kid_id AND day = OLD.date_completed;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_stats_star_insert AFTER INSERT ON stars BEGIN
+               INSERT INTO kid_star_type_stats (kid_id, type, stars) VALUES (NEW.kid_id, NEW.type, 1)
+               ON CONFLICT (kid_id, type) DO UPDATE SET stars = stars + 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_stats_star_delete AFTER DELETE ON stars BEGIN
+               UPDATE kid_star_type_stats SET stars = stars - 1 WHERE kid_id = OLD.kid_id AND type = OLD.type;
+           END""",
+        lambda db_conn: rebuild_stats(db_conn, database_today(db_conn)),
+    ),
+    (  # 7: each kid's due chores for the current day, rebuilt at rollover and kept by triggers (see "Today board")
+        """CREATE TABLE IF NOT EXISTS today_board_day (
+               id INTEGER PRIMARY KEY CHECK (id = 1),
+               iso TEXT NOT NULL,
+               day INTEGER NOT NULL,
+               weekday_bit INTEGER NOT NULL,
+               month_day INTEGER NOT NULL,
+               last_month_day INTEGER NOT NULL
+           )""",
+        """CREATE TABLE IF NOT EXISTS today_board (
+               kid_id INTEGER NOT NULL REFERENCES kids (id) ON DELETE CASCADE,
+               assignment_id INTEGER NOT NULL REFERENCES chore_assignments (id) ON DELETE CASCADE,
+               chore_id INTEGER NOT NULL,
+               chore_name TEXT,
+               chore_icon TEXT,
+               frequency TEXT,
+               timeframe TEXT,
+               PRIMARY KEY (kid_id, assignment_id)
+           ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_today_board_assignment ON today_board (assignment_id)",
+        """CREATE TRIGGER IF NOT EXISTS trg_today_board_assignment_insert AFTER INSERT ON chore_assignments BEGIN
+               INSERT OR REPLACE INTO today_board (""" + TODAY_BOARD_COLUMNS + ") " + TODAY_BOARD_SELECT + """ AND ca.id = NEW.id;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_today_board_assignment_update AFTER UPDATE ON chore_assignments BEGIN
+               DELETE FROM today_board WHERE kid_id = OLD.kid_id AND assignment_id = OLD.id;
+               INSERT OR REPLACE INTO today_board (""" + TODAY_BOARD_COLUMNS + ") " + TODAY_BOARD_SELECT + """ AND ca.id = NEW.id;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_today_board_chore_update AFTER UPDATE OF name, icon ON chores_master BEGIN
+               UPDATE today_board SET chore_name = NEW.name, chore_icon = NEW.icon WHERE chore_id = NEW.id;
+           END""",
+        lambda db_conn: build_today_board(db_conn, database_today(db_conn)),
+    ),
+    (  # 8: per-household settings such as the timezone (see "Household clock")
+        "CREATE TABLE IF NOT EXISTS household_settings (name TEXT PRIMARY KEY, value TEXT)",
+    ),
+]
+
+def migrate_db(db_conn):
+    """Applies pending MIGRATIONS in order without dropping data. Returns the resulting schema version."""
+    for target_version in range(1, len(MIGRATIONS) + 1):
+        if db_conn.execute("PRAGMA user_version").fetchone()[0] >= target_version: continue
+        db_conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-check under the write lock: another worker may have migrated meanwhile.
+            if db_conn.execute("PRAGMA user_version").fetchone()[0] < target_version:
+                print(f"Migrating database schema to version {target_version}...")
+                for step in MIGRATIONS[target_version - 1]:
+                    if callable(step): step(db_conn)
+                    else: db_conn.execute(step)
+                db_conn.execute(f"PRAGMA user_version = {target_version}")
+            db_conn.commit()
+        except Exception:
+            db_conn.rollback()
+            raise
+    return db_conn.execute("PRAGMA user_version").fetchone()[0]
+
+# --- Chore schedules ---
+# A frequency is compiled once into a Schedule and stored on the assignment row so that
+# SQL can pick due chores with SCHEDULE_DUE_PREDICATE. Accepted frequencies:
+#   'daily', 'weekdays', 'weekends', a day name, or comma-separated day names ('monday,thursday')
+#   'every:N:YYYY-MM-DD'  every N days counting from the given date ('every:N' is pinned to today)
+#   'monthly:D'           day D of each month, or the month's last day when it is shorter
+ALL_WEEKDAYS_MASK = 0b1111111
+WEEKDAY_MASKS = {'daily': ALL_WEEKDAYS_MASK, 'weekdays': 0b0011111, 'weekends': 0b1100000,
+                 **{day_name: 1 << idx for idx, day_name in enumerate(DAY_NAMES)}}
+class Schedule(namedtuple('Schedule', 'weekday_mask interval_days anchor_day month_day')):
+    """Compiled assignment frequency: a Monday-first 7-bit weekday mask plus optional interval and monthly rules."""
+    __slots__ = ()
+
+    def is_due(self, day):
+        if not self.weekday_mask & (1 << day.weekday()): return False
+        if self.interval_days and (day.toordinal() < self.anchor_day or (day.toordinal() - self.anchor_day) % self.interval_days): return False
+        if self.month_day:
+            last_month_day = calendar.monthrange(day.year, day.month)[1]
+            return day.day == min(self.month_day, last_month_day)
+        return True
+
+    def due_dates(self, start_date, end_date):
+        return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)
+                if self.is_due(start_date + timedelta(days=offset))]
+
+NEVER_DUE = Schedule(0, None, None, None)
+
+def compile_frequency(frequency):
+    """Compiles a frequency string into a Schedule. Raises ValueError for frequencies it does not understand."""
+    freq = (frequency or '').strip().lower()
+    kind, _, rest = freq.partition(':')
+    if kind == 'every':
+        interval, _, anchor = rest.partition(':')
+        interval_days = int(interval)
+        if interval_days < 1 or not anchor: raise ValueError(f"Invalid frequency: {frequency}")
+        return Schedule(ALL_WEEKDAYS_MASK, interval_days, date.fromisoformat(anchor).toordinal(), None)
+    if kind == 'monthly':
+        month_day = int(rest)
+        if not 1 <= month_day <= 31: raise ValueError(f"Invalid frequency: {frequency}")
+        return Schedule(ALL_WEEKDAYS_MASK, None, None, month_day)
+    weekday_mask = 0
+    for part in freq.split(','):
+        if part.strip() not in WEEKDAY_MASKS: raise ValueError(f"Invalid frequency: {frequency}")
+        weekday_mask |= WEEKDAY_MASKS[part.strip()]
+    return Schedule(weekday_mask, None, None, None)
+
+def normalize_frequency(frequency, today_date_obj):
+    """Validates a frequency and pins a bare 'every:N' to today. Returns (frequency, Schedule)."""
+    freq = (frequency or '').strip().lower()
+    if freq.startswith('every:') and freq.count(':') == 1:
+        freq = f"{freq}:{today_date_obj.isoformat()}"
+    return freq, compile_frequency(freq)
+
+def compile_all_schedules(db_conn):
+    """Recompiles the stored schedule of every assignment from its frequency text."""
+    rows = db_conn.execute("SELECT id, frequency FROM chore_assignments").fetchall()
+    compiled = []
+    for assignment_id, frequency in rows:
+        try: schedule = compile_frequency(frequency)
+        except ValueError: schedule = NEVER_DUE
+        compiled.append(tuple(schedule) + (assignment_id,))
+    db_conn.executemany("UPDATE chore_assignments SET weekday_mask = ?, interval_days = ?, anchor_day = ?, month_day = ? WHERE id = ?", compiled)
+
+def schedule_day_params(day):
+    """The (day, weekday_bit, month_day, last_month_day) values SCHEDULE_DUE_PREDICATE reads for one day."""
+    return (day.toordinal(), 1 << day.weekday(), day.day, calendar.monthrange(day.year, day.month)[1])
+
+# Every day of an inclusive date range as `d`, with the columns SCHEDULE_DUE_PREDICATE reads (the
+# SQL twin of schedule_day_params). Bind the ISO start and end dates.
+DUE_DAYS_IN_RANGE_CTE = """
+    WITH RECURSIVE days(iso) AS (
+        SELECT date(?) UNION ALL SELECT date(iso, '+1 day') FROM days WHERE iso < date(?)
+    ), d AS (
+        SELECT iso, CAST(julianday(iso) - 1721424.5 AS INTEGER) AS day,
+               1 << ((CAST(strftime('%w', iso) AS INTEGER) + 6) % 7) AS weekday_bit,
+               CAST(strftime('%d', iso) AS INTEGER) AS month_day,
+               CAST(strftime('%d', iso, 'start of month', '+1 month', '-1 day') AS INTEGER) AS last_month_day
+        FROM days
+    )"""
+# Every active assignment due on every day of the range, for all kids; extend the WHERE clause.
+DUE_IN_RANGE_ALL_KIDS_FROM = """d JOIN chore_assignments ca JOIN chores_master cm ON ca.chore_id = cm.id
+    WHERE ca.is_active = 1 AND """ + SCHEDULE_DUE_PREDICATE
+# Every (day, assignment) pair due for one kid in a date range, computed entirely in SQL.
+# Bind the ISO start date, the ISO end date and the kid id.
+DUE_DATES_IN_RANGE_SQL = DUE_DAYS_IN_RANGE_CTE + """
+    SELECT d.iso AS day, ca.id AS assignment_id FROM """ + DUE_IN_RANGE_ALL_KIDS_FROM + """ AND ca.kid_id = ?
+    ORDER BY d.iso, ca.id
+"""
+
+def due_dates_for_kid(kid_id, start_date, end_date):
+    """Returns {ISO date: [assignment ids due that day]} for every day in the inclusive range."""
+    due_by_day = {}
+    for row in query_db(DUE_DATES_IN_RANGE_SQL, (start_date.isoformat(), end_date.isoformat(), kid_id)):
+        due_by_day.setdefault(row['day'], []).append(row['assignment_id'])
+    return due_by_day
+
+# --- Today board ---
+# today_board holds every kid's due chores for one day, so serving chores-today is a keyed read of
+# the kid's rows plus their completion flags. The first request of a new household day rebuilds
+# it; in between, triggers on chore_assignments and chores_master keep it current.
+def build_today_board(db_conn, day):
+    """Rebuilds every kid's board for `day`. Run it inside a transaction (or a migration)."""
+    db_conn.execute("DELETE FROM today_board")
+    db_conn.execute("INSERT OR REPLACE INTO today_board_day (id, iso, day, weekday_bit, month_day, last_month_day) VALUES (1, ?, ?, ?, ?, ?)",
+                    (day.isoformat(),) + schedule_day_params(day))
+    db_conn.execute(f"INSERT INTO today_board ({TODAY_BOARD_COLUMNS}) " + TODAY_BOARD_SELECT)
+
+def ensure_today_board(day):
+    """Rolls the board over to `day` unless it is already built for it."""
+    household = current_household()
+    if household.board_day == day: return
+    built = query_db("SELECT iso FROM today_board_day WHERE id = 1", one=True)
+    if not built or built['iso'] != day.isoformat():
+        run_write(lambda: build_today_board(get_db(), day))
+    household.board_day = day
+
+# Hot-path lookups issued by the endpoints, with sample arguments. `flask check-query-plans`
+# runs EXPLAIN QUERY PLAN over each one and fails if any of them falls back to a table scan.
+HOT_QUERIES = {
+    "completion for assignment today": ("SELECT id FROM chore_completions WHERE assignment_id = ? AND kid_id = ? AND date_completed = ?", (1, 1, '2000-01-01')),
+    "kid completions for a day": ("SELECT id FROM chore_completions WHERE kid_id = ? AND date_completed = ?", (1, '2000-01-01')),
+    "daily star for kid today": ("SELECT id FROM stars WHERE kid_id = ? AND date_awarded = ? AND type = 'daily'", (1, '2000-01-01')),
+    "latest conversion star today": ("SELECT id FROM stars WHERE kid_id = ? AND date_awarded = ? AND type = 'balloon_conversion' ORDER BY id DESC LIMIT ?", (1, '2000-01-01', 1)),
+    "kid stats": (KID_STATS_SQL, (1,)),
+    "oldest stars to decrement": ("SELECT id FROM stars WHERE kid_id = ? ORDER BY date_awarded ASC, id ASC LIMIT ?", (1, 1)),
+    "today board for kid": (TODAY_BOARD_SQL, ('2000-01-03', 1)),
+    "existing assignment": ("SELECT id FROM chore_assignments WHERE kid_id = ? AND chore_id = ? AND frequency = ? AND timeframe = ?", (1, 1, 'daily', 'any')),
+}
+
+def unindexed_query_plans(db_conn):
+    """Returns {query name: plan lines} for every HOT_QUERIES entry whose plan contains a full table scan."""
+    failures = {}
+    for name, (sql, args) in HOT_QUERIES.items():
+        plan = [row[3] for row in db_conn.execute("EXPLAIN QUERY PLAN " + sql, args)]
+        # Scanning a one-row derived table (e.g. the day parameters) is fine; scanning a stored table is not.
+        derived = {detail.split()[1] for detail in plan if detail.startswith(("MATERIALIZE ", "CO-ROUTINE "))}
+        if any(detail.startswith("SCAN ") and detail.split()[1] not in derived | {"CONSTANT"} for detail in plan):
+            failures[name] = plan
+    return failures
+# Kids whose maintained counters disagree with the stars table plus the archived star summaries.
+COUNTER_DRIFT_SQL = """
+    SELECT * FROM (
+        SELECT k.id, k.name, k.stars_count, k.train_laps_completed, k.train_track_length,
+               (SELECT COUNT(*) FROM stars s WHERE s.kid_id = k.id)
+               + (SELECT COALESCE(SUM(a.stars), 0) FROM star_daily_summary a WHERE a.kid_id = k.id) AS actual_stars_count
+        FROM kids k
+    )
+    WHERE stars_count != actual_stars_count
+       OR (train_track_length > 0 AND train_laps_completed != actual_stars_count / train_track_length)
+"""
+
+def check_kid_counters(repair=False):
+    """Compares kids.stars_count/train_laps_completed with the stars and star summary tables, optionally rebuilding them. Returns the drifted rows."""
+    drifted = [dict(row) for row in query_db(COUNTER_DRIFT_SQL)]
+    if repair and drifted:
+        with transaction():
+            executemany_db("UPDATE kids SET stars_count = ? WHERE id = ?", [(row['actual_stars_count'], row['id']) for row in drifted])
+    return drifted
+
+# --- History compaction ---
+# Completions and stars older than this many days are rolled into the *_daily_summary tables by a
+# background thread in each worker; 0 leaves compaction to `flask compact-history`.
+HISTORY_COMPACT_AFTER_DAYS = int(os.environ.get('HISTORY_COMPACT_AFTER_DAYS', 0))
+HISTORY_COMPACT_INTERVAL_SECONDS = 24 * 60 * 60
+INCREMENTAL_VACUUM_PAGES = 2000
+
+def compact_history(before_day):
+    """Moves completions and stars dated before `before_day` into per-kid per-day summaries.
+
+    kids.stars_count is topped back up by the number of archived stars in the same transaction, so
+    totals and laps do not change. Returns (completions archived, stars archived).
+    """
+    cutoff = before_day.isoformat()
+    with transaction():
+        execute_db("""INSERT INTO completion_daily_summary (kid_id, day, completions)
+                      SELECT kid_id, date_completed, COUNT(*) FROM chore_completions
+                      WHERE date_completed < ? AND kid_id IS NOT NULL GROUP BY kid_id, date_completed
+                      ON CONFLICT (kid_id, day) DO UPDATE SET completions = completions + excluded.completions""", (cutoff,))
+        # Close every day being archived first: closing reads the detailed completions.
+        close_stats_days(get_db(), household_today() - timedelta(days=1))
+        archived_days = query_db("SELECT kid_id, date_completed, COUNT(*) AS completions FROM chore_completions WHERE date_completed < ? AND kid_id IS NOT NULL GROUP BY kid_id, date_completed", (cutoff,))
+        completions = execute_db("DELETE FROM chore_completions WHERE date_completed < ? AND kid_id IS NOT NULL", (cutoff,), rowcount=True)
+        executemany_db("UPDATE kid_daily_stats SET done = done + ? WHERE kid_id = ? AND day = ?", [(row['completions'], row['kid_id'], row['date_completed']) for row in archived_days])
+        archived_types = query_db("SELECT kid_id, type, COUNT(*) AS stars FROM stars WHERE date_awarded < ? AND kid_id IS NOT NULL GROUP BY kid_id, type", (cutoff,))
+        archived_by_kid = query_db("SELECT kid_id, COUNT(*) AS stars FROM stars WHERE date_awarded < ? AND kid_id IS NOT NULL GROUP BY kid_id", (cutoff,))
+        execute_db("""INSERT INTO star_daily_summary (kid_id, day, type, stars)
+                      SELECT kid_id, date_awarded, type, COUNT(*) FROM stars
+                      WHERE date_awarded < ? AND kid_id IS NOT NULL GROUP BY kid_id, date_awarded, type
+                      ON CONFLICT (kid_id, day, type) DO UPDATE SET stars = stars + excluded.stars""", (cutoff,))
+        stars = execute_db("DELETE FROM stars WHERE date_awarded < ? AND kid_id IS NOT NULL", (cutoff,), rowcount=True)
+        # The delete triggers took the archived rows off stars_count and the stats tables; put them back.
+        executemany_db("UPDATE kids SET stars_count = stars_count + ? WHERE id = ?", [(row['stars'], row['kid_id']) for row in archived_by_kid])
+        executemany_db("UPDATE kid_star_type_stats SET stars = stars + ? WHERE kid_id = ? AND type = ?", [(row['stars'], row['kid_id'], row['type']) for row in archived_types])
+    return completions, stars
+
+def take_archived_stars(kid_id, count, star_type_filter=None):
+    """Removes up to `count` of a kid's oldest archived stars. Must run inside transaction(). Returns how many were removed."""
+    sql = "SELECT day, type, stars FROM star_daily_summary WHERE kid_id = ?"; params = [kid_id]
+    if star_type_filter and star_type_filter != "any": sql += " AND type = ?"; params.append(star_type_filter)
+    sql += " ORDER BY day ASC, type ASC LIMIT ?"; params.append(count)
+    taken = 0; updates = []
+    for row in query_db(sql, tuple(params)):
+        if taken >= count: break
+        n = min(row['stars'], count - taken); taken += n
+        updates.append((n, kid_id, row['day'], row['type']))
+    if updates:
+        executemany_db("UPDATE star_daily_summary SET stars = stars - ? WHERE kid_id = ? AND day = ? AND type = ?", updates)
+        execute_db("DELETE FROM star_daily_summary WHERE kid_id = ? AND stars <= 0", (kid_id,))
+        execute_db("UPDATE kids SET stars_count = stars_count - ? WHERE id = ?", (taken, kid_id))
+        executemany_db("UPDATE kid_star_type_stats SET stars = stars - ? WHERE kid_id = ? AND type = ?", [(n, kid_id, star_type) for n, _, _, star_type in updates])
+    return taken
+
+def incremental_vacuum(max_pages=INCREMENTAL_VACUUM_PAGES):
+    """Returns up to `max_pages` free pages to the filesystem. The first call on an older database
+    switches it to auto_vacuum=INCREMENTAL, which needs one full VACUUM; that cannot run inside a
+    transaction, so on the write queue an older database is left for `flask compact-history`.
+    Returns the pages freed."""
+    db = get_db()
+    if db.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        if db.in_transaction: return 0
+        free_pages = db.execute("PRAGMA freelist_count").fetchone()[0]
+        db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        db.execute("VACUUM")
+        return free_pages
+    free_pages = db.execute("PRAGMA freelist_count").fetchone()[0]
+    # sqlite3 steps a statement that returns no columns only once, and each step frees one page.
+    for _ in range(min(free_pages, max_pages)): db.execute("PRAGMA incremental_vacuum")
+    return free_pages - db.execute("PRAGMA freelist_count").fetchone()[0]
+
+def _compact_history_periodically():
+    while True:
+        for slug in households.slugs():
+            try:
+                with household_context(slug):
+                    archived = run_write(compact_history, household_today() - timedelta(days=HISTORY_COMPACT_AFTER_DAYS))
+                    if any(archived):
+                        data_version().bump()
+                        run_write(incremental_vacuum)
+                        app.logger.info("Compacted %d completions and %d stars for household %s", *archived, slug or 'default')
+            except (sqlite3.Error, UnknownHousehold, concurrent.futures.TimeoutError):
+                app.logger.exception("History compaction failed for household %s", slug or 'default')
+        time.sleep(HISTORY_COMPACT_INTERVAL_SECONDS)
+
+_history_compactor = None
+_history_compactor_lock = threading.Lock()
+
+if HISTORY_COMPACT_AFTER_DAYS > 0:
+    @app.before_request
+    def start_history_compactor():
+        # Started from the first request so every forked worker gets its own thread.
+        global _history_compactor
+        if _history_compactor is not None and _history_compactor[1] == os.getpid(): return
+        with _history_compactor_lock:
+            if _history_compactor is None or _history_compactor[1] != os.getpid():
+                thread = threading.Thread(target=_compact_history_periodically, name='history-compactor', daemon=True)
+                _history_compactor = (thread, os.getpid())
+                thread.start()
+
+# --- Kid statistics ---
+# Maintained as the data changes, so reading them never scans history:
+#   kid_daily_stats.done      completions per kid per day (triggers on chore_completions)
+#   kid_star_type_stats       stars per kid per type (triggers on stars)
+#   kid_streaks               daily-star streaks (record_daily_star, from the award/revoke paths)
+#   kid_daily_stats.due, kid_chore_stats
+#                             chores due and done per day/chore, filled in once a day is over by
+#                             close_stats_days against the schedules in force at that time.
+STATS_TABLES = ('kid_daily_stats', 'kid_chore_stats', 'kid_star_type_stats', 'kid_streaks', 'stats_meta')
+STATS_WEEKS = 8
+STATS_MONTHS = 6
+STATS_MOST_SKIPPED = 5
+
+def _close_stats_range(db_conn, first_day, last_day):
+    """Adds the due counts and per-chore due/done of every day from `first_day` through `last_day`, two statements in all."""
+    days = (first_day.isoformat(), last_day.isoformat())
+    db_conn.execute(DUE_DAYS_IN_RANGE_CTE + """
+                    INSERT INTO kid_daily_stats (kid_id, day, due) SELECT ca.kid_id, d.iso, COUNT(*)
+                    FROM """ + DUE_IN_RANGE_ALL_KIDS_FROM + """ GROUP BY ca.kid_id, d.iso
+                    ON CONFLICT (kid_id, day) DO UPDATE SET due = excluded.due""", days)
+    db_conn.execute(DUE_DAYS_IN_RANGE_CTE + """
+                    INSERT INTO kid_chore_stats (kid_id, chore_id, due, done)
+                    SELECT ca.kid_id, ca.chore_id, COUNT(*),
+                           SUM(EXISTS (SELECT 1 FROM chore_completions cc WHERE cc.assignment_id = ca.id AND cc.date_completed = d.iso))
+                    FROM """ + DUE_IN_RANGE_ALL_KIDS_FROM + """ GROUP BY ca.kid_id, ca.chore_id
+                    ON CONFLICT (kid_id, chore_id) DO UPDATE SET due = due + excluded.due, done = done + excluded.done""", days)
+
+def close_stats_days(db_conn, through_day):
+    """Records due counts and per-chore due/done for every day after the last closed one up to `through_day`."""
+    closed = db_conn.execute("SELECT value FROM stats_meta WHERE name = 'closed_through'").fetchone()
+    if closed and closed[0] >= through_day.isoformat(): return
+    # With nothing closed yet there is no history to catch up on; start counting from here.
+    day = date.fromisoformat(closed[0]) + timedelta(days=1) if closed else through_day + timedelta(days=1)
+    if not closed: db_conn.execute("INSERT OR REPLACE INTO stats_meta (name, value) VALUES ('closed_from', ?)", (day.isoformat(),))
+    if day <= through_day: _close_stats_range(db_conn, day, through_day)
+    db_conn.execute("INSERT OR REPLACE INTO stats_meta (name, value) VALUES ('closed_through', ?)", (through_day.isoformat(),))
+
+def stats_closed_range(db_conn, today):
+    """The first and last day close_stats_days has counted; an empty range starting today if none."""
+    meta = dict(db_conn.execute("SELECT name, value FROM stats_meta WHERE name IN ('closed_from', 'closed_through')").fetchall())
+    closed_through = date.fromisoformat(meta['closed_through']) if 'closed_through' in meta else today - timedelta(days=1)
+    if 'closed_from' not in meta:
+        # Databases from before closed_from was recorded: the first day with a due count.
+        first = db_conn.execute("SELECT MIN(day) FROM kid_daily_stats WHERE due IS NOT NULL").fetchone()[0]
+        meta['closed_from'] = first or (closed_through + timedelta(days=1)).isoformat()
+    return date.fromisoformat(meta['closed_from']), closed_through
+
+def record_daily_star(kid_id, day, earned):
+    """Updates kid_streaks (and the day's daily_star flag) after a daily star is awarded or revoked. Must run inside transaction()."""
+    day_str = day.isoformat(); previous_day = (day - timedelta(days=1)).isoformat()
+    execute_db("""INSERT INTO kid_daily_stats (kid_id, day, daily_star) VALUES (?, ?, ?)
+                  ON CONFLICT (kid_id, day) DO UPDATE SET daily_star = excluded.daily_star""", (kid_id, day_str, int(earned)))
+    streak = query_db("SELECT current_streak, current_end, longest_streak, longest_end FROM kid_streaks WHERE kid_id = ?", (kid_id,), one=True)
+    current, current_end, longest, longest_end = tuple(streak) if streak else (0, None, 0, None)
+    if earned:
+        if current_end == day_str: return
+        current = current + 1 if current_end == previous_day else 1; current_end = day_str
+        if current > longest: longest, longest_end = current, day_str
+    else:
+        if current_end != day_str: return
+        # Only the streak ending on this day shrinks; an equally long earlier streak keeps its own end.
+        if longest_end == day_str: longest, longest_end = longest - 1, previous_day if longest > 1 else None
+        current -= 1; current_end = previous_day if current else None
+    execute_db("INSERT OR REPLACE INTO kid_streaks (kid_id, current_streak, current_end, longest_streak, longest_end) VALUES (?, ?, ?, ?, ?)",
+               (kid_id, current, current_end, longest, longest_end))
+
+def rebuild_stats(db_conn, today):
+    """Recomputes every stats table from completions, stars and their summaries.
+
+    Due counts are recomputed with today's schedules, and only from the first day that still has
+    detailed completions; compacted days keep their done counts but drop out of completion rates.
+    """
+    for table in STATS_TABLES: db_conn.execute(f"DELETE FROM {table}")
+    db_conn.execute("""INSERT INTO kid_star_type_stats (kid_id, type, stars)
+                       SELECT kid_id, type, SUM(n) FROM (
+                           SELECT kid_id, type, COUNT(*) AS n FROM stars GROUP BY kid_id, type
+                           UNION ALL SELECT kid_id, type, SUM(stars) FROM star_daily_summary GROUP BY kid_id, type)
+                       GROUP BY kid_id, type""")
+    db_conn.execute("""INSERT INTO kid_daily_stats (kid_id, day, done)
+                       SELECT kid_id, day, SUM(n) FROM (
+                           SELECT kid_id, date_completed AS day, COUNT(*) AS n FROM chore_completions GROUP BY kid_id, date_completed
+                           UNION ALL SELECT kid_id, day, completions FROM completion_daily_summary)
+                       GROUP BY kid_id, day""")
+    db_conn.execute("""INSERT INTO kid_daily_stats (kid_id, day, daily_star)
+                       SELECT kid_id, day, 1 FROM (
+                           SELECT kid_id, date_awarded AS day FROM stars WHERE type = 'daily'
+                           UNION SELECT kid_id, day FROM star_daily_summary WHERE type = 'daily') WHERE 1
+                       ON CONFLICT (kid_id, day) DO UPDATE SET daily_star = 1""")
+    first_day = db_conn.execute("SELECT MIN(date_completed) FROM chore_completions").fetchone()[0]
+    start = date.fromisoformat(first_day) if first_day else today
+    db_conn.executemany("INSERT INTO stats_meta (name, value) VALUES (?, ?)", [('closed_from', start.isoformat()), ('closed_through', (start - timedelta(days=1)).isoformat())])
+    close_stats_days(db_conn, today - timedelta(days=1))
+    rebuild_streaks(db_conn)
+
+def rebuild_streaks(db_conn, kid_ids=None):
+    """Recomputes kid_streaks from the daily_star flags, for every kid or just `kid_ids`."""
+    sql = "SELECT kid_id, day FROM kid_daily_stats WHERE daily_star = 1"
+    if kid_ids is not None:
+        kid_ids = tuple(kid_ids)
+        if not kid_ids: return
+        sql += f" AND kid_id IN ({sql_placeholders(kid_ids)})"
+        db_conn.execute(f"DELETE FROM kid_streaks WHERE kid_id IN ({sql_placeholders(kid_ids)})", kid_ids)
+    streaks = {}
+    for kid_id, day_str in db_conn.execute(sql + " ORDER BY kid_id, day", kid_ids or ()):
+        day = date.fromisoformat(day_str)
+        current, current_end, longest, longest_end = streaks.get(kid_id, (0, None, 0, None))
+        current = current + 1 if current_end == day - timedelta(days=1) else 1
+        if current > longest: longest, longest_end = current, day
+        streaks[kid_id] = (current, day, longest, longest_end)
+    db_conn.executemany("INSERT INTO kid_streaks (kid_id, current_streak, current_end, longest_streak, longest_end) VALUES (?, ?, ?, ?, ?)",
+                        [(kid_id, current, current_end.isoformat(), longest, longest_end.isoformat()) for kid_id, (current, current_end, longest, longest_end) in streaks.items()])
+
+def add_history_stats(db_conn, after_completion_id, after_star_id, today):
+    """Counts completions and stars with ids above the given ones, inserted with the stats triggers
+    dropped, into the stats tables; unlike rebuild_stats this keeps what compacted days contributed.
+
+    Days already closed gain the per-chore done counts of the new completions; imported days before
+    the first closed one are closed now. Streaks are recomputed for the kids given daily stars.
+    """
+    db_conn.execute("""INSERT INTO kid_daily_stats (kid_id, day, done)
+                       SELECT kid_id, date_completed, COUNT(*) FROM chore_completions WHERE id > ? GROUP BY kid_id, date_completed
+                       ON CONFLICT (kid_id, day) DO UPDATE SET done = done + excluded.done""", (after_completion_id,))
+    db_conn.execute("""INSERT INTO kid_star_type_stats (kid_id, type, stars)
+                       SELECT kid_id, type, COUNT(*) FROM stars WHERE id > ? GROUP BY kid_id, type
+                       ON CONFLICT (kid_id, type) DO UPDATE SET stars = stars + excluded.stars""", (after_star_id,))
+    db_conn.execute("""INSERT INTO kid_daily_stats (kid_id, day, daily_star)
+                       SELECT DISTINCT kid_id, date_awarded, 1 FROM stars WHERE id > ? AND type = 'daily'
+                       ON CONFLICT (kid_id, day) DO UPDATE SET daily_star = 1""", (after_star_id,))
+    closed_from, closed_through = stats_closed_range(db_conn, today)
+    first_day = db_conn.execute("SELECT MIN(date_completed) FROM chore_completions WHERE id > ? AND date_completed <= ?",
+                                (after_completion_id, closed_through.isoformat())).fetchone()[0]
+    first_day = date.fromisoformat(first_day) if first_day else None
+    if first_day and max(first_day, closed_from) <= closed_through:
+        # A new completion is the first of its assignment that day (the unique index), so each one due adds one done.
+        db_conn.execute(DUE_DAYS_IN_RANGE_CTE + """
+                        INSERT INTO kid_chore_stats (kid_id, chore_id, due, done)
+                        SELECT ca.kid_id, ca.chore_id, 0, COUNT(*) FROM """ + DUE_IN_RANGE_ALL_KIDS_FROM + """
+                        AND EXISTS (SELECT 1 FROM chore_completions cc WHERE cc.assignment_id = ca.id AND cc.date_completed = d.iso AND cc.id > ?)
+                        GROUP BY ca.kid_id, ca.chore_id
+                        ON CONFLICT (kid_id, chore_id) DO UPDATE SET done = done + excluded.done""",
+                        (max(first_day, closed_from).isoformat(), closed_through.isoformat(), after_completion_id))
+    if first_day and first_day < closed_from:
+        _close_stats_range(db_conn, first_day, closed_from - timedelta(days=1))
+        db_conn.executemany("INSERT OR REPLACE INTO stats_meta (name, value) VALUES (?, ?)", [('closed_from', first_day.isoformat()), ('closed_through', closed_through.isoformat())])
+    rebuild_streaks(db_conn, [row[0] for row in db_conn.execute("SELECT DISTINCT kid_id FROM stars WHERE id > ? AND type = 'daily'", (after_star_id,))])
+
+def _completion_rate(due, done):
+    return {"due": due, "done": done, "rate": round(done / due, 3) if due else None}
+
+def kid_stats_summary(kid_id, today):
+    """Reads the maintained aggregates for one kid; the work is bounded by STATS_MONTHS of daily rows."""
+    yesterday = today - timedelta(days=1)
+    streak = query_db("SELECT current_streak, current_end, longest_streak FROM kid_streaks WHERE kid_id = ?", (kid_id,), one=True)
+    # A streak stays current while its last star is from today or yesterday.
+    current = streak['current_streak'] if streak and streak['current_end'] and streak['current_end'] >= yesterday.isoformat() else 0
+    stars_by_type = {row['type']: row['stars'] for row in query_db("SELECT type, stars FROM kid_star_type_stats WHERE kid_id = ? AND stars > 0", (kid_id,))}
+    first_month = today.replace(day=1)
+    for _ in range(STATS_MONTHS - 1): first_month = (first_month - timedelta(days=1)).replace(day=1)
+    week_start = today - timedelta(days=today.weekday())
+    first_week = week_start - timedelta(weeks=STATS_WEEKS - 1)
+    days = query_db("""SELECT day, due, MIN(done, due) AS done FROM kid_daily_stats
+                       WHERE kid_id = ? AND day >= ? AND day <= ? AND due > 0""",
+                    (kid_id, min(first_month, first_week).isoformat(), yesterday.isoformat()))
+    weekly = {(first_week + timedelta(weeks=i)).isoformat(): [0, 0] for i in range(STATS_WEEKS)}
+    monthly = {}; month = first_month
+    while month <= today:
+        monthly[month.isoformat()[:7]] = [0, 0]
+        month = (month + timedelta(days=32)).replace(day=1)
+    last_7 = [0, 0]; last_30 = [0, 0]
+    for row in days:
+        day = date.fromisoformat(row['day']); age = (today - day).days
+        for bucket in (weekly.get((day - timedelta(days=day.weekday())).isoformat()), monthly.get(row['day'][:7]),
+                       last_7 if age <= 7 else None, last_30 if age <= 30 else None):
+            if bucket is not None: bucket[0] += row['due']; bucket[1] += row['done']
+    most_skipped = query_db("""SELECT ks.chore_id, cm.name AS chore_name, ks.due, ks.due - ks.done AS skipped
+                               FROM kid_chore_stats ks JOIN chores_master cm ON cm.id = ks.chore_id
+                               WHERE ks.kid_id = ? AND ks.due > ks.done ORDER BY skipped DESC, ks.chore_id LIMIT ?""", (kid_id, STATS_MOST_SKIPPED))
+    return {
+        "kid_id": kid_id,
+        "streak": {"current": current, "longest": streak['longest_streak'] if streak else 0},
+        "stars_by_type": stars_by_type,
+        "completion": {
+            "last_7_days": _completion_rate(*last_7), "last_30_days": _completion_rate(*last_30),
+            "weekly": [dict(_completion_rate(*totals), week_start=week) for week, totals in weekly.items()],
+            "monthly": [dict(_completion_rate(*totals), month=month) for month, totals in monthly.items()],
+        },
+        "most_skipped": [dict(row) for row in most_skipped],
+    }
+
+# --- Live updates (Server-Sent Events) ---
+SSE_HEARTBEAT_SECONDS = 15
+SSE_QUEUE_SIZE = 256
+# How often to look for commits made by other worker processes, which never reach this bus.
+SSE_FOREIGN_WRITE_POLL_SECONDS = float(os.environ.get('SSE_FOREIGN_WRITE_POLL_SECONDS', 2))
+
+class EventBus:
+    """In-process publish/subscribe that fans change events out to the open /api/stream responses."""
+    def __init__(self):
+        self.published = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stopped = False
+        # The watcher's connection and the data_version it last accounted for (see local_commit).
+        self._watch_lock = threading.Lock()
+        self._watch_conn = None
+        self._seen_version = None
+        self._foreign_pending = False
+
+    def subscribe(self, deliver):
+        with self._lock:
+            self._subscribers.add(deliver)
+
+    def unsubscribe(self, deliver):
+        with self._lock:
+            self._subscribers.discard(deliver)
+
+    def has_subscribers(self):
+        with self._lock:
+            return bool(self._subscribers)
+
+    def stop(self):
+        self._stopped = True
+
+    def publish(self, event_type, **data):
+        after_commit(functools.partial(self._publish, dict(data, type=event_type)))
+
+    def _publish(self, event):
+        with self._lock:
+            self.published += 1
+            subscribers = list(self._subscribers)
+        for deliver in subscribers:
+            deliver(event)
+
+    def watch_foreign_writes(self, db_path):
+        """Starts (once) a thread that publishes 'resync' when another process commits to the database."""
+        with self._lock:
+            if self._watcher is not None: return
+            self._watcher = threading.Thread(target=self._watch, args=(db_path,), name='sse-write-watcher', daemon=True)
+        self._watcher.start()
+
+    def local_commit(self, commit):
+        """Runs `commit` for a write made in this process, so the watcher does not take it for a foreign one.
+
+        data_version on the watcher's connection moves with every commit from any other connection,
+        this process's writer included. Reading it just before the commit (the write lock is held, so
+        nobody else can commit in between) and just after separates the two.
+        """
+        with self._watch_lock:
+            if self._watch_conn is None: return commit()
+            if self._data_version() != self._seen_version: self._foreign_pending = True
+            try: return commit()
+            finally: self._seen_version = self._data_version()
+
+    def _data_version(self):
+        return self._watch_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _watch(self, db_path):
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._watch_lock:
+            self._watch_conn = conn; self._seen_version = self._data_version(); self._foreign_pending = False
+        while not self._stopped:
+            time.sleep(SSE_FOREIGN_WRITE_POLL_SECONDS)
+            with self._watch_lock:
+                version = self._data_version()
+                foreign = self._foreign_pending or version != self._seen_version
+                self._seen_version = version; self._foreign_pending = False
+            if foreign and self._subscribers: self._publish({"type": "resync"})
+        with self._watch_lock: self._watch_conn = None
+        conn.close()
+
+event_bus = LocalProxy(lambda: current_household().event_bus)
+
+def publish_kid_stats(kid_id):
+    kid_stats = query_db(KID_STATS_SQL, (kid_id,), one=True)
+    if kid_stats: event_bus.publish('kid_stats', kid_id=int(kid_id), kid=dict(kid_stats))
+
+def _format_sse(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+@app.route('/api/stream')
+def event_stream():
+    events = queue.Queue(maxsize=SSE_QUEUE_SIZE)
+    overflowed = threading.Event()
+    def deliver(event):
+        try: events.put_nowait(event)
+        except queue.Full: overflowed.set()
+    # The generator outlives the request context, so hold on to this household's bus itself.
+    bus = current_household().event_bus
+    bus.watch_foreign_writes(get_pool().db_path)
+    def generate():
+        bus.subscribe(deliver)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try: event = events.get(timeout=SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if overflowed.is_set():
+                    # A slow client missed events; let it refetch instead of replaying a backlog.
+                    overflowed.clear()
+                    while not events.empty(): events.get_nowait()
+                    event = {"type": "resync"}
+                yield _format_sse(event)
+        finally:
+            bus.unsubscribe(deliver)
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# --- Response caching ---
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 512))
+COMPRESS_MIN_BYTES = 1024
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+class DataVersion:
+    """Household data version shared by worker processes through a stamp file next to the database.
+
+    Every successful write request replaces the stamp with a fresh token; reading the current
+    version costs one stat() call and never touches SQLite.
+    """
+    def __init__(self, stamp_path):
+        self.stamp_path = stamp_path
+        self._token = None
+        self._stamp_id = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        try: st = os.stat(self.stamp_path)
+        except FileNotFoundError: return self.bump()
+        # os.replace() gives every stamp a new inode, so (inode, mtime) changes even on coarse clocks.
+        stamp_id = (st.st_ino, st.st_mtime_ns)
+        if stamp_id != self._stamp_id:
+            with open(self.stamp_path) as f: token = f.read().strip()
+            with self._lock: self._token, self._stamp_id = token, stamp_id
+        return self._token
+
+    def bump(self):
+        token = secrets.token_hex(8)
+        tmp_path = f"{self.stamp_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f: f.write(token)
+        os.replace(tmp_path, self.stamp_path)
+        st = os.stat(self.stamp_path)
+        with self._lock: self._token, self._stamp_id = token, (st.st_ino, st.st_mtime_ns)
+        return token
+
+class ResponseCache:
+    """LRU of serialized JSON responses, each valid only for the data version it was built from."""
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['version'] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "not_modified": self.not_modified}
+
+response_cache = LocalProxy(lambda: current_household().response_cache)
+
+def data_version():
+    return current_household().data_version
+
+def _compress(body, encoding, compresslevel=6):
+    if encoding == 'br': return brotli.compress(body)
+    return gzip.compress(body, compresslevel=compresslevel)
+
+def encoded_response(entry, mimetype, etag, cache_control):
+    """Serves a cached entry's body, compressed per Accept-Encoding; variants are kept in entry['encoded']."""
+    body = entry['body']; headers = {'Vary': 'Accept-Encoding', 'Cache-Control': cache_control}
+    if len(body) >= COMPRESS_MIN_BYTES:
+        encoding = request.accept_encodings.best_match(['br', 'gzip'] if brotli else ['gzip'])
+        if encoding:
+            if encoding not in entry['encoded']: entry['encoded'][encoding] = _compress(body, encoding)
+            body = entry['encoded'][encoding]; headers['Content-Encoding'] = encoding
+    response = Response(body, mimetype=mimetype, headers=headers)
+    if etag: response.set_etag(etag, weak=True)
+    return response
+
+def cached_json(vary=None):
+    """Serves a GET endpoint from the response cache with an ETag tied to the data version.
+
+    The ETag is weak: the gzip, br and identity bodies differ byte for byte but mean the same thing.
+
+    `vary` returns whatever else the body depends on (e.g. today's date). A matching If-None-Match
+    is answered with 304 before the view or the database is touched.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            version = data_version().current()
+            key = (request.path, vary() if vary else '')
+            etag = hashlib.sha1(repr((version,) + key).encode()).hexdigest()
+            if request.if_none_match.contains_weak(etag):
+                response_cache.not_modified += 1
+                response = Response(status=304)
+                response.set_etag(etag, weak=True)
+                return response
+            entry = response_cache.get(key, version)
+            if entry is None:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200: return response
+                entry = {"version": version, "body": response.get_data(), "encoded": {}}
+                response_cache.put(key, entry)
+            return encoded_response(entry, 'application/json', etag, 'no-cache')
+        return wrapper
+    return decorator
+
+@app.after_request
+def bump_data_version_after_write(response):
+    if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and request.path.startswith('/api/') and 200 <= response.status_code < 300:
+        data_version().bump()
+        response_cache.clear()
+    return response
+
+def current_timeframe_for(now):
+    if now.hour < 12: return 'morning'
+    if now.hour >= 17: return 'night'
+    return 'any'
+
+# --- Households ---
+# Each household is one SQLite file with its own users, kids and chores, plus its own connection
+# pool, data version, response cache, user cache and event bus. A request picks its household from
+# the /h/<slug>/ URL prefix, then an X-Household header, then the household it logged in to.
+# Outside requests (CLI, background threads) CHORE_CHART_HOUSEHOLD names it. Without
+# HOUSEHOLDS_DIR there is a single default household (slug None) stored at DATABASE.
+HOUSEHOLD_SLUG = re.compile(r"^[a-z0-9][a-z0-9-]{0,62}$")
+HOUSEHOLD_URL_PREFIX = re.compile(r"^/h/([a-z0-9][a-z0-9-]{0,62})(?=/|$)")
+
+class UnknownHousehold(LookupError):
+    pass
+
+def household_db_path(slug):
+    if slug is None: return os.path.join(app.root_path, DATABASE)
+    if not HOUSEHOLD_SLUG.match(slug): raise UnknownHousehold(slug)
+    return os.path.join(app.root_path, HOUSEHOLDS_DIR, f"{slug}.db")
+
+class Household:
+    """Everything bound to one household's database file."""
+    def __init__(self, slug, db_path):
+        self.slug = slug
+        self.pool = ConnectionPool(db_path, app.config['DB_POOL_SIZE'], app.config['DB_BUSY_TIMEOUT_MS'], app.config['DB_CACHED_STATEMENTS'])
+        self.data_version = DataVersion(db_path + '-version')
+        self.response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES)
+        self.user_cache = UserCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL_SECONDS)
+        self.event_bus = EventBus()
+        self.writer = WriteQueue(self)
+        self.board_day = None
+        self.timezone = None
+        self.timezone_version = None
+        self.last_used = time.monotonic()
+
+    def busy(self):
+        return self.pool.in_use > 0 or self.writer.pending() > 0 or self.event_bus.has_subscribers()
+
+    def close(self):
+        self.writer.stop()
+        self.pool.close()
+        self.event_bus.stop()
+
+class HouseholdRegistry:
+    """LRU of open households. Opening one checks its schema; households idle for `idle_seconds`, and
+    the least recently used beyond `max_open`, are closed unless a request or an event stream is using them."""
+    def __init__(self, max_open, idle_seconds):
+        self.max_open = max_open
+        self.idle_seconds = idle_seconds
+        self.opened = 0
+        self.evicted = 0
+        self._open = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, slug):
+        now = time.monotonic()
+        with self._lock:
+            household = self._open.get(slug)
+            if household is not None:
+                self._open.move_to_end(slug)
+                household.last_used = now
+                return household
+        db_path = household_db_path(slug)
+        if slug is not None and not os.path.exists(db_path): raise UnknownHousehold(slug)
+        with self._lock:
+            household = self._open.get(slug)
+            if household is None:
+                household = self._open[slug] = Household(slug, db_path)
+                self.opened += 1
+            household.last_used = now
+            evicted = self._evict(now)
+        for old in evicted: old.close()
+        return household
+
+    def _evict(self, now):
+        evicted = []
+        for slug, household in list(self._open.items()):
+            over_capacity = len(self._open) > self.max_open
+            if not over_capacity and now - household.last_used < self.idle_seconds: break
+            if slug is None or household.busy(): continue
+            evicted.append(self._open.pop(slug))
+        self.evicted += len(evicted)
+        return evicted
+
+    def open_households(self):
+        with self._lock:
+            return list(self._open.values())
+
+    def slugs(self):
+        """Every household on disk (the default household alone in single-household mode)."""
+        if not HOUSEHOLDS_DIR: return [None]
+        directory = os.path.join(app.root_path, HOUSEHOLDS_DIR)
+        if not os.path.isdir(directory): return []
+        return sorted(name[:-3] for name in os.listdir(directory) if name.endswith('.db') and HOUSEHOLD_SLUG.match(name[:-3]))
+
+    def stats(self):
+        with self._lock:
+            return {"open": len(self._open), "max_open": self.max_open, "opened": self.opened, "evicted": self.evicted}
+
+households = HouseholdRegistry(HOUSEHOLD_MAX_OPEN, HOUSEHOLD_IDLE_SECONDS)
+
+def current_household_slug():
+    if not HOUSEHOLDS_DIR: return None
+    if has_request_context():
+        slug = request.environ.get('chore_chart.household') or request.headers.get('X-Household') or session.get('household')
+    else:
+        slug = os.environ.get('CHORE_CHART_HOUSEHOLD')
+    if not slug: raise UnknownHousehold("No household given; use /h/<slug>/, X-Household or CHORE_CHART_HOUSEHOLD")
+    return slug
+
+def current_household():
+    household = g.get('_household')
+    if household is None:
+        household = g._household = households.get(current_household_slug())
+    return household
+
+@contextmanager
+def household_context(slug):
+    """App context bound to one household, for CLI commands and background threads."""
+    with app.app_context():
+        g._household = households.get(slug)
+        yield g._household
+
+@app.errorhandler(UnknownHousehold)
+def unknown_household(error):
+    return jsonify({"error": "Unknown household"}), 404
+
+def mount_household_prefix(environ):
+    """Treats /h/<slug>/... as the app mounted at /h/<slug>, so url_for and request.script_root keep the prefix."""
+    match = HOUSEHOLD_URL_PREFIX.match(environ.get('PATH_INFO', ''))
+    if match:
+        environ['chore_chart.household'] = match.group(1)
+        environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '') + match.group(0)
+        environ['PATH_INFO'] = environ['PATH_INFO'][len(match.group(0)):] or '/'
+    return environ
+
+class HouseholdPrefixMiddleware:
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        return self.wsgi_app(mount_household_prefix(environ), start_response)
+
+app.wsgi_app = HouseholdPrefixMiddleware(app.wsgi_app)
+
+# --- Login throttling and password hashing ---
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_QUEUE_DEPTH = int(os.environ.get('PASSWORD_HASH_QUEUE_DEPTH', 8))
+PASSWORD_HASH_TIMEOUT_SECONDS = 10
+LOGIN_ATTEMPTS_PER_MINUTE_PER_IP = int(os.environ.get('LOGIN_ATTEMPTS_PER_MINUTE_PER_IP', 10))
+LOGIN_ATTEMPTS_PER_MINUTE_PER_USER = int(os.environ.get('LOGIN_ATTEMPTS_PER_MINUTE_PER_USER', 5))
+
+class PasswordHasherBusy(Exception):
+    pass
+
+class PasswordHasher:
+    """Runs bcrypt on a small thread pool so a burst of logins cannot occupy every request thread.
+
+    At most `workers + queue_depth` jobs are admitted; beyond that callers get PasswordHasherBusy
+    immediately instead of queueing behind the CPU-bound work.
+    """
+    def __init__(self, workers, queue_depth):
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock: self.rejected += 1
+            raise PasswordHasherBusy()
+        try:
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    # Threads do not survive a fork, so each worker process builds its own pool.
+                    self._executor = concurrent.futures.ThreadPoolExecutor(self.workers, thread_name_prefix='bcrypt')
+                    self._pid = os.getpid()
+                future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release(); raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result(timeout=PASSWORD_HASH_TIMEOUT_SECONDS)
+
+    def check(self, password_hash, password):
+        return self._submit(bcrypt.check_password_hash, password_hash, password)
+
+    def generate(self, password):
+        return self._submit(bcrypt.generate_password_hash, password).decode('utf-8')
+
+class TokenBucketLimiter:
+    """Per-key token buckets (`rate` attempts per `per` seconds, bursting to `rate`), kept for at most `max_keys` keys."""
+    def __init__(self, rate, per=60.0, max_keys=10000):
+        self.rate = rate
+        self.per = per
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        """Takes a token for `key`. Returns 0 when allowed, otherwise the seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.rate, now))
+            tokens = min(self.rate, tokens + (now - updated) * self.rate / self.per)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return 0 if allowed else (1 - tokens) * self.per / self.rate
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_DEPTH)
+login_limit_by_ip = TokenBucketLimiter(LOGIN_ATTEMPTS_PER_MINUTE_PER_IP)
+login_limit_by_user = TokenBucketLimiter(LOGIN_ATTEMPTS_PER_MINUTE_PER_USER)
+
+def bcrypt_rounds(password_hash):
+    try: return int(password_hash.split('$')[2])
+    except (IndexError, ValueError): return None
+
+# --- Static assets and page shells ---
+# The pages' scripts and styles live in static/ and are linked through content-fingerprinted URLs
+# (/assets/index.<digest>.js) that are cached as immutable: a changed file gets a new URL. Each
+# asset is read, hashed and compressed (gzip at level 9, brotli when installed) once per process.
+# The page shells are rendered once per template and mount point and revalidated by ETag, so a
+# kiosk reload is a 304 for the page and no request at all for its assets.
+ASSET_MAX_AGE_SECONDS = 365 * 24 * 3600
+PAGE_SHELL_MAX_ENTRIES = int(os.environ.get('PAGE_SHELL_MAX_ENTRIES', 256))
+ASSET_NAME = re.compile(r"^(?P<stem>[\w./-]+)\.(?P<digest>[0-9a-f]{12})(?P<ext>\.\w+)$")
+
+class StaticAsset:
+    """One file under static/ with its fingerprint and pre-compressed variants."""
+    def __init__(self, filename):
+        self.filename = filename
+        self.path = safe_join(app.static_folder, filename)
+        if self.path is None or not os.path.isfile(self.path): raise FileNotFoundError(filename)
+        self.mtime_ns = os.stat(self.path).st_mtime_ns
+        with open(self.path, 'rb') as f: self.body = f.read()
+        self.digest = hashlib.sha256(self.body).hexdigest()[:12]
+        stem, ext = os.path.splitext(filename)
+        self.fingerprinted = f"{stem}.{self.digest}{ext}"
+        self.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        self.encoded = {}
+        if len(self.body) >= COMPRESS_MIN_BYTES:
+            for encoding in (['br', 'gzip'] if brotli else ['gzip']): self.encoded[encoding] = _compress(self.body, encoding, compresslevel=9)
+
+class AssetRegistry:
+    """Loaded assets by file name; in debug mode an edited file is reloaded (and re-fingerprinted)."""
+    def __init__(self):
+        self._assets = {}
+        self._lock = threading.Lock()
+
+    def get(self, filename):
+        asset = self._assets.get(filename)
+        if asset is None or (app.debug and os.stat(asset.path).st_mtime_ns != asset.mtime_ns):
+            asset = StaticAsset(filename)
+            with self._lock: self._assets[filename] = asset
+        return asset
+
+    def url(self, filename):
+        return url_for('static_asset', filename=self.get(filename).fingerprinted)
+
+assets = AssetRegistry()
+app.jinja_env.globals['asset_url'] = assets.url
+page_shells = ResponseCache(PAGE_SHELL_MAX_ENTRIES)
+
+@app.route('/assets/<path:filename>')
+def static_asset(filename):
+    match = ASSET_NAME.match(filename)
+    if not match: return jsonify({"error": "Not found"}), 404
+    try: asset = assets.get(match.group('stem') + match.group('ext'))
+    except FileNotFoundError: return jsonify({"error": "Not found"}), 404
+    # A page rendered before a deploy may still ask for the previous digest: serve the current
+    # file, but only the URL that names its digest may be cached for good.
+    if match.group('digest') != asset.digest: cache_control = 'no-cache'
+    else: cache_control = f'public, max-age={ASSET_MAX_AGE_SECONDS}, immutable'
+    if request.if_none_match.contains_weak(asset.digest):
+        response = Response(status=304, headers={'Cache-Control': cache_control})
+        response.set_etag(asset.digest, weak=True)
+        return response
+    headers = {'Vary': 'Accept-Encoding', 'Cache-Control': cache_control}
+    body = asset.body
+    encoding = request.accept_encodings.best_match(list(asset.encoded)) if asset.encoded else None
+    if encoding: body = asset.encoded[encoding]; headers['Content-Encoding'] = encoding
+    response = Response(body, mimetype=asset.mimetype, headers=headers)
+    response.set_etag(asset.digest, weak=True)
+    return response
+
+def page_shell(template, cache_control='no-cache'):
+    """Serves a template that renders the same for every visitor from memory, with an ETag."""
+    key = (template, request.script_root)
+    entry = None if app.debug else page_shells.get(key, 0)
+    if entry is None:
+        body = render_template(template).encode()
+        entry = {"version": 0, "body": body, "etag": hashlib.sha1(body).hexdigest(), "encoded": {}}
+        page_shells.put(key, entry)
+    if request.if_none_match.contains_weak(entry['etag']):
+        page_shells.not_modified += 1
+        response = Response(status=304, headers={'Cache-Control': cache_control})
+        response.set_etag(entry['etag'], weak=True)
+        return response
+    return encoded_response(entry, 'text/html', entry['etag'], cache_control)
 
 # --- Public and Login Routes ---
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return page_shell('index.html')
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form.get('username')
         password = request.form.get('password')
+        # Throttle before touching the database or bcrypt so rejected attempts cost almost nothing.
+        retry_after = max(login_limit_by_ip.allow(request.remote_addr), login_limit_by_user.allow((current_household().slug, (username or '').lower())))
+        if retry_after:
+            return render_template('login.html', error="Too many login attempts. Please wait and try again."), 429, {'Retry-After': str(int(retry_after) + 1)}
         user_data = query_db("SELECT * FROM users WHERE username = ?", (username,), one=True)
-        
-        if user_data and bcrypt.check_password_hash(user_data['password_hash'], password):
-            user = User(id=user_data['id'], username=user_data['username'])
+        try:
+            password_ok = bool(user_data and password and password_hasher.check(user_data['password_hash'], password))
+            if password_ok and bcrypt_rounds(user_data['password_hash']) != app.config['BCRYPT_LOG_ROUNDS']:
+                # Re-hash at the configured work factor now that the plain password is at hand.
+                run_write(execute_db, "UPDATE users SET password_hash = ? WHERE id = ?", (password_hasher.generate(password), user_data['id']))
+                user_cache.invalidate(user_data['id'])
+        except (PasswordHasherBusy, concurrent.futures.TimeoutError):
+            return render_template('login.html', error="The server is busy. Please try again in a moment."), 503, {'Retry-After': '1'}
+
+        if password_ok:
+            user = user_cache.put(User(id=user_data['id'], username=user_data['username']))
             login_user(user)
+            session['household'] = current_household().slug
+            if SESSION_USER_IDENTITY: session['_user_name'] = user.username
             return redirect(url_for('admin_dashboard'))
         else:
             return render_template('login.html', error="Invalid username or password")
-    return render_template('login.html')
+    return page_shell('login.html')
 
 @app.route('/logout')
 @login_required
 def logout():
     logout_user()
+    session.pop('_user_name', None)
+    session.pop('household', None)
     return redirect(url_for('index'))
 
 @app.route('/admin')
 @login_required
 def admin_dashboard():
-    return render_template('admin.html')
+    return page_shell('admin.html', cache_control='private, no-cache')
 
 
 
 # --- Kids API ---
 @app.route('/api/kids', methods=['GET'])
+@cached_json()
 def get_kids():
-    kids_data = query_db("""
-        SELECT k.id, k.name, k.avatar_color, k.balloons, k.train_track_length, k.train_laps_completed, COUNT(s.id) as stars_count
-        FROM kids k LEFT JOIN stars s ON k.id = s.kid_id GROUP BY k.id
-    """)
+    kids_data = query_db(f"SELECT {KID_COLUMNS} FROM kids")
     return jsonify([dict(row) for row in kids_data])
 
 @app.route('/api/kids', methods=['POST'])
 @login_required
+@serialized_write
 def add_kid():
     data = request.json; name = data.get('name'); avatar_color = data.get('avatarColor'); track_length = data.get('trainTrackLength', 10) 
     if not name: return jsonify({"error": "Kid name is required"}), 400
     kid_id = execute_db("INSERT INTO kids (name, avatar_color, balloons, train_track_length, train_laps_completed) VALUES (?, ?, 0, ?, 0)", 
                         (name, avatar_color, track_length))
+    event_bus.publish('kid_added', kid_id=kid_id)
     return jsonify({"id": kid_id, "name": name, "avatarColor": avatar_color, "balloons": 0, "stars_count": 0, "train_track_length": track_length, "train_laps_completed": 0}), 201
 
 @app.route('/api/kids/<int:kid_id>', methods=['PUT'])
 @login_required
+@serialized_write
 def update_kid(kid_id):
     data = request.json
     name = data.get('name')
@@ -212,37 +1998,43 @@ def update_kid(kid_id):
     if track_length is None or not isinstance(track_length, int) or track_length <= 0:
         return jsonify({"error": "Valid positive train track length is required"}), 400
     execute_db("UPDATE kids SET name = ?, train_track_length = ? WHERE id = ?", (name.strip(), track_length, kid_id))
-    update_train_laps(kid_id) 
-    updated_kid = query_db("SELECT k.id, k.name, k.avatar_color, k.balloons, k.train_track_length, k.train_laps_completed, COUNT(s.id) as stars_count FROM kids k LEFT JOIN stars s ON k.id = s.kid_id WHERE k.id = ? GROUP BY k.id", (kid_id,), one=True)
+    updated_kid = query_db(f"SELECT {KID_COLUMNS} FROM kids WHERE id = ?", (kid_id,), one=True)
+    event_bus.publish('kid_updated', kid_id=kid_id, kid=dict(updated_kid))
     return jsonify(dict(updated_kid)), 200
 
 @app.route('/api/kids/<int:kid_id>', methods=['DELETE'])
 @login_required
+@serialized_write
 def delete_kid(kid_id):
     kid_exists = query_db("SELECT id FROM kids WHERE id = ?", (kid_id,), one=True)
     if not kid_exists:
         return jsonify({"error": "Kid not found"}), 404
     execute_db("DELETE FROM kids WHERE id = ?", (kid_id,))
+    event_bus.publish('kid_deleted', kid_id=kid_id)
     return jsonify({"message": f"Kid {kid_id} and all associated data deleted successfully."}), 200
 
 
 # --- Master Chores API ---
 @app.route('/api/chores-master', methods=['GET'])
 @login_required
+@cached_json()
 def get_master_chores():
     chores_data = query_db("SELECT * FROM chores_master")
     return jsonify([dict(row) for row in chores_data])
 
 @app.route('/api/chores-master', methods=['POST'])
 @login_required
+@serialized_write
 def add_master_chore():
     data = request.json; name = data.get('name'); icon = data.get('icon')
     if not name: return jsonify({"error": "Chore name is required"}), 400
     chore_id = execute_db("INSERT INTO chores_master (name, icon) VALUES (?, ?)", (name, icon))
+    event_bus.publish('chores_changed', chore_id=chore_id)
     return jsonify({"id": chore_id, "name": name, "icon": icon}), 201
 
 @app.route('/api/chores-master/<int:chore_id>', methods=['PUT'])
 @login_required
+@serialized_write
 def update_master_chore(chore_id):
     data = request.json
     name = data.get('name')
@@ -251,11 +2043,41 @@ def update_master_chore(chore_id):
         return jsonify({"error": "Valid chore name is required"}), 400
     execute_db("UPDATE chores_master SET name = ?, icon = ? WHERE id = ?", (name.strip(), icon, chore_id))
     updated_chore = query_db("SELECT * FROM chores_master WHERE id = ?", (chore_id,), one=True)
+    event_bus.publish('chores_changed', chore_id=chore_id)
     return jsonify(dict(updated_chore)), 200
 
+def sql_placeholders(values):
+    return ", ".join("?" * len(values)) or "NULL"
+
+def insert_assignments(rows):
+    """Inserts (kid_id, chore_id, frequency, timeframe, schedule) rows with one executemany, skipping
+    ones that already exist. Must run inside transaction(). Returns the new id per row, or None."""
+    kid_ids = sorted({row[0] for row in rows})
+    existing = {tuple(r) for r in query_db(f"SELECT kid_id, chore_id, frequency, timeframe FROM chore_assignments WHERE kid_id IN ({sql_placeholders(kid_ids)})", kid_ids)}
+    to_insert = []; positions = []
+    for position, (kid_id, chore_id, frequency, timeframe, schedule) in enumerate(rows):
+        if (kid_id, chore_id, frequency, timeframe) in existing: continue
+        existing.add((kid_id, chore_id, frequency, timeframe))
+        to_insert.append((kid_id, chore_id, frequency, timeframe) + tuple(schedule)); positions.append(position)
+    new_ids = [None] * len(rows)
+    if to_insert:
+        executemany_db("INSERT INTO chore_assignments (kid_id, chore_id, frequency, is_active, timeframe, weekday_mask, interval_days, anchor_day, month_day) VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?)", to_insert)
+        # The write lock is held, so the batch received consecutive rowids ending at last_insert_rowid().
+        last_id = query_db("SELECT last_insert_rowid() AS id", one=True)['id']
+        for offset, position in enumerate(positions):
+            new_ids[position] = last_id - len(to_insert) + 1 + offset
+    return new_ids
+
+def select_stars_to_decrement(kid_id, count, star_type_filter=None, exclude_ids=()):
+    sql = "SELECT id FROM stars WHERE kid_id = ?"; params = [kid_id]
+    if star_type_filter and star_type_filter != "any": sql += " AND type = ?"; params.append(star_type_filter)
+    sql += " ORDER BY date_awarded ASC, id ASC LIMIT ?"; params.append(count + len(exclude_ids))
+    return [row['id'] for row in query_db(sql, tuple(params)) if row['id'] not in exclude_ids][:count]
+
 # --- Chore Assignments API ---
 @app.route('/api/assignments', methods=['GET'])
 @login_required
+@cached_json()
 def get_assignments():
     sql = """
         SELECT ca.id, ca.kid_id, k.name as kid_name, ca.chore_id, 
@@ -270,10 +2092,13 @@ def get_assignments():
 
 @app.route('/api/assignments', methods=['POST'])
 @login_required
+@serialized_write
 def add_assignment():
     data = request.json; kid_id_input = data.get('kidId'); chore_id = data.get('choreId'); frequency = data.get('frequency'); timeframe = data.get('timeframe', 'any')
     if not chore_id or not frequency: return jsonify({"error": "Chore ID and frequency are required"}), 400
-    assigned_ids = []; kids_to_assign = []
+    try: chore_id = int(chore_id)
+    except ValueError: return jsonify({"error": "Invalid Chore ID"}), 400
+    kids_to_assign = []
     if kid_id_input == 'all':
         all_kids_data = query_db("SELECT id FROM kids"); kids_to_assign = [k['id'] for k in all_kids_data]
     elif kid_id_input:
@@ -281,81 +2106,85 @@ def add_assignment():
         except ValueError: return jsonify({"error": "Invalid Kid ID"}), 400
     else: return jsonify({"error": "Kid ID ('all' or specific) is required"}), 400
     if not kids_to_assign: return jsonify({"error": "No kids found to assign chores to."}), 400
-    for k_id in kids_to_assign:
-        existing = query_db("SELECT id FROM chore_assignments WHERE kid_id = ? AND chore_id = ? AND frequency = ? AND timeframe = ?", (k_id, chore_id, frequency, timeframe), one=True)
-        if not existing: 
-            assignment_id = execute_db("INSERT INTO chore_assignments (kid_id, chore_id, frequency, is_active, timeframe) VALUES (?, ?, ?, 1, ?)", (k_id, chore_id, frequency, timeframe))
-            assigned_ids.append(assignment_id)
+    try: frequency, schedule = normalize_frequency(frequency, household_today())
+    except ValueError: return jsonify({"error": "Invalid frequency"}), 400
+    with transaction():
+        new_ids = insert_assignments([(k_id, chore_id, frequency, timeframe, schedule) for k_id in kids_to_assign])
+    assigned_ids = [assignment_id for assignment_id in new_ids if assignment_id is not None]
     if not assigned_ids: return jsonify({"message": "Chores already assigned or no new assignments made."}), 200
+    event_bus.publish('assignments_changed', kid_ids=kids_to_assign)
     return jsonify({"message": "Chore(s) assigned successfully", "assignment_ids": assigned_ids}), 201
 
 @app.route('/api/assignments/<int:assignment_id>', methods=['DELETE'])
 @login_required
+@serialized_write
 def delete_assignment(assignment_id):
+    assignment = query_db("SELECT kid_id FROM chore_assignments WHERE id = ?", (assignment_id,), one=True)
     execute_db("DELETE FROM chore_assignments WHERE id = ?", (assignment_id,))
+    if assignment: event_bus.publish('assignments_changed', kid_ids=[assignment['kid_id']])
     return jsonify({"message": "Assignment removed"}), 200
 
 @app.route('/api/assignments/<int:assignment_id>/edit', methods=['PUT'])
 @login_required
+@serialized_write
 def edit_assignment(assignment_id):
     data = request.json
     new_frequency = data.get('frequency')
     new_timeframe = data.get('timeframe')
     if not new_frequency or not new_timeframe: 
         return jsonify({"error": "Frequency and timeframe are required"}), 400
-    execute_db("UPDATE chore_assignments SET frequency = ?, timeframe = ? WHERE id = ?", (new_frequency, new_timeframe, assignment_id))
+    try: new_frequency, schedule = normalize_frequency(new_frequency, household_today())
+    except ValueError: return jsonify({"error": "Invalid frequency"}), 400
+    execute_db("UPDATE chore_assignments SET frequency = ?, timeframe = ?, weekday_mask = ?, interval_days = ?, anchor_day = ?, month_day = ? WHERE id = ?",
+               (new_frequency, new_timeframe) + tuple(schedule) + (assignment_id,))
+    assignment = query_db("SELECT kid_id FROM chore_assignments WHERE id = ?", (assignment_id,), one=True)
+    if assignment: event_bus.publish('assignments_changed', kid_ids=[assignment['kid_id']])
     return jsonify({"message": "Assignment updated."}), 200
 
 @app.route('/api/assignments/<int:assignment_id>/toggle-active', methods=['POST'])
 @login_required
+@serialized_write
 def toggle_assignment_active(assignment_id):
-    assignment = query_db("SELECT is_active FROM chore_assignments WHERE id = ?", (assignment_id,), one=True)
+    assignment = query_db("SELECT is_active, kid_id FROM chore_assignments WHERE id = ?", (assignment_id,), one=True)
     if not assignment:
         return jsonify({"error": "Assignment not found"}), 404
     new_status = not assignment['is_active']
     execute_db("UPDATE chore_assignments SET is_active = ? WHERE id = ?", (new_status, assignment_id))
+    event_bus.publish('assignments_changed', kid_ids=[assignment['kid_id']])
     return jsonify({"message": f"Assignment {'activated' if new_status else 'deactivated'}.", "is_active": new_status}), 200
 
 
+@app.route('/api/kids/<int:kid_id>/stats', methods=['GET'])
+@cached_json(vary=lambda: household_today().isoformat())
+def get_kid_stats_api(kid_id):
+    if not query_db("SELECT id FROM kids WHERE id = ?", (kid_id,), one=True): return jsonify({"error": "Kid not found"}), 404
+    today = household_today(); yesterday = today - timedelta(days=1)
+    closed = query_db("SELECT value FROM stats_meta WHERE name = 'closed_through'", one=True)
+    if not closed or closed['value'] < yesterday.isoformat():
+        run_write(lambda: close_stats_days(get_db(), yesterday))
+    return jsonify(kid_stats_summary(kid_id, today))
+
 # --- Chore Completions & Rewards API (Publicly accessible for kids) ---
 def get_chores_for_kid_today_internal(kid_id, today_date_obj):
-    today_date_str = today_date_obj.isoformat()
-    day_of_week_idx = today_date_obj.weekday()
-    day_names = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
-    current_day_name = day_names[day_of_week_idx]
-    assigned_chores_sql = """
-        SELECT ca.id as assignment_id, ca.kid_id, ca.chore_id, cm.name as chore_name, 
-               cm.icon as chore_icon, ca.frequency, ca.timeframe
-        FROM chore_assignments ca JOIN chores_master cm ON ca.chore_id = cm.id
-        WHERE ca.kid_id = ? AND ca.is_active = 1 
-    """
-    all_kid_assignments = query_db(assigned_chores_sql, (kid_id,))
+    ensure_today_board(today_date_obj)
+    due_chores = query_db(TODAY_BOARD_SQL, (today_date_obj.isoformat(), kid_id))
     chores_due_today = {'morning': [], 'night': [], 'any': []}
-    for assignment in all_kid_assignments:
-        assignment_dict = dict(assignment); is_due = False
-        if assignment_dict['frequency'] == 'daily': is_due = True
-        elif assignment_dict['frequency'] == 'weekdays' and 0 <= day_of_week_idx <= 4: is_due = True
-        elif assignment_dict['frequency'] == 'weekends' and 5 <= day_of_week_idx <= 6: is_due = True
-        elif assignment_dict['frequency'] == current_day_name: is_due = True
-        if is_due:
-            completion = query_db("SELECT id FROM chore_completions WHERE assignment_id = ? AND kid_id = ? AND date_completed = ?",
-                                  (assignment_dict['assignment_id'], kid_id, today_date_str), one=True)
-            assignment_dict['completed_today'] = True if completion else False
-            timeframe = assignment_dict.get('timeframe', 'any')
-            if timeframe in chores_due_today:
-                chores_due_today[timeframe].append(assignment_dict)
-            else:
-                chores_due_today['any'].append(assignment_dict)
+    for assignment in due_chores:
+        assignment_dict = dict(assignment)
+        assignment_dict['completed_today'] = bool(assignment_dict['completed_today'])
+        timeframe = assignment_dict.get('timeframe', 'any')
+        if timeframe in chores_due_today:
+            chores_due_today[timeframe].append(assignment_dict)
+        else:
+            chores_due_today['any'].append(assignment_dict)
     return chores_due_today
 
 @app.route('/api/kids/<int:kid_id>/chores-today', methods=['GET'])
+@cached_json(vary=lambda: (household_today().isoformat(), current_timeframe_for(household_now())))
 def get_kid_chores_today_api(kid_id):
-    chores_by_timeframe = get_chores_for_kid_today_internal(kid_id, date.today())
-    current_hour = datetime.now().hour
-    if current_hour < 12: current_timeframe = 'morning'
-    elif current_hour >= 17: current_timeframe = 'night'
-    else: current_timeframe = 'any'
-    kid_info = query_db("SELECT k.id, k.name, k.avatar_color, k.balloons, k.train_track_length, k.train_laps_completed, COUNT(s.id) as stars_count FROM kids k LEFT JOIN stars s ON k.id = s.kid_id WHERE k.id = ? GROUP BY k.id", (kid_id,), one=True)
+    chores_by_timeframe = get_chores_for_kid_today_internal(kid_id, household_today())
+    current_timeframe = current_timeframe_for(household_now())
+    kid_info = query_db(f"SELECT {KID_COLUMNS} FROM kids WHERE id = ?", (kid_id,), one=True)
     if not kid_info: return jsonify({"error": "Kid not found"}), 404
     return jsonify({
         "kid_info": dict(kid_info), 
@@ -363,94 +2192,131 @@ def get_kid_chores_today_api(kid_id):
         "current_timeframe": current_timeframe
     })
 
+def _award_balloons(kid_id, count, today_date_str):
+    """Adds balloons and converts every full BALLOONS_PER_STAR into a star. Returns the stars created."""
+    kid_data = query_db("SELECT balloons FROM kids WHERE id = ?", (kid_id,), one=True)
+    if not kid_data: return 0
+    stars_from_balloons, remaining_balloons = divmod(kid_data['balloons'] + count, BALLOONS_PER_STAR)
+    execute_db("UPDATE kids SET balloons = ? WHERE id = ?", (remaining_balloons, kid_id))
+    if stars_from_balloons:
+        executemany_db("INSERT INTO stars (kid_id, date_awarded, type, reason) VALUES (?, ?, 'balloon_conversion', ? || ' balloons earned')",
+                       [(kid_id, today_date_str, BALLOONS_PER_STAR)] * stars_from_balloons)
+    return stars_from_balloons
+
+def _revoke_balloons(kid_id, count, today_date_str):
+    """Takes balloons back, undoing today's balloon-conversion stars when the balloons run out. Returns the stars revoked."""
+    kid_data = query_db("SELECT balloons FROM kids WHERE id = ?", (kid_id,), one=True)
+    if not kid_data: return 0
+    balloons = kid_data['balloons']; conversion_star_ids = []
+    if count > balloons:
+        conversion_star_ids = [row['id'] for row in query_db("SELECT id FROM stars WHERE kid_id = ? AND date_awarded = ? AND type = 'balloon_conversion' ORDER BY id DESC LIMIT ?",
+                                                             (kid_id, today_date_str, count))]
+    revoked_ids = []
+    for _ in range(count):
+        if balloons > 0: balloons -= 1
+        elif len(revoked_ids) < len(conversion_star_ids):
+            revoked_ids.append(conversion_star_ids[len(revoked_ids)]); balloons += BALLOONS_PER_STAR - 1
+    execute_db("UPDATE kids SET balloons = ? WHERE id = ?", (balloons, kid_id))
+    if revoked_ids:
+        executemany_db("DELETE FROM stars WHERE id = ?", [(star_id,) for star_id in revoked_ids])
+    return len(revoked_ids)
+
+def _sync_daily_star(kid_id, today_date_obj, allow_award=True, allow_revoke=True):
+    """Awards or revokes today's daily star from one aggregate over the kid's due chores. Returns +1, -1 or 0."""
+    today_date_str = today_date_obj.isoformat()
+    progress = query_db("""
+        SELECT COUNT(*) AS total,
+               SUM(EXISTS (SELECT 1 FROM chore_completions cc
+                           WHERE cc.assignment_id = ca.id AND cc.kid_id = ca.kid_id AND cc.date_completed = ?)) AS done
+        FROM """ + DUE_ASSIGNMENTS_FROM, (today_date_str,) + schedule_day_params(today_date_obj) + (kid_id,), one=True)
+    all_done = progress['total'] > 0 and progress['done'] == progress['total']
+    if all_done and allow_award:
+        if execute_db("""INSERT INTO stars (kid_id, date_awarded, type, reason) SELECT ?, ?, 'daily', 'All daily chores completed'
+                         WHERE NOT EXISTS (SELECT 1 FROM stars WHERE kid_id = ? AND date_awarded = ? AND type = 'daily')""",
+                      (kid_id, today_date_str, kid_id, today_date_str), rowcount=True):
+            record_daily_star(kid_id, today_date_obj, True)
+            return 1
+    elif not all_done and allow_revoke:
+        if execute_db("DELETE FROM stars WHERE kid_id = ? AND date_awarded = ? AND type = 'daily'", (kid_id, today_date_str), rowcount=True):
+            record_daily_star(kid_id, today_date_obj, False)
+            return -1
+    return 0
+
+def complete_chore(kid_id, assignment_id, chore_id, today_date_obj):
+    """Records a completion and runs the balloon, star and lap rewards in one transaction. Returns (payload, status)."""
+    today_date_str = today_date_obj.isoformat()
+    with transaction():
+        inserted = execute_db("""INSERT INTO chore_completions (assignment_id, kid_id, chore_id, date_completed) SELECT ?, ?, ?, ?
+                                 WHERE NOT EXISTS (SELECT 1 FROM chore_completions WHERE assignment_id = ? AND kid_id = ? AND date_completed = ?)""",
+                              (assignment_id, kid_id, chore_id, today_date_str, assignment_id, kid_id, today_date_str), rowcount=True)
+        if not inserted: return {"message": "Chore already marked as complete for today."}, 200
+        stars_from_balloons = _award_balloons(kid_id, 1, today_date_str)
+        daily_star_awarded_this_action = _sync_daily_star(kid_id, today_date_obj, allow_revoke=False) > 0
+        updated_kid_info = query_db(KID_STATS_SQL, (kid_id,), one=True)
+    event_bus.publish('completion', kid_id=int(kid_id), assignment_id=int(assignment_id), completed=True, kid=dict(updated_kid_info) if updated_kid_info else {})
+    return {"message": "Chore marked complete!", "balloons_awarded": 1, "stars_from_balloons": stars_from_balloons, "daily_star_awarded": daily_star_awarded_this_action, "updated_kid_stats": dict(updated_kid_info) if updated_kid_info else {}}, 200
+
+def uncheck_chore(kid_id, assignment_id, today_date_obj):
+    """Removes today's completion and rolls back its rewards in one transaction. Returns (payload, status)."""
+    today_date_str = today_date_obj.isoformat()
+    with transaction():
+        deleted = execute_db("""DELETE FROM chore_completions WHERE id = (SELECT id FROM chore_completions
+                                WHERE assignment_id = ? AND kid_id = ? AND date_completed = ? LIMIT 1)""",
+                             (assignment_id, kid_id, today_date_str), rowcount=True)
+        if not deleted: return {"message": "Chore was not marked as complete for today or already unchecked."}, 200
+        star_from_balloons_revoked = _revoke_balloons(kid_id, 1, today_date_str) > 0
+        daily_star_revoked = _sync_daily_star(kid_id, today_date_obj, allow_award=False) < 0
+        updated_kid_info = query_db(KID_STATS_SQL, (kid_id,), one=True)
+    event_bus.publish('completion', kid_id=int(kid_id), assignment_id=int(assignment_id), completed=False, kid=dict(updated_kid_info) if updated_kid_info else {})
+    return {"message": "Chore unchecked.", "daily_star_revoked": daily_star_revoked, "star_from_balloons_revoked": star_from_balloons_revoked, "updated_kid_stats": dict(updated_kid_info) if updated_kid_info else {}}, 200
+
 @app.route('/api/completions', methods=['POST']) 
+@serialized_write
 def mark_chore_complete():
     data = request.json; kid_id = data.get('kidId'); assignment_id = data.get('assignmentId'); chore_id = data.get('choreId')
-    today_date_obj = date.today(); today_date_str = today_date_obj.isoformat()
     if not kid_id or not chore_id or not assignment_id: return jsonify({"error": "Kid ID, Chore ID, and Assignment ID are required"}), 400
-    existing_completion = query_db("SELECT id FROM chore_completions WHERE assignment_id = ? AND kid_id = ? AND date_completed = ?", (assignment_id, kid_id, today_date_str), one=True)
-    if existing_completion: return jsonify({"message": "Chore already marked as complete for today."}), 200
-    execute_db("INSERT INTO chore_completions (assignment_id, kid_id, chore_id, date_completed) VALUES (?, ?, ?, ?)", (assignment_id, kid_id, chore_id, today_date_str))
-    execute_db("UPDATE kids SET balloons = balloons + 1 WHERE id = ?", (kid_id,))
-    kid_data = query_db("SELECT balloons FROM kids WHERE id = ?", (kid_id,), one=True)
-    balloons_after_award = kid_data['balloons']; stars_from_balloons = 0
-    if balloons_after_award >= BALLOONS_PER_STAR:
-        stars_from_balloons = balloons_after_award // BALLOONS_PER_STAR
-        remaining_balloons = balloons_after_award % BALLOONS_PER_STAR
-        execute_db("UPDATE kids SET balloons = ? WHERE id = ?", (remaining_balloons, kid_id,))
-        for _ in range(stars_from_balloons):
-            execute_db("INSERT INTO stars (kid_id, date_awarded, type, reason) VALUES (?, ?, 'balloon_conversion', ? || ' balloons earned')", (kid_id, today_date_str, BALLOONS_PER_STAR))
-            update_train_laps(kid_id) 
-    daily_star_awarded_this_action = False
-    chores_due_today = get_chores_for_kid_today_internal(kid_id, today_date_obj)
-    all_chores_for_day = chores_due_today['morning'] + chores_due_today['night'] + chores_due_today['any']
-    if all_chores_for_day:
-        all_done = all(c['completed_today'] for c in all_chores_for_day)
-        if all_done:
-            daily_star_exists = query_db("SELECT id FROM stars WHERE kid_id = ? AND date_awarded = ? AND type = 'daily'", (kid_id, today_date_str), one=True)
-            if not daily_star_exists:
-                execute_db("INSERT INTO stars (kid_id, date_awarded, type, reason) VALUES (?, ?, 'daily', 'All daily chores completed')", (kid_id, today_date_str))
-                daily_star_awarded_this_action = True
-                update_train_laps(kid_id)
-    updated_kid_info = query_db("SELECT k.balloons, k.train_track_length, k.train_laps_completed, COUNT(s.id) as stars_count FROM kids k LEFT JOIN stars s ON k.id = s.kid_id WHERE k.id = ? GROUP BY k.id", (kid_id,), one=True)
-    return jsonify({"message": "Chore marked complete!", "balloons_awarded": 1, "stars_from_balloons": stars_from_balloons, "daily_star_awarded": daily_star_awarded_this_action, "updated_kid_stats": dict(updated_kid_info) if updated_kid_info else {}}), 200
+    try: payload, status = complete_chore(kid_id, assignment_id, chore_id, household_today())
+    except sqlite3.IntegrityError: return jsonify({"error": "Unknown kid, chore or assignment"}), 404
+    return jsonify(payload), status
 
 @app.route('/api/completions/uncheck', methods=['POST']) 
+@serialized_write
 def uncheck_chore_complete():
     data = request.json; kid_id = data.get('kidId'); assignment_id = data.get('assignmentId')
-    today_date_obj = date.today(); today_date_str = today_date_obj.isoformat()
     if not kid_id or not assignment_id: return jsonify({"error": "Kid ID and Assignment ID are required"}), 400
-    completion_to_delete = query_db("SELECT id FROM chore_completions WHERE assignment_id = ? AND kid_id = ? AND date_completed = ?", (assignment_id, kid_id, today_date_str), one=True)
-    if not completion_to_delete: return jsonify({"message": "Chore was not marked as complete for today or already unchecked."}), 200
-    execute_db("DELETE FROM chore_completions WHERE id = ?", (completion_to_delete['id'],))
-    star_from_balloons_revoked = False
-    balloons_at_start_of_uncheck = query_db("SELECT balloons FROM kids WHERE id = ?", (kid_id,), one=True)['balloons']
-    if balloons_at_start_of_uncheck > 0:
-        execute_db("UPDATE kids SET balloons = balloons - 1 WHERE id = ?", (kid_id,))
-    else:
-        conversion_star = query_db("SELECT id FROM stars WHERE kid_id = ? AND date_awarded = ? AND type = 'balloon_conversion' ORDER BY id DESC LIMIT 1", (kid_id, today_date_str), one=True)
-        if conversion_star:
-            execute_db("DELETE FROM stars WHERE id = ?", (conversion_star['id'],))
-            execute_db("UPDATE kids SET balloons = balloons + ? WHERE id = ?", (BALLOONS_PER_STAR - 1, kid_id))
-            star_from_balloons_revoked = True
-            update_train_laps(kid_id) 
-    daily_star_revoked = False
-    chores_due_today_after_uncheck = get_chores_for_kid_today_internal(kid_id, today_date_obj)
-    all_chores_for_day = chores_due_today_after_uncheck['morning'] + chores_due_today_after_uncheck['night'] + chores_due_today_after_uncheck['any']
-    all_done_after_uncheck = all(c['completed_today'] for c in all_chores_for_day) if all_chores_for_day else False
-    daily_star_record = query_db("SELECT id FROM stars WHERE kid_id = ? AND date_awarded = ? AND type = 'daily'", (kid_id, today_date_str), one=True)
-    if daily_star_record and not all_done_after_uncheck:
-        execute_db("DELETE FROM stars WHERE id = ?", (daily_star_record['id'],))
-        daily_star_revoked = True
-        update_train_laps(kid_id) 
-    updated_kid_info = query_db("SELECT k.balloons, k.train_track_length, k.train_laps_completed, COUNT(s.id) as stars_count FROM kids k LEFT JOIN stars s ON k.id = s.kid_id WHERE k.id = ? GROUP BY k.id", (kid_id,), one=True)
-    return jsonify({"message": "Chore unchecked.", "daily_star_revoked": daily_star_revoked, "star_from_balloons_revoked": star_from_balloons_revoked, "updated_kid_stats": dict(updated_kid_info) if updated_kid_info else {}}), 200
+    payload, status = uncheck_chore(kid_id, assignment_id, household_today())
+    return jsonify(payload), status
 
 # --- Bonus Stars API ---
 @app.route('/api/stars/bonus', methods=['POST'])
 @login_required
+@serialized_write
 def award_bonus_star():
     data = request.json; kid_id = data.get('kidId'); reason = data.get('reason', '')
-    today_date_str = date.today().isoformat()
+    today_date_str = household_today().isoformat()
     if not kid_id: return jsonify({"error": "Kid ID is required"}), 400
     execute_db("INSERT INTO stars (kid_id, date_awarded, type, reason) VALUES (?, ?, 'bonus', ?)", (kid_id, today_date_str, reason))
-    update_train_laps(kid_id) 
+    publish_kid_stats(kid_id)
     return jsonify({"message": "Bonus star awarded"}), 201
 
 # --- Admin Reset & Decrement Endpoints ---
 @app.route('/api/admin/kids/<int:kid_id>/reset-daily-chores', methods=['POST'])
 @login_required
+@serialized_write
 def admin_reset_daily_chores(kid_id): 
-    today_date_str = date.today().isoformat()
-    execute_db("DELETE FROM chore_completions WHERE kid_id = ? AND date_completed = ?", (kid_id, today_date_str))
-    daily_star_record = query_db("SELECT id FROM stars WHERE kid_id = ? AND date_awarded = ? AND type = 'daily'", (kid_id, today_date_str), one=True)
-    if daily_star_record:
-        execute_db("DELETE FROM stars WHERE id = ?", (daily_star_record['id'],))
-        update_train_laps(kid_id) 
+    today_date_obj = household_today(); today_date_str = today_date_obj.isoformat()
+    with transaction():
+        execute_db("DELETE FROM chore_completions WHERE kid_id = ? AND date_completed = ?", (kid_id, today_date_str))
+        daily_star_record = query_db("SELECT id FROM stars WHERE kid_id = ? AND date_awarded = ? AND type = 'daily'", (kid_id, today_date_str), one=True)
+        if daily_star_record:
+            execute_db("DELETE FROM stars WHERE id = ?", (daily_star_record['id'],))
+            record_daily_star(kid_id, today_date_obj, False)
+    event_bus.publish('day_reset', kid_ids=[kid_id])
     return jsonify({"message": f"Daily chores and daily star (if any) for kid {kid_id} reset for today."}), 200
 
 @app.route('/api/admin/kids/<int:kid_id>/decrement-balloons', methods=['POST'])
 @login_required
+@serialized_write
 def admin_decrement_balloons(kid_id): 
     data = request.json; count = data.get('count', 1)
     try: count = int(count)
@@ -459,39 +2325,491 @@ def admin_decrement_balloons(kid_id):
     current_balloons = query_db("SELECT balloons FROM kids WHERE id = ?", (kid_id,), one=True)['balloons']
     new_balloons = max(0, current_balloons - count)
     execute_db("UPDATE kids SET balloons = ? WHERE id = ?", (new_balloons, kid_id))
+    publish_kid_stats(kid_id)
     return jsonify({"message": f"{count} balloon(s) decremented for kid {kid_id}. New total: {new_balloons}."}), 200
 
 @app.route('/api/admin/kids/<int:kid_id>/decrement-stars', methods=['POST'])
 @login_required
+@serialized_write
 def admin_decrement_stars(kid_id): 
     data = request.json; count = data.get('count', 1); star_type_filter = data.get('type', None)
     try: count = int(count)
     except ValueError: return jsonify({"error": "Invalid count"}), 400
     if count <= 0: return jsonify({"error": "Count must be positive"}), 400
-    sql = "SELECT id FROM stars WHERE kid_id = ?"; params = [kid_id]
-    if star_type_filter and star_type_filter != "any": sql += " AND type = ?"; params.append(star_type_filter)
-    sql += " ORDER BY date_awarded ASC, id ASC LIMIT ?"; params.append(count)
-    stars_to_delete = query_db(sql, tuple(params))
-    if not stars_to_delete: return jsonify({"message": "No matching stars found to decrement."}), 404
-    for star_row in stars_to_delete: execute_db("DELETE FROM stars WHERE id = ?", (star_row['id'],))
-    update_train_laps(kid_id) 
-    return jsonify({"message": f"{len(stars_to_delete)} star(s) decremented for kid {kid_id}."}), 200
+    with transaction():
+        # Archived stars are older than any left in the stars table, so they go first.
+        archived = take_archived_stars(kid_id, count, star_type_filter)
+        stars_to_delete = select_stars_to_decrement(kid_id, count - archived, star_type_filter) if count > archived else []
+        if stars_to_delete: executemany_db("DELETE FROM stars WHERE id = ?", [(star_id,) for star_id in stars_to_delete])
+    if not archived and not stars_to_delete: return jsonify({"message": "No matching stars found to decrement."}), 404
+    publish_kid_stats(kid_id)
+    return jsonify({"message": f"{archived + len(stars_to_delete)} star(s) decremented for kid {kid_id}."}), 200
 
 @app.route('/api/admin/kids/<int:kid_id>/train-config', methods=['PUT'])
 @login_required
+@serialized_write
 def admin_configure_train_track(kid_id): 
     data = request.json; track_length = data.get('train_track_length')
     try: track_length = int(track_length)
     except (ValueError, TypeError): return jsonify({"error": "Invalid track length"}), 400
     if track_length <= 0: return jsonify({"error": "Track length must be positive"}), 400
     execute_db("UPDATE kids SET train_track_length = ? WHERE id = ?", (track_length, kid_id))
-    update_train_laps(kid_id) 
+    publish_kid_stats(kid_id)
     return jsonify({"message": f"Train track length for kid {kid_id} updated to {track_length}."}), 200
 
+# --- Batch Mutations API ---
+# POST /api/batch takes {"operations": [{"op": ..., ...}, ...]} and applies them in one transaction.
+# Operations of the same kind apply in request order; the kinds are applied as groups (unassign,
+# toggle, assign, complete/uncheck, bonus, decrement) and rewards are recomputed once per kid.
+BATCH_KID_OPS = {'complete', 'uncheck'}
+BATCH_ADMIN_OPS = {'assign', 'unassign', 'toggle', 'bonus', 'decrement'}
+BATCH_MAX_OPERATIONS = 500
+
+class BatchOperationError(ValueError):
+    pass
+
+def _batch_int(value, what):
+    try: return int(value)
+    except (TypeError, ValueError): raise BatchOperationError(f"Invalid {what}")
+
+def _batch_bool(value, what):
+    if not isinstance(value, bool): raise BatchOperationError(f"Invalid {what}: expected true or false")
+    return value
+
+def apply_batch(operations, today_date_obj):
+    """Validates and applies batch operations in a single transaction. Returns (per-operation results, {kid_id: stats})."""
+    today_date_str = today_date_obj.isoformat()
+    results = [None] * len(operations)
+    ref_assignment_ids = set(); ref_chore_ids = set()
+    for op in operations:
+        if not isinstance(op, dict): continue
+        for key, refs in (('assignmentId', ref_assignment_ids), ('choreId', ref_chore_ids)):
+            try: refs.add(int(op.get(key)))
+            except (TypeError, ValueError): pass
+    ref_assignment_ids = sorted(ref_assignment_ids); ref_chore_ids = sorted(ref_chore_ids)
+    with transaction():
+        # One lookup per table covers every id the batch refers to.
+        known_kids = [row['id'] for row in query_db("SELECT id FROM kids ORDER BY id")]
+        known_chores = {row['id'] for row in query_db(f"SELECT id FROM chores_master WHERE id IN ({sql_placeholders(ref_chore_ids)})", ref_chore_ids)}
+        assignments = {row['id']: dict(row) for row in query_db(f"SELECT id, kid_id, chore_id, is_active FROM chore_assignments WHERE id IN ({sql_placeholders(ref_assignment_ids)})", ref_assignment_ids)}
+        initially_completed = {row['assignment_id'] for row in query_db(
+            f"SELECT assignment_id FROM chore_completions WHERE date_completed = ? AND assignment_id IN ({sql_placeholders(ref_assignment_ids)})", [today_date_str] + ref_assignment_ids)}
+        completed = set(initially_completed)
+        deleted_assignments = {}; toggled = {}; assign_rows = []; assign_ops = []
+        bonus_rows = []; decrement_ops = []; assignment_kids = set(); stat_kids = set()
+
+        def kid_of(op):
+            kid_id = _batch_int(op.get('kidId'), "kid ID")
+            if kid_id not in known_kids: raise BatchOperationError("Kid not found")
+            return kid_id
+
+        def assignment_of(op):
+            assignment = assignments.get(_batch_int(op.get('assignmentId'), "assignment ID"))
+            if not assignment or assignment['id'] in deleted_assignments: raise BatchOperationError("Assignment not found")
+            if op.get('kidId') is not None and _batch_int(op.get('kidId'), "kid ID") != assignment['kid_id']:
+                raise BatchOperationError("Assignment does not belong to this kid")
+            return assignment
+
+        for index, op in enumerate(operations):
+            kind = op.get('op') if isinstance(op, dict) else None
+            result = {"op": kind, "ok": True}
+            try:
+                if kind == 'assign':
+                    if op.get('kidId') == 'all': targets = list(known_kids)
+                    else: targets = [kid_of(op)]
+                    chore_id = _batch_int(op.get('choreId'), "chore ID")
+                    if chore_id not in known_chores: raise BatchOperationError("Chore not found")
+                    try: frequency, schedule = normalize_frequency(op.get('frequency'), today_date_obj)
+                    except ValueError: raise BatchOperationError("Invalid frequency")
+                    timeframe = op.get('timeframe', 'any')
+                    assign_ops.append((index, len(assign_rows), len(targets)))
+                    assign_rows.extend((kid_id, chore_id, frequency, timeframe, schedule) for kid_id in targets)
+                elif kind == 'unassign':
+                    assignment = assignment_of(op)
+                    deleted_assignments[assignment['id']] = assignment['kid_id']; assignment_kids.add(assignment['kid_id'])
+                    completed.discard(assignment['id']); initially_completed.discard(assignment['id'])
+                elif kind == 'toggle':
+                    assignment = assignment_of(op)
+                    assignment['is_active'] = _batch_bool(op['isActive'], "isActive") if 'isActive' in op else not assignment['is_active']
+                    toggled[assignment['id']] = assignment['is_active']; assignment_kids.add(assignment['kid_id'])
+                    result['is_active'] = assignment['is_active']
+                elif kind in ('complete', 'uncheck'):
+                    assignment = assignment_of(op)
+                    if kind == 'complete' and assignment['id'] not in completed: completed.add(assignment['id'])
+                    elif kind == 'uncheck' and assignment['id'] in completed: completed.discard(assignment['id'])
+                    else:
+                        result['changed'] = False
+                elif kind == 'bonus':
+                    kid_id = kid_of(op); bonus_rows.append((kid_id, today_date_str, op.get('reason', ''))); stat_kids.add(kid_id)
+                elif kind == 'decrement':
+                    kid_id = kid_of(op); count = _batch_int(op.get('count', 1), "count")
+                    if count <= 0: raise BatchOperationError("Count must be positive")
+                    decrement_ops.append((index, kid_id, count, op.get('type')))
+                else:
+                    raise BatchOperationError(f"Unknown operation: {kind}")
+            except BatchOperationError as e:
+                result = {"op": kind, "ok": False, "error": str(e)}
+            results[index] = result
+
+        # Balloons follow the net change of the completed set, so a completion an unassign later
+        # dropped from the batch (or an uncheck of one it kept) moves no balloons.
+        balloon_delta = {}; completed_kids = set(); unchecked_kids = set()
+        for assignment_id in completed - initially_completed:
+            kid_id = assignments[assignment_id]['kid_id']; balloon_delta[kid_id] = balloon_delta.get(kid_id, 0) + 1; completed_kids.add(kid_id)
+        for assignment_id in initially_completed - completed:
+            kid_id = assignments[assignment_id]['kid_id']; balloon_delta[kid_id] = balloon_delta.get(kid_id, 0) - 1; unchecked_kids.add(kid_id)
+        if deleted_assignments:
+            executemany_db("DELETE FROM chore_assignments WHERE id = ?", [(assignment_id,) for assignment_id in deleted_assignments])
+        if toggled:
+            executemany_db("UPDATE chore_assignments SET is_active = ? WHERE id = ?", [(is_active, assignment_id) for assignment_id, is_active in toggled.items()])
+        if assign_rows:
+            new_ids = insert_assignments(assign_rows)
+            for index, start, length in assign_ops:
+                results[index]['assignment_ids'] = [assignment_id for assignment_id in new_ids[start:start + length] if assignment_id is not None]
+            assignment_kids.update(kid_id for kid_id, _, _, _, _ in assign_rows)
+        if completed - initially_completed:
+            executemany_db("INSERT INTO chore_completions (assignment_id, kid_id, chore_id, date_completed) VALUES (?, ?, ?, ?)",
+                           [(aid, assignments[aid]['kid_id'], assignments[aid]['chore_id'], today_date_str) for aid in sorted(completed - initially_completed)])
+        if initially_completed - completed:
+            executemany_db("DELETE FROM chore_completions WHERE assignment_id = ? AND date_completed = ?",
+                           [(aid, today_date_str) for aid in sorted(initially_completed - completed)])
+        if bonus_rows:
+            executemany_db("INSERT INTO stars (kid_id, date_awarded, type, reason) VALUES (?, ?, 'bonus', ?)", bonus_rows)
+        stars_to_delete = []
+        for index, kid_id, count, star_type_filter in decrement_ops:
+            archived = take_archived_stars(kid_id, count, star_type_filter)
+            star_ids = select_stars_to_decrement(kid_id, count - archived, star_type_filter, exclude_ids=set(stars_to_delete)) if count > archived else []
+            if archived or star_ids: stars_to_delete.extend(star_ids); stat_kids.add(kid_id); results[index]['decremented'] = archived + len(star_ids)
+            else: results[index] = {"op": 'decrement', "ok": False, "error": "No matching stars found to decrement."}
+        if stars_to_delete:
+            executemany_db("DELETE FROM stars WHERE id = ?", [(star_id,) for star_id in stars_to_delete])
+
+        # Rewards once per kid, from the net balloon change of all its completions and unchecks.
+        rewards = {}
+        for kid_id in sorted(completed_kids | unchecked_kids):
+            delta = balloon_delta.get(kid_id, 0)
+            stars_from_balloons = _award_balloons(kid_id, delta, today_date_str) if delta > 0 else 0
+            stars_revoked = _revoke_balloons(kid_id, -delta, today_date_str) if delta < 0 else 0
+            daily_star = _sync_daily_star(kid_id, today_date_obj, allow_award=kid_id in completed_kids, allow_revoke=kid_id in unchecked_kids)
+            rewards[kid_id] = {"balloons_awarded": delta, "stars_from_balloons": stars_from_balloons, "star_from_balloons_revoked": stars_revoked,
+                               "daily_star_awarded": daily_star > 0, "daily_star_revoked": daily_star < 0}
+        stat_kids |= completed_kids | unchecked_kids
+        kid_stats = {row['id']: dict(row) for row in query_db(
+            f"SELECT {KID_COLUMNS} FROM kids WHERE id IN ({sql_placeholders(stat_kids)})", sorted(stat_kids))}
+    for assignment_id in sorted(completed ^ initially_completed):
+        kid_id = assignments[assignment_id]['kid_id']
+        event_bus.publish('completion', kid_id=kid_id, assignment_id=assignment_id, completed=assignment_id in completed, kid=kid_stats.get(kid_id, {}))
+    for kid_id in sorted(stat_kids - completed_kids - unchecked_kids):
+        if kid_id in kid_stats: event_bus.publish('kid_stats', kid_id=kid_id, kid=kid_stats[kid_id])
+    if assignment_kids:
+        event_bus.publish('assignments_changed', kid_ids=sorted(assignment_kids))
+    return results, {kid_id: dict(stats, reward=rewards[kid_id]) if kid_id in rewards else stats for kid_id, stats in kid_stats.items()}
+
+@app.route('/api/batch', methods=['POST'])
+def batch_mutations():
+    data = request.json
+    operations = data.get('operations') if isinstance(data, dict) else data
+    if not isinstance(operations, list) or not operations: return jsonify({"error": "A non-empty 'operations' list is required"}), 400
+    if len(operations) > BATCH_MAX_OPERATIONS: return jsonify({"error": f"At most {BATCH_MAX_OPERATIONS} operations per batch"}), 400
+    # Kids may batch their own completions; anything else needs an admin session.
+    if any(not isinstance(op, dict) or op.get('op') not in BATCH_KID_OPS for op in operations) and not current_user.is_authenticated:
+        return login_manager.unauthorized()
+    # Validated and authorized here, so a rejected batch never takes a turn on the writer.
+    results, kid_stats = run_write(apply_batch, operations, household_today())
+    return jsonify({"results": results, "kids": kid_stats}), 200
+
+@app.route('/api/admin/perf-stats', methods=['GET'])
+@login_required
+def admin_perf_stats():
+    return jsonify({"db_pool": get_pool().stats(), "response_cache": response_cache.stats(), "page_shells": page_shells.stats(), "households": households.stats(), "write_queue": current_household().writer.stats(),
+                    "password_hasher_rejected": password_hasher.rejected}), 200
+
+# --- History export ---
+EXPORT_FETCH_ROWS = 500
+# source -> (SELECT ... FROM ... JOIN ..., date column, kid column, ORDER BY). Each ORDER BY matches
+# the index picked for both the kid and the date-only filters, so rows stream without a sort.
+EXPORT_SOURCES = {
+    'completions': ("""SELECT cc.id, cc.date_completed AS date, cc.completed_at, cc.kid_id, k.name AS kid_name,
+                              cc.chore_id, cm.name AS chore_name, cc.assignment_id
+                       FROM chore_completions cc JOIN kids k ON k.id = cc.kid_id LEFT JOIN chores_master cm ON cm.id = cc.chore_id""",
+                    "cc.date_completed", "cc.kid_id", "cc.date_completed, cc.id"),
+    'stars': ("""SELECT s.id, s.date_awarded AS date, s.kid_id, k.name AS kid_name, s.type, s.reason
+                 FROM stars s JOIN kids k ON k.id = s.kid_id""",
+              "s.date_awarded", "s.kid_id", "s.date_awarded, s.type, s.id"),
+    'completion_summary': ("""SELECT a.day AS date, a.kid_id, k.name AS kid_name, a.completions
+                              FROM completion_daily_summary a JOIN kids k ON k.id = a.kid_id""",
+                           "a.day", "a.kid_id", "a.kid_id, a.day"),
+    'star_summary': ("""SELECT a.day AS date, a.kid_id, k.name AS kid_name, a.type, a.stars
+                        FROM star_daily_summary a JOIN kids k ON k.id = a.kid_id""",
+                     "a.day", "a.kid_id", "a.kid_id, a.day, a.type"),
+}
+
+def export_query(source, start=None, end=None, kid_id=None):
+    """Builds (sql, params) for an EXPORT_SOURCES entry filtered by an inclusive ISO date range and kid."""
+    select_sql, date_column, kid_column, order_by = EXPORT_SOURCES[source]
+    where = []; params = []
+    if kid_id is not None: where.append(f"{kid_column} = ?"); params.append(kid_id)
+    if start: where.append(f"{date_column} >= ?"); params.append(start)
+    if end: where.append(f"{date_column} <= ?"); params.append(end)
+    return select_sql + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY " + order_by, tuple(params)
+
+HOT_QUERIES.update({
+    "export completions for kid": export_query('completions', '2000-01-01', '2000-12-31', 1),
+    "export completions by date": export_query('completions', '2000-01-01', '2000-12-31'),
+    "export stars for kid": export_query('stars', '2000-01-01', '2000-12-31', 1),
+    "export stars by date": export_query('stars', '2000-01-01', '2000-12-31'),
+})
+
+def _export_rows(sql, params, fmt):
+    """Yields the export body a few hundred rows at a time from a server-side cursor."""
+    cur = get_db().execute(sql, params)
+    try:
+        columns = [d[0] for d in cur.description]
+        buffer = io.StringIO(); writer = csv.writer(buffer)
+        if fmt == 'csv': writer.writerow(columns)
+        while True:
+            rows = cur.fetchmany(EXPORT_FETCH_ROWS)
+            if not rows: break
+            if fmt == 'csv': writer.writerows(rows)
+            else: buffer.writelines(json.dumps(dict(zip(columns, row))) + "\n" for row in rows)
+            yield buffer.getvalue()
+            buffer.seek(0); buffer.truncate()
+        if fmt == 'csv' and buffer.tell(): yield buffer.getvalue()
+    finally:
+        cur.close()
+
+@app.route('/api/admin/export', methods=['GET'])
+@login_required
+def admin_export():
+    """Streams history as CSV or NDJSON. Query args: source, format, from, to (YYYY-MM-DD, inclusive), kidId."""
+    source = request.args.get('source', 'completions'); fmt = request.args.get('format', 'csv')
+    if source not in EXPORT_SOURCES: return jsonify({"error": f"source must be one of: {', '.join(EXPORT_SOURCES)}"}), 400
+    if fmt not in ('csv', 'ndjson'): return jsonify({"error": "format must be csv or ndjson"}), 400
+    try:
+        start, end = [date.fromisoformat(request.args[k]).isoformat() if request.args.get(k) else None for k in ('from', 'to')]
+        kid_id = int(request.args['kidId']) if request.args.get('kidId') else None
+    except ValueError: return jsonify({"error": "Invalid date or kid ID"}), 400
+    sql, params = export_query(source, start, end, kid_id)
+    filename = f"chore-chart-{source}-{household_today().isoformat()}.{'csv' if fmt == 'csv' else 'ndjson'}"
+    return Response(stream_with_context(_export_rows(sql, params, fmt)),
+                    mimetype='text/csv' if fmt == 'csv' else 'application/x-ndjson',
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"', 'Cache-Control': 'no-store'})
+
+# --- Bulk import ---
+# `flask import-data PATH` loads kids, chores, assignments and, optionally, completion and star
+# history into the current household in one transaction. PATH is a JSON object holding any of the
+# IMPORT_SECTIONS lists, a CSV file named after one section (kids.csv, ...) or a directory of such
+# files. Kids and chores are matched by name and assignments by kid, chore, frequency and
+# timeframe; those, completions and daily stars already present are skipped, so an import can be
+# run again (other stars are added again). History on days already compacted into the summary
+# tables is skipped. Fields (history exports' kid_name/chore_name work too):
+#   kids         name, avatar_color, train_track_length (default 10), balloons
+#   chores       name, icon
+#   assignments  kid, chore, frequency, timeframe (default any)
+#   completions  kid, chore, date, timeframe (picks the assignment), completed_at
+#   stars        kid, date, type, reason
+# A kid given without balloons gets the balance its imported completions leave after every
+# BALLOONS_PER_STAR of them became a star.
+IMPORT_SECTIONS = ('kids', 'chores', 'assignments', 'completions', 'stars')
+# History rows are loaded with the per-row triggers below dropped; their work is redone afterwards
+# by one set-based counter update and add_history_stats. From IMPORT_DEFER_INDEXES_MIN_ROWS history
+# rows on, the non-unique history indexes are dropped as well and rebuilt once at the end. The
+# unique indexes stay, since they are what skips duplicate completions and daily stars.
+IMPORT_DEFER_INDEXES_MIN_ROWS = 10000
+IMPORT_DEFERRED_TRIGGERS = ('trg_stats_completion_insert', 'trg_stars_count_insert', 'trg_stats_star_insert')
+IMPORT_DEFERRED_INDEXES = ('idx_completions_kid_day', 'idx_completions_day', 'idx_stars_kid_day_type', 'idx_stars_day_type')
+
+class ImportDataError(ValueError):
+    pass
+
+def load_import_data(path):
+    """Reads an import from a JSON file, a <section>.csv file or a directory of them. Returns {section: [record dicts]}."""
+    if os.path.isdir(path):
+        files = {name[:-4]: os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.csv') and name[:-4] in IMPORT_SECTIONS}
+        if not files: raise ImportDataError(f"{path} holds none of {', '.join(s + '.csv' for s in IMPORT_SECTIONS)}")
+    elif path.endswith('.csv'):
+        section = os.path.basename(path)[:-4]
+        if section not in IMPORT_SECTIONS: raise ImportDataError(f"Name the CSV file after its section: {', '.join(s + '.csv' for s in IMPORT_SECTIONS)}")
+        files = {section: path}
+    else:
+        with open(path, encoding='utf-8') as f:
+            try: data = json.load(f)
+            except ValueError as e: raise ImportDataError(f"{path} is not valid JSON: {e}")
+        if not isinstance(data, dict): raise ImportDataError(f"The JSON file must hold an object with any of the lists {', '.join(IMPORT_SECTIONS)}")
+        unknown = sorted(set(data) - set(IMPORT_SECTIONS))
+        if unknown: raise ImportDataError(f"Unknown section(s): {', '.join(unknown)}")
+        return data
+    data = {}
+    for section, file_path in files.items():
+        with open(file_path, newline='', encoding='utf-8-sig') as f:
+            # An empty cell means "not given", like a missing JSON key.
+            data[section] = [{k: v for k, v in row.items() if v not in ('', None)} for row in csv.DictReader(f)]
+    return data
+
+def _import_value(section, index, record, name, required=True, default=None, convert=None):
+    value = record.get(name)
+    if value is None and name in ('kid', 'chore'): value = record.get(f"{name}_name")
+    if value is None or value == '':
+        if required: raise ImportDataError(f"{section}[{index}]: '{name}' is required")
+        return default
+    if convert is None: return str(value).strip()
+    try: return convert(value)
+    except (TypeError, ValueError): raise ImportDataError(f"{section}[{index}]: invalid {name} {value!r}")
+
+def _import_day(value):
+    return date.fromisoformat(str(value).strip()[:10]).isoformat()
+
+def _import_ids(table, section, index, ids, name):
+    if name not in ids: raise ImportDataError(f"{section}[{index}]: unknown {table} '{name}'")
+    return ids[name]
+
+def import_data(data, today):
+    """Loads an import (see load_import_data) into the current household. Must run inside transaction(). Returns the rows added per section."""
+    db = get_db()
+    sections = {section: data.get(section) or [] for section in IMPORT_SECTIONS}
+    added = dict.fromkeys(IMPORT_SECTIONS, 0)
+    # Kids and chores: new names only; the first row of a duplicated name wins.
+    kid_ids = {row['name']: row['id'] for row in query_db("SELECT name, MIN(id) AS id FROM kids GROUP BY name")}
+    new_kids = {}
+    for i, record in enumerate(sections['kids']):
+        name = _import_value('kids', i, record, 'name')
+        if name in kid_ids or name in new_kids: continue
+        track_length = _import_value('kids', i, record, 'train_track_length', required=False, default=10, convert=int)
+        balloons = _import_value('kids', i, record, 'balloons', required=False, convert=int)
+        if track_length <= 0 or (balloons is not None and balloons < 0): raise ImportDataError(f"kids[{i}]: train_track_length must be positive and balloons not negative")
+        new_kids[name] = (name, _import_value('kids', i, record, 'avatar_color', required=False), balloons, track_length)
+    # balloons stays NULL until the counter pass below fills it in from the history.
+    executemany_db("INSERT INTO kids (name, avatar_color, balloons, train_track_length, train_laps_completed) VALUES (?, ?, ?, ?, 0)", list(new_kids.values()))
+    added['kids'] = len(new_kids)
+    chore_ids = {row['name']: row['id'] for row in query_db("SELECT name, MIN(id) AS id FROM chores_master GROUP BY name")}
+    new_chores = {}
+    for i, record in enumerate(sections['chores']):
+        name = _import_value('chores', i, record, 'name')
+        if name not in chore_ids and name not in new_chores: new_chores[name] = (name, _import_value('chores', i, record, 'icon', required=False))
+    executemany_db("INSERT INTO chores_master (name, icon) VALUES (?, ?)", list(new_chores.values()))
+    added['chores'] = len(new_chores)
+    if new_kids: kid_ids = {row['name']: row['id'] for row in query_db("SELECT name, MIN(id) AS id FROM kids GROUP BY name")}
+    if new_chores: chore_ids = {row['name']: row['id'] for row in query_db("SELECT name, MIN(id) AS id FROM chores_master GROUP BY name")}
+
+    rows = []
+    for i, record in enumerate(sections['assignments']):
+        kid_id = _import_ids('kid', 'assignments', i, kid_ids, _import_value('assignments', i, record, 'kid'))
+        chore_id = _import_ids('chore', 'assignments', i, chore_ids, _import_value('assignments', i, record, 'chore'))
+        try: frequency, schedule = normalize_frequency(_import_value('assignments', i, record, 'frequency'), today)
+        except ValueError: raise ImportDataError(f"assignments[{i}]: invalid frequency {record.get('frequency')!r}")
+        rows.append((kid_id, chore_id, frequency, _import_value('assignments', i, record, 'timeframe', required=False, default='any'), schedule))
+    if rows: added['assignments'] = sum(new_id is not None for new_id in insert_assignments(rows))
+
+    # A completion belongs to its kid's assignment of the chore (the one with its timeframe, if
+    # given; else the oldest). Without one it is kept unattached, like completions of deleted assignments.
+    assignments = {}
+    for row in query_db("SELECT id, kid_id, chore_id, timeframe FROM chore_assignments ORDER BY id"):
+        assignments.setdefault((row['kid_id'], row['chore_id']), []).append((row['id'], row['timeframe']))
+    completions = []
+    for i, record in enumerate(sections['completions']):
+        kid_id = _import_ids('kid', 'completions', i, kid_ids, _import_value('completions', i, record, 'kid'))
+        chore_id = _import_ids('chore', 'completions', i, chore_ids, _import_value('completions', i, record, 'chore'))
+        timeframe = _import_value('completions', i, record, 'timeframe', required=False)
+        candidates = [assignment_id for assignment_id, tf in assignments.get((kid_id, chore_id), ()) if timeframe is None or tf == timeframe]
+        completions.append((candidates[0] if candidates else None, kid_id, chore_id, _import_value('completions', i, record, 'date', convert=_import_day),
+                            _import_value('completions', i, record, 'completed_at', required=False)))
+    stars = []
+    for i, record in enumerate(sections['stars']):
+        kid_id = _import_ids('kid', 'stars', i, kid_ids, _import_value('stars', i, record, 'kid'))
+        stars.append((kid_id, _import_value('stars', i, record, 'date', convert=_import_day), _import_value('stars', i, record, 'type'),
+                      _import_value('stars', i, record, 'reason', required=False)))
+    # Compacted days live on only in the summary tables, where the unique indexes cannot see them:
+    # history for a kid's compacted day (and star type) is taken as already there.
+    if completions:
+        compacted = {tuple(row) for row in db.execute("SELECT kid_id, day FROM completion_daily_summary")}
+        if compacted: completions = [row for row in completions if (row[1], row[3]) not in compacted]
+    if stars:
+        compacted = {tuple(row) for row in db.execute("SELECT kid_id, day, type FROM star_daily_summary")}
+        if compacted: stars = [row for row in stars if row[:3] not in compacted]
+
+    deferred = []
+    def defer(names):
+        for kind, name, sql in db.execute(f"SELECT type, name, sql FROM sqlite_master WHERE name IN ({sql_placeholders(names)})", names).fetchall():
+            db.execute(f"DROP {kind.upper()} {name}"); deferred.append((kind, name, sql))
+    after_completion_id = db.execute("SELECT COALESCE(MAX(id), 0) FROM chore_completions").fetchone()[0]
+    after_star_id = db.execute("SELECT COALESCE(MAX(id), 0) FROM stars").fetchone()[0]
+    if completions or stars: defer(IMPORT_DEFERRED_TRIGGERS)
+    # The unique index does not tell NULL assignments apart, so an unattached completion is skipped
+    # when its kid already has one of the chore that day. Loaded while idx_completions_kid_day is still there.
+    unattached = [row[1:] + row[1:4] for row in completions if row[0] is None]
+    added['completions'] = db.executemany("""INSERT INTO chore_completions (assignment_id, kid_id, chore_id, date_completed, completed_at)
+                                             SELECT NULL, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP) WHERE NOT EXISTS (
+                                                 SELECT 1 FROM chore_completions WHERE kid_id = ? AND chore_id = ? AND date_completed = ?)""", unattached).rowcount if unattached else 0
+    completions = [row for row in completions if row[0] is not None]
+    if len(completions) + len(stars) >= IMPORT_DEFER_INDEXES_MIN_ROWS: defer(IMPORT_DEFERRED_INDEXES)
+    added['completions'] += db.executemany("""INSERT OR IGNORE INTO chore_completions (assignment_id, kid_id, chore_id, date_completed, completed_at)
+                                              VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))""", completions).rowcount if completions else 0
+    added['stars'] = db.executemany("INSERT OR IGNORE INTO stars (kid_id, date_awarded, type, reason) VALUES (?, ?, ?, ?)", stars).rowcount if stars else 0
+    for kind, _, sql in sorted(deferred, key=lambda entry: entry[0] != 'index'): db.execute(sql)
+    # The counters in one pass over all kids; trg_kids_train_laps follows stars_count with the laps.
+    db.execute(f"""UPDATE kids SET
+                       stars_count = (SELECT COUNT(*) FROM stars s WHERE s.kid_id = kids.id)
+                                     + (SELECT COALESCE(SUM(a.stars), 0) FROM star_daily_summary a WHERE a.kid_id = kids.id),
+                       balloons = COALESCE(balloons, (SELECT COUNT(*) FROM chore_completions c WHERE c.kid_id = kids.id) % {BALLOONS_PER_STAR})""")
+    if added['completions'] or added['stars']: add_history_stats(db, after_completion_id, after_star_id, today)
+    return added
+
+# --- Startup and readiness ---
+# Servers build the app with create_app(), which does the once-per-process work before the first
+# request: every household database is created or migrated and its today board rolled over to the
+# household day. Under `gunicorn --preload 'app:create_app()'` that runs once in the parent before
+# the workers fork, so a new worker serves immediately. Importing app stays free of database work.
+_process_started = time.monotonic()
+_startup_lock = threading.Lock()
+_startup_report = None
+
+def prepare_database(db_path):
+    """Checks one database's schema and rolls its today board over to the household's day. Returns the day."""
+    pool = ConnectionPool(db_path, 1, app.config['DB_BUSY_TIMEOUT_MS'], app.config['DB_CACHED_STATEMENTS'])
+    conn = pool.acquire()
+    try:
+        day = database_today(conn)
+        built = conn.execute("SELECT iso FROM today_board_day WHERE id = 1").fetchone()
+        if not built or built[0] != day.isoformat():
+            _begin_immediate(conn)
+            build_today_board(conn, day)
+            conn.commit()
+        return day
+    finally:
+        pool.release(conn)
+        pool.close()
+
+def startup():
+    """Runs the startup work unless this process (or the parent it forked from) already has; returns its report."""
+    global _startup_report
+    with _startup_lock:
+        if _startup_report is None:
+            started = time.perf_counter()
+            board_days = {slug or 'default': prepare_database(household_db_path(slug)).isoformat() for slug in households.slugs()}
+            _startup_report = {"households": len(board_days), "schema_version": len(MIGRATIONS), "board_days": board_days,
+                               "startup_ms": round((time.perf_counter() - started) * 1000, 1)}
+        return _startup_report
+
+def create_app():
+    """Application factory for servers: runs startup() and returns the app."""
+    startup()
+    return app
+
+@app.route('/readyz')
+def readiness():
+    """200 once the startup work is done (running it if nothing has yet), 503 while it is running or failing."""
+    if _startup_report is None and _startup_lock.locked():
+        return jsonify({"status": "starting"}), 503
+    try:
+        report = startup()
+    except (sqlite3.Error, OSError) as error:
+        return jsonify({"status": "unavailable", "error": str(error)}), 503
+    return jsonify(dict(report, status="ready", uptime_seconds=round(time.monotonic() - _process_started, 1)))
+
 # --- CLI command to initialize DB ---
 @app.cli.command('initdb')
 def initdb_command():
-    db_path = os.path.join(app.root_path, DATABASE)
+    db_path = household_db_path(current_household_slug())
     db_dir = os.path.dirname(db_path)
     if not os.path.exists(db_dir): os.makedirs(db_dir)
     with sqlite3.connect(db_path) as conn:
@@ -499,17 +2817,104 @@ def initdb_command():
         init_db_schema(conn) 
     print(f'Initialized the database at {db_path} with schema string.')
 
+@app.cli.command('migratedb')
+def migratedb_command():
+    """Applies pending schema migrations without dropping any data."""
+    db_path = household_db_path(current_household_slug())
+    if not os.path.exists(db_path):
+        print(f"Database {db_path} not found. Run `flask initdb` to create it.")
+        return
+    with sqlite3.connect(db_path) as conn:
+        version = migrate_db(conn)
+    print(f'Database at {db_path} is at schema version {version}.')
+
+@app.cli.command('create-household')
+@click.argument('slug')
+def create_household_command(slug):
+    """Creates an empty database for a new household (multi-household mode)."""
+    if not HOUSEHOLDS_DIR: raise click.ClickException("Set HOUSEHOLDS_DIR to enable households.")
+    if not HOUSEHOLD_SLUG.match(slug): raise click.ClickException("Slugs are lowercase letters, digits and dashes.")
+    db_path = household_db_path(slug)
+    if os.path.exists(db_path): raise click.ClickException(f"Household '{slug}' already exists.")
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    with sqlite3.connect(db_path) as conn:
+        init_db_schema(conn)
+    print(f"Created household '{slug}' at {db_path}. Add an admin with: HOUSEHOLDS_DIR={HOUSEHOLDS_DIR} CHORE_CHART_HOUSEHOLD={slug} python create_admin.py")
+
+@app.cli.command('set-timezone')
+@click.argument('zone', required=False)
+@click.option('--clear', is_flag=True, help='Go back to HOUSEHOLD_TIMEZONE (or the server\'s local time).')
+def set_timezone_command(zone, clear):
+    """Shows or sets the household's timezone, an IANA name such as Europe/Berlin."""
+    if zone and clear: raise click.ClickException("Give a ZONE or --clear, not both.")
+    if zone:
+        try: ZoneInfo(zone)
+        except (ZoneInfoNotFoundError, ValueError): raise click.ClickException(f"Unknown timezone '{zone}'.")
+    with app.app_context():
+        if zone or clear:
+            if zone: execute_db("INSERT OR REPLACE INTO household_settings (name, value) VALUES ('timezone', ?)", (zone,))
+            else: execute_db("DELETE FROM household_settings WHERE name = 'timezone'")
+            # Workers re-read the setting when the data version moves.
+            data_version().bump()
+        current = timezone_setting(get_db())
+        print(f"Household timezone: {current or 'server local time'}; today is {household_today().isoformat()}.")
+
+@app.cli.command('compact-history')
+@click.option('--days', default=365, show_default=True, type=click.IntRange(min=1), help='Keep this many days of detailed history.')
+@click.option('--no-vacuum', is_flag=True, help='Skip the incremental vacuum afterwards.')
+def compact_history_command(days, no_vacuum):
+    """Rolls old completions and stars into per-kid daily summary tables."""
+    before_day = household_today() - timedelta(days=days)
+    with app.app_context():
+        completions, stars = compact_history(before_day)
+        if completions or stars: data_version().bump()
+        print(f"Archived {completions} completion(s) and {stars} star(s) dated before {before_day.isoformat()}.")
+        if not no_vacuum: print(f"Vacuum returned {incremental_vacuum()} page(s) to the filesystem.")
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recomputes the kid statistics tables from the full history."""
+    with app.app_context():
+        with transaction(): rebuild_stats(get_db(), household_today())
+        data_version().bump()
+    print("Rebuilt kid statistics.")
+
+@app.cli.command('repair-counters')
+@click.option('--check-only', is_flag=True, help='Report drifted counters without rewriting them.')
+def repair_counters_command(check_only):
+    """Rebuilds kids.stars_count and train_laps_completed from the stars and star summary tables."""
+    with app.app_context():
+        drifted = check_kid_counters(repair=not check_only)
+        if drifted and not check_only: data_version().bump()
+    for row in drifted:
+        print(f"Kid {row['id']} ({row['name']}): stars_count {row['stars_count']} -> {row['actual_stars_count']}, laps {row['train_laps_completed']}")
+    if not drifted: print("All kid counters are consistent.")
+    elif check_only: raise SystemExit(1)
+    else: print(f"Repaired counters for {len(drifted)} kid(s).")
+
+@app.cli.command('import-data')
+@click.argument('path', type=click.Path(exists=True))
+def import_data_command(path):
+    """Bulk-loads kids, chores, assignments and history from a JSON file or CSV files (see "Bulk import")."""
+    started = time.perf_counter()
+    try:
+        data = load_import_data(path)
+        with app.app_context():
+            with transaction(): added = import_data(data, household_today())
+            data_version().bump()
+    except ImportDataError as error:
+        raise click.ClickException(str(error))
+    print(f"Imported {', '.join(f'{count} {section}' for section, count in added.items())} in {time.perf_counter() - started:.1f}s.")
+
+@app.cli.command('check-query-plans')
+def check_query_plans_command():
+    """Fails if any hot-path query would scan a whole table instead of using an index."""
+    with app.app_context():
+        failures = unindexed_query_plans(get_db())
+    for name, plan in failures.items():
+        print(f"NOT INDEXED: {name}: {' | '.join(plan)}")
+    if failures: raise SystemExit(1)
+    print(f"All {len(HOT_QUERIES)} hot-path queries use an index.")
+
 if __name__ == '__main__':
-    with app.app_context(): 
-        db_full_path = os.path.join(app.root_path, DATABASE)
-        db_directory = os.path.dirname(db_full_path)
-        if not os.path.exists(db_directory):
-            try: os.makedirs(db_directory); print(f"Created database directory for __main__: {db_directory}")
-            except OSError as e: print(f"Error creating database directory {db_directory} in __main__: {e}")
-        if not os.path.exists(db_full_path):
-            print(f"Database {db_full_path} not found. Initializing for `python app.py`...")
-            temp_conn_for_init = sqlite3.connect(db_full_path)
-            init_db_schema(temp_conn_for_init)
-            temp_conn_for_init.close()
-            print("Database initialized on startup for `python app.py`.")
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    create_app().run(host='0.0.0.0', port=5000, debug=True)
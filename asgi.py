@@ -0,0 +1,163 @@
+"""ASGI entry point for serving many long-lived kiosk connections from one process.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+The event loop owns every socket: request bodies are read and responses written without holding
+a thread, and `/api/stream` (Server-Sent Events) is served natively on asyncio, so an idle kiosk
+costs a coroutine rather than a worker thread. Everything else runs the existing Flask views on
+ASGI_READER_THREADS reader threads (default DB_POOL_SIZE), each borrowing a pooled connection for
+the length of one request. Writes are handed on to the household's writer thread (see "Write
+queue" in app.py), which group-commits the writes that arrive together.
+
+The API contract is unchanged: the same views, caching, ETags, sessions and household routing.
+"""
+import asyncio
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import app as A
+
+ASGI_READER_THREADS = int(os.environ.get('ASGI_READER_THREADS', A.app.config['DB_POOL_SIZE']))
+STREAM_PATH = '/api/stream'
+
+
+def build_environ(scope, body):
+    """The WSGI environ for an ASGI HTTP scope whose body has been read in full."""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0], 'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body), 'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_'); value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE': environ['CONTENT_TYPE'] = value; continue
+        if name == 'CONTENT_LENGTH': continue
+        key = 'HTTP_' + name
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class AsyncApp:
+    """Routes ASGI requests to the native event stream or to the Flask app on the reader threads."""
+    def __init__(self, reader_threads=ASGI_READER_THREADS):
+        self.reader_threads = reader_threads
+        self._readers = None
+
+    def _executor(self):
+        if self._readers is None:
+            self._readers = ThreadPoolExecutor(self.reader_threads, thread_name_prefix='sqlite-reader')
+        return self._readers
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan': return await self.lifespan(receive, send)
+        if scope['type'] != 'http': return
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect': return
+            body += message.get('body', b'')
+            if not message.get('more_body'): break
+        environ = build_environ(scope, bytes(body))
+        readers = self._executor()
+        routed = A.mount_household_prefix(dict(environ))
+        if scope['method'] == 'GET' and routed['PATH_INFO'] == STREAM_PATH:
+            return await self.event_stream(routed, receive, send, readers)
+        await asyncio.get_running_loop().run_in_executor(readers, self.call_wsgi, environ, send, asyncio.get_running_loop())
+
+    def call_wsgi(self, environ, send, loop):
+        """Runs one Flask request on an executor thread, handing each part of the response to the event loop."""
+        def emit(message): asyncio.run_coroutine_threadsafe(send(message), loop).result()
+        started = []
+        def start_response(status, headers, exc_info=None):
+            started[:] = [int(status.split(' ', 1)[0]), [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]]
+        iterable = A.app(environ, start_response)
+        try:
+            emit({'type': 'http.response.start', 'status': started[0], 'headers': started[1]})
+            for chunk in iterable:
+                if chunk: emit({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            emit({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(iterable, 'close'): iterable.close()
+
+    async def event_stream(self, environ, receive, send, readers):
+        """Native /api/stream: the same events, heartbeats and overflow resync as the WSGI view."""
+        loop = asyncio.get_running_loop()
+        def resolve():
+            with A.app.request_context(environ):
+                household = A.current_household()
+                household.event_bus.watch_foreign_writes(household.pool.db_path)
+                return household.event_bus
+        try: bus = await loop.run_in_executor(readers, resolve)
+        except A.UnknownHousehold:
+            return await self.send_json(send, 404, {"error": "Unknown household"})
+        events = asyncio.Queue(maxsize=A.SSE_QUEUE_SIZE)
+        overflowed = asyncio.Event()
+        def enqueue(event):
+            try: events.put_nowait(event)
+            except asyncio.QueueFull: overflowed.set()
+        # Publishers run on executor threads; hand their events to the loop.
+        def deliver(event): loop.call_soon_threadsafe(enqueue, event)
+        disconnected = asyncio.ensure_future(self.wait_for_disconnect(receive))
+        bus.subscribe(deliver)
+        try:
+            await send({'type': 'http.response.start', 'status': 200,
+                        'headers': [(b'content-type', b'text/event-stream; charset=utf-8'), (b'cache-control', b'no-cache'), (b'x-accel-buffering', b'no')]})
+            await send({'type': 'http.response.body', 'body': b"retry: 3000\n\n", 'more_body': True})
+            while not disconnected.done():
+                next_event = asyncio.ensure_future(events.get())
+                done, _ = await asyncio.wait((next_event, disconnected), timeout=A.SSE_HEARTBEAT_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+                if next_event not in done:
+                    next_event.cancel()
+                    if not disconnected.done(): await send({'type': 'http.response.body', 'body': b": keepalive\n\n", 'more_body': True})
+                    continue
+                event = next_event.result()
+                if overflowed.is_set():
+                    # A slow client missed events; let it refetch instead of replaying a backlog.
+                    overflowed.clear()
+                    while not events.empty(): events.get_nowait()
+                    event = {"type": "resync"}
+                await send({'type': 'http.response.body', 'body': A._format_sse(event).encode(), 'more_body': True})
+        except OSError:
+            pass
+        finally:
+            bus.unsubscribe(deliver)
+            disconnected.cancel()
+
+    @staticmethod
+    async def wait_for_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect': pass
+
+    @staticmethod
+    async def send_json(send, status, payload):
+        await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-type', b'application/json')]})
+        await send({'type': 'http.response.body', 'body': json.dumps(payload).encode()})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # Schema checks and the board rollover (app.startup) run before the first request is accepted.
+                try: await asyncio.get_running_loop().run_in_executor(None, A.create_app)
+                except Exception as error:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(error)}); return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._readers is not None: self._readers.shutdown(wait=True)
+                for household in A.households.open_households(): household.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+application = AsyncApp()
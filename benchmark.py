@@ -0,0 +1,396 @@
+"""Load test and micro-benchmark for the chore chart API.
+
+Seeds a synthetic database, then drives the real endpoints through the Flask test client
+(in-process, with SQL statement counts), through a local gunicorn and through the ASGI mode under
+uvicorn (over HTTP, concurrent, optionally while --idle-streams kiosk event streams stay open).
+Server runs also report ready_ms, the time from launch until /readyz answers.
+Prints one JSON document so runs can be saved and compared:
+
+    python benchmark.py --kids 8 --years 3 --requests 500 --output before.json
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+ADMIN_USERNAME = 'bench'
+ADMIN_PASSWORD = 'bench-password'
+FREQUENCIES = ['daily', 'daily', 'daily', 'weekdays', 'weekends', 'monday,thursday', 'every:2', 'monthly:15']
+TIMEFRAMES = ['morning', 'night', 'any', 'any']
+TRANSACTION_CONTROL = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', '--')
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values: return None
+    index = max(0, math.ceil(pct / 100.0 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class Recorder:
+    """Collects latencies (and optionally SQL statement counts and response-cache hits) per endpoint."""
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.queries = {}
+        self.cache_hits = {}
+        self.wall = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds, ok, queries=None, cache_hit=None):
+        with self._lock:
+            self.samples.setdefault(name, []).append(seconds)
+            if not ok: self.errors[name] = self.errors.get(name, 0) + 1
+            if queries is not None: self.queries.setdefault(name, []).append(queries)
+            if cache_hit is not None: self.cache_hits[name] = self.cache_hits.get(name, 0) + cache_hit
+
+    def timed(self, name, started, finished):
+        with self._lock:
+            first, last = self.wall.get(name, (started, finished))
+            self.wall[name] = (min(first, started), max(last, finished))
+
+    def report(self):
+        report = {}
+        for name, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            first, last = self.wall.get(name, (0, sum(samples)))
+            queries = self.queries.get(name)
+            report[name] = {
+                "requests": len(samples),
+                "errors": self.errors.get(name, 0),
+                "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+                "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+                "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+                "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+                "requests_per_second": round(len(samples) / (last - first), 1) if last > first else None,
+                "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+                "cache_hits": self.cache_hits.get(name),
+            }
+        return report
+
+
+def seed_database(app_module, kids, chores, assignments_per_kid, years, seed):
+    """Fills an empty database with kids, chores, assignments and `years` of completion/star history
+    through the bulk importer (`flask import-data`)."""
+    A = app_module
+    rng = random.Random(seed)
+    today = date.today()
+    kid_rows = [{"name": f"Kid {i + 1}", "avatar_color": f"#{rng.randrange(0x1000000):06x}", "balloons": rng.randrange(A.BALLOONS_PER_STAR),
+                 "train_track_length": rng.choice([5, 10, 20])} for i in range(kids)]
+    chore_rows = [{"name": f"Chore {i + 1}", "icon": "*"} for i in range(chores)]
+    assignments = []
+    for kid in kid_rows:
+        for chore in rng.sample(chore_rows, min(assignments_per_kid, len(chore_rows))):
+            frequency, schedule = A.normalize_frequency(rng.choice(FREQUENCIES), today - timedelta(days=rng.randrange(7)))
+            assignments.append(({"kid": kid["name"], "chore": chore["name"], "frequency": frequency, "timeframe": rng.choice(TIMEFRAMES)}, schedule))
+    completions = []; stars = []
+    for offset in range(years * 365, 0, -1):
+        day = today - timedelta(days=offset); day_str = day.isoformat(); done_by_kid = {}
+        for assignment, schedule in assignments:
+            if not schedule.is_due(day): continue
+            done = rng.random() < 0.8
+            if done: completions.append({"kid": assignment["kid"], "chore": assignment["chore"], "date": day_str})
+            due, finished = done_by_kid.get(assignment["kid"], (0, 0)); done_by_kid[assignment["kid"]] = (due + 1, finished + done)
+        for kid, (due, finished) in done_by_kid.items():
+            if due == finished: stars.append({"kid": kid, "date": day_str, "type": "daily"})
+            if rng.random() < 0.05: stars.append({"kid": kid, "date": day_str, "type": "bonus", "reason": "seeded"})
+    with A.app.app_context():
+        A.execute_db("INSERT INTO users (username, password_hash) VALUES (?, ?)",
+                     (ADMIN_USERNAME, A.bcrypt.generate_password_hash(ADMIN_PASSWORD).decode('utf-8')))
+        started = time.perf_counter()
+        with A.transaction():
+            added = A.import_data({"kids": kid_rows, "chores": chore_rows, "assignments": [a for a, _ in assignments],
+                                   "completions": completions, "stars": stars}, today)
+        import_seconds = time.perf_counter() - started
+        A.get_db().execute("ANALYZE")
+        A.get_db().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return dict(added, history_days=years * 365, import_seconds=round(import_seconds, 2))
+
+
+def plan_due_chores(fetch_today, kid_ids):
+    """Returns (kid_id, assignment_id, chore_id) for every chore due today that is not yet completed."""
+    pairs = []
+    for kid_id in kid_ids:
+        for chores in fetch_today(kid_id)['chores'].values():
+            pairs.extend((kid_id, c['assignment_id'], c['chore_id']) for c in chores if not c['completed_today'])
+    return pairs
+
+
+def run_workload(call, kid_ids, due, requests, recorder, worker=0, workers=1, uncached_reads=False):
+    """Runs every benchmarked endpoint `requests` times (completions/unchecks in rounds over today's chores).
+
+    With `uncached_reads`, each read is run a second time as `<name>_uncached`, with `call` told to
+    empty the response cache first, so its numbers show the work behind a cache miss.
+    """
+    my_kids = kid_ids[worker::workers] or kid_ids
+    reads = [('get_kids', '/api/kids'), ('chores_today', None),
+             ('admin_chores_master', '/api/chores-master'), ('admin_assignments', '/api/assignments')]
+    for name, path in reads:
+        for uncached in ((False, True) if uncached_reads else (False,)):
+            label = f"{name}_uncached" if uncached else name
+            started = time.perf_counter()
+            for i in range(requests // workers):
+                url = path or f"/api/kids/{my_kids[i % len(my_kids)]}/chores-today"
+                if uncached: call(recorder, label, 'GET', url, uncached=True)
+                else: call(recorder, label, 'GET', url)
+            recorder.timed(label, started, time.perf_counter())
+    mine = due[worker::workers]
+    if not mine: return
+    done = 0
+    while done < requests // workers:
+        batch = mine[:requests // workers - done]
+        started = time.perf_counter()
+        for kid_id, assignment_id, chore_id in batch:
+            call(recorder, 'completions', 'POST', '/api/completions', {"kidId": kid_id, "assignmentId": assignment_id, "choreId": chore_id})
+        recorder.timed('completions', started, time.perf_counter())
+        started = time.perf_counter()
+        for kid_id, assignment_id, chore_id in batch:
+            call(recorder, 'uncheck', 'POST', '/api/completions/uncheck', {"kidId": kid_id, "assignmentId": assignment_id})
+        recorder.timed('uncheck', started, time.perf_counter())
+        done += len(batch)
+
+
+def bench_test_client(app_module, requests):
+    """Drives the app in-process. Counts SQL statements (excluding transaction control) per request,
+    including those its write-queue jobs run on the writer's connection."""
+    A = app_module
+    statements = threading.local()
+
+    def count_statement(sql):
+        counter = getattr(statements, 'counter', None)
+        if counter is not None and not sql.lstrip().upper().startswith(TRANSACTION_CONTROL): counter[0] += 1
+
+    @A.app.before_request
+    def start_counting():
+        statements.counter = [0]
+
+    # Every connection handed to a request reports its statements; cache hits never borrow one.
+    with A.app.app_context():
+        pool = A.get_pool(); acquire = pool.acquire
+        household = A.current_household(); writer = household.writer; submit = writer.submit
+    def acquire_traced():
+        conn = acquire(); conn.set_trace_callback(count_statement)
+        return conn
+    pool.acquire = acquire_traced
+
+    # Writes run on the writer thread and its own connection: charge them to the submitting request.
+    def submit_counted(fn, args=(), kwargs=None, user=None):
+        counter = getattr(statements, 'counter', None)
+        def counted(*job_args, **job_kwargs):
+            statements.counter = counter; A.get_db().set_trace_callback(count_statement)
+            try: return fn(*job_args, **job_kwargs)
+            finally: statements.counter = None
+        return submit(counted, args, kwargs, user)
+    writer.submit = submit_counted
+
+    client = A.app.test_client()
+    login = client.post('/login', data={'username': ADMIN_USERNAME, 'password': ADMIN_PASSWORD})
+    if login.status_code != 302: raise RuntimeError(f"Admin login failed with status {login.status_code}")
+    kid_ids = [k['id'] for k in client.get('/api/kids').get_json()]
+    due = plan_due_chores(lambda kid_id: client.get(f'/api/kids/{kid_id}/chores-today').get_json(), kid_ids)
+
+    def call(recorder, name, method, path, body=None, uncached=False):
+        if uncached: household.response_cache.clear()
+        hits = household.response_cache.hits
+        started = time.perf_counter()
+        response = client.open(path, method=method, json=body)
+        recorder.add(name, time.perf_counter() - started, response.status_code < 400, statements.counter[0],
+                     household.response_cache.hits > hits if method == 'GET' else None)
+
+    recorder = Recorder()
+    run_workload(call, kid_ids, due, requests, recorder, uncached_reads=True)
+    return recorder.report()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class HttpSession:
+    """One keep-alive connection with the session cookie of a logged-in admin."""
+    def __init__(self, port):
+        self.conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        self.cookie = ''
+
+    def request(self, method, path, body=None, form=None):
+        headers = {'Cookie': self.cookie} if self.cookie else {}
+        if form is not None:
+            payload = urllib.parse.urlencode(form); headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif body is not None:
+            payload = json.dumps(body); headers['Content-Type'] = 'application/json'
+        else:
+            payload = None
+        self.conn.request(method, path, body=payload, headers=headers)
+        response = self.conn.getresponse(); data = response.read()
+        for header, value in response.getheaders():
+            if header.lower() == 'set-cookie' and value.startswith('session='): self.cookie = value.split(';', 1)[0]
+        return response.status, data
+
+    def close(self):
+        self.conn.close()
+
+    def login(self):
+        status, _ = self.request('POST', '/login', form={'username': ADMIN_USERNAME, 'password': ADMIN_PASSWORD})
+        if status != 302: raise RuntimeError(f"Admin login failed with status {status}")
+
+
+def open_idle_streams(port, count):
+    """Opens `count` /api/stream connections that stay idle like kiosk tablets. Returns their sockets."""
+    streams = []
+    for _ in range(count):
+        sock = socket.create_connection(('127.0.0.1', port), timeout=30)
+        sock.sendall(b"GET /api/stream HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n")
+        streams.append(sock)
+    return streams
+
+
+def bench_server(name, command, db_path, requests, concurrency, idle_streams):
+    """Starts a server on a free port against the seeded database and drives it with `concurrency` clients,
+    optionally while `idle_streams` event streams are held open."""
+    port = free_port()
+    # Every client logs in as the same admin at once; lift the login throttles and the bcrypt queue
+    # limit so that burst doesn't turn into 429s and 503s.
+    env = dict(os.environ, CHORE_CHART_DB=db_path, SECRET_KEY='benchmark-secret', PASSWORD_HASH_QUEUE_DEPTH='1000',
+               LOGIN_ATTEMPTS_PER_MINUTE_PER_IP='100000', LOGIN_ATTEMPTS_PER_MINUTE_PER_USER='100000')
+    env.pop('HOUSEHOLDS_DIR', None)
+    launched = time.perf_counter()
+    server = subprocess.Popen([sys.executable, '-m'] + [arg.format(port=port) for arg in command],
+                              cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+    streams = []
+    try:
+        deadline = time.time() + 30
+        while True:
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+                try:
+                    conn.request('GET', '/readyz')
+                    if conn.getresponse().status == 200: break
+                finally:
+                    conn.close()
+            except OSError:
+                pass
+            if server.poll() is not None or time.time() > deadline: raise RuntimeError(f"{name} did not start")
+            time.sleep(0.01)
+        ready_seconds = time.perf_counter() - launched
+        streams = open_idle_streams(port, idle_streams)
+        planner = HttpSession(port); planner.login()
+        kid_ids = [k['id'] for k in json.loads(planner.request('GET', '/api/kids')[1])]
+        due = plan_due_chores(lambda kid_id: json.loads(planner.request('GET', f'/api/kids/{kid_id}/chores-today')[1]), kid_ids)
+        planner.close()
+        recorder = Recorder()
+
+        def client(worker):
+            session = HttpSession(port); session.login()
+
+            def call(recorder, name, method, path, body=None):
+                started = time.perf_counter()
+                status, _ = session.request(method, path, body=body)
+                recorder.add(name, time.perf_counter() - started, status < 400)
+            # An open keep-alive connection would hold a gthread worker in its graceful shutdown.
+            try: run_workload(call, kid_ids, due, requests, recorder, worker, concurrency)
+            finally: session.close()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(client, worker) for worker in range(concurrency)]: future.result()
+        report = recorder.report()
+        report["ready_ms"] = round(ready_seconds * 1000, 1)
+        if idle_streams: report["idle_streams"] = idle_streams
+        return report
+    finally:
+        for sock in streams: sock.close()
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def bench_gunicorn(db_path, requests, concurrency, workers, threads, idle_streams=0):
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        return {"skipped": "gunicorn is not installed"}
+    # Each idle stream pins one gthread thread; with idle_streams >= workers * threads the workload cannot run.
+    if idle_streams >= workers * threads:
+        return {"skipped": f"{idle_streams} idle streams would occupy all {workers * threads} gunicorn threads"}
+    return bench_server('gunicorn', ['gunicorn', '-b', '127.0.0.1:{port}', '--worker-class', 'gthread', '--workers', str(workers),
+                                     '--threads', str(threads), '--log-level', 'warning', '--preload', 'app:create_app()'],
+                        db_path, requests, concurrency, idle_streams)
+
+
+def bench_uvicorn(db_path, requests, concurrency, idle_streams=0):
+    """The ASGI mode (asgi.py): one process, one event loop, a writer thread and reader threads."""
+    try:
+        import uvicorn  # noqa: F401
+    except ImportError:
+        return {"skipped": "uvicorn is not installed"}
+    return bench_server('uvicorn', ['uvicorn', '--host', '127.0.0.1', '--port', '{port}', '--log-level', 'warning', 'asgi:application'],
+                        db_path, requests, concurrency, idle_streams)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--kids', type=int, default=5)
+    parser.add_argument('--chores', type=int, default=30)
+    parser.add_argument('--assignments-per-kid', type=int, default=10)
+    parser.add_argument('--years', type=int, default=2, help="years of completion/star history to seed")
+    parser.add_argument('--requests', type=int, default=200, help="requests per endpoint")
+    parser.add_argument('--mode', choices=['client', 'gunicorn', 'uvicorn', 'both', 'all'], default='both',
+                        help="'both' is client and gunicorn; 'all' adds the ASGI server (uvicorn)")
+    parser.add_argument('--concurrency', type=int, default=8, help="concurrent HTTP clients in server modes")
+    parser.add_argument('--idle-streams', type=int, default=0, help="idle /api/stream connections held open during server runs")
+    parser.add_argument('--gunicorn-workers', type=int, default=1)
+    parser.add_argument('--gunicorn-threads', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--keep-db', action='store_true', help="keep the seeded database directory")
+    parser.add_argument('--output', help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='chore-chart-bench-')
+    db_path = os.path.join(workdir, 'chore_chart.db')
+    os.environ['CHORE_CHART_DB'] = db_path
+    os.environ.pop('HOUSEHOLDS_DIR', None)  # benchmark the single-database layout
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app as app_module
+    try:
+        started = time.perf_counter()
+        dataset = seed_database(app_module, args.kids, args.chores, args.assignments_per_kid, args.years, args.seed)
+        seed_seconds = time.perf_counter() - started
+        # A pristine copy so the server runs start from the same data as the test-client run.
+        shutil.copyfile(db_path, db_path + '.seeded')
+        report = {"config": vars(args), "dataset": dict(dataset, seed_seconds=round(seed_seconds, 2)),
+                  "python": sys.version.split()[0], "sqlite": app_module.sqlite3.sqlite_version, "results": {}}
+        if args.mode in ('client', 'both', 'all'):
+            report["results"]["test_client"] = bench_test_client(app_module, args.requests)
+        if args.mode != 'client':
+            with app_module.app.app_context(): app_module.get_pool().close_all()
+        if args.mode in ('gunicorn', 'both', 'all'):
+            gunicorn_db = os.path.join(workdir, 'gunicorn.db')
+            shutil.copyfile(db_path + '.seeded', gunicorn_db)
+            report["results"]["gunicorn"] = bench_gunicorn(gunicorn_db, args.requests, args.concurrency, args.gunicorn_workers,
+                                                           args.gunicorn_threads, args.idle_streams)
+        if args.mode in ('uvicorn', 'all'):
+            uvicorn_db = os.path.join(workdir, 'uvicorn.db')
+            shutil.copyfile(db_path + '.seeded', uvicorn_db)
+            report["results"]["uvicorn"] = bench_uvicorn(uvicorn_db, args.requests, args.concurrency, args.idle_streams)
+    finally:
+        if not args.keep_db: shutil.rmtree(workdir, ignore_errors=True)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f: f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
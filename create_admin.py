@@ -6,7 +6,13 @@ from flask_bcrypt import Bcrypt
 # Ensure this matches the path in your app.py
 DATABASE_SUBDIR = 'data'
 DATABASE_FILENAME = 'chore_chart.db'
-DATABASE = os.path.join(DATABASE_SUBDIR, DATABASE_FILENAME)
+DATABASE = os.environ.get('CHORE_CHART_DB', os.path.join(DATABASE_SUBDIR, DATABASE_FILENAME))
+# In multi-household mode, name the household instead: HOUSEHOLDS_DIR=... CHORE_CHART_HOUSEHOLD=<slug>
+if os.environ.get('HOUSEHOLDS_DIR') and os.environ.get('CHORE_CHART_HOUSEHOLD'):
+    DATABASE = os.path.join(os.environ['HOUSEHOLDS_DIR'], os.environ['CHORE_CHART_HOUSEHOLD'] + '.db')
+DATABASE_SUBDIR = os.path.dirname(DATABASE) or '.'
+# Same bcrypt work factor as app.py
+BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
 
 def create_admin_user():
     print("--- Create Admin User ---")
@@ -40,7 +46,7 @@ def create_admin_user():
         return
 
     bcrypt = Bcrypt()
-    password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+    password_hash = bcrypt.generate_password_hash(password, BCRYPT_LOG_ROUNDS).decode('utf-8')
 
     try:
         conn = sqlite3.connect(DATABASE)
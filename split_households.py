@@ -0,0 +1,75 @@
+"""Splits one chore chart database into per-household files for HOUSEHOLDS_DIR.
+
+The mapping file names which admin users and kids belong to each household:
+
+    {"smith": {"users": ["alice"], "kids": ["Sam", "Ella"]},
+     "jones": {"users": ["bob"], "kids": ["Max"]}}
+
+Every household starts as a full copy of the source (including the chore catalogue); users and
+kids of other households are then deleted, and the foreign keys cascade to their assignments,
+completions, stars, summaries and statistics.
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+
+HOUSEHOLD_SLUG = re.compile(r"^[a-z0-9][a-z0-9-]{0,62}$")
+
+
+def placeholders(values):
+    return ", ".join("?" * len(values))
+
+
+def split_household(source, target_path, usernames, kid_names):
+    if os.path.exists(target_path): raise SystemExit(f"{target_path} already exists; refusing to overwrite it.")
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+        target.execute("PRAGMA foreign_keys = ON")
+        with target:
+            users = target.execute(f"DELETE FROM users WHERE username NOT IN ({placeholders(usernames)})", usernames).rowcount
+            kids = target.execute(f"DELETE FROM kids WHERE name NOT IN ({placeholders(kid_names)})", kid_names).rowcount
+        target.execute("VACUUM")
+        kept = target.execute("SELECT (SELECT COUNT(*) FROM users), (SELECT COUNT(*) FROM kids)").fetchone()
+    finally:
+        target.close()
+    return kept, (users, kids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', help="existing single-household database")
+    parser.add_argument('mapping', help="JSON file mapping household slugs to their users and kids")
+    parser.add_argument('households_dir', help="directory to write <slug>.db files into (HOUSEHOLDS_DIR)")
+    args = parser.parse_args()
+
+    with open(args.mapping) as f: mapping = json.load(f)
+    bad = [slug for slug in mapping if not HOUSEHOLD_SLUG.match(slug)]
+    if bad: raise SystemExit(f"Invalid household slug(s): {', '.join(bad)} (use lowercase letters, digits and dashes)")
+
+    source = sqlite3.connect(f"file:{args.source}?mode=ro", uri=True)
+    all_users = {row[0] for row in source.execute("SELECT username FROM users")}
+    all_kids = {row[0] for row in source.execute("SELECT name FROM kids")}
+    claimed_users, claimed_kids = set(), set()
+    for slug, members in mapping.items():
+        users, kids = set(members.get('users', [])), set(members.get('kids', []))
+        if users - all_users: raise SystemExit(f"{slug}: unknown user(s) {', '.join(sorted(users - all_users))}")
+        if kids - all_kids: raise SystemExit(f"{slug}: unknown kid(s) {', '.join(sorted(kids - all_kids))}")
+        if users & claimed_users or kids & claimed_kids: raise SystemExit(f"{slug}: users and kids may belong to only one household")
+        claimed_users |= users; claimed_kids |= kids
+    for name in sorted(all_kids - claimed_kids): print(f"Warning: kid '{name}' is not in any household and will be dropped.", file=sys.stderr)
+    for name in sorted(all_users - claimed_users): print(f"Warning: user '{name}' is not in any household and will be dropped.", file=sys.stderr)
+
+    os.makedirs(args.households_dir, exist_ok=True)
+    for slug, members in mapping.items():
+        target_path = os.path.join(args.households_dir, f"{slug}.db")
+        (users, kids), _ = split_household(source, target_path, list(members.get('users', [])), list(members.get('kids', [])))
+        print(f"{slug}: {users} user(s), {kids} kid(s) -> {target_path}")
+    source.close()
+
+
+if __name__ == '__main__':
+    main()
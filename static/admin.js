@@ -0,0 +1,175 @@
+// Mount point of the app ('' or /h/<household>), from <body data-root> in the page shell.
+const APP_ROOT = document.body.dataset.root;
+
+// --- DOM Elements (Admin-specific) ---
+const newKidNameInput = document.getElementById('newKidName');
+const adminKidListDiv = document.getElementById('adminKidList');
+const addMasterChoreButton = document.getElementById('addMasterChoreButton');
+const addKidButton = document.getElementById('addKidButton');
+const newKidTrainTrackLengthInput = document.getElementById('newKidTrainTrackLength');
+const newChoreNameInput = document.getElementById('newChoreName');
+const newChoreIconSelect = document.getElementById('newChoreIconSelect');
+const newChoreIconManual = document.getElementById('newChoreIconManual');
+const masterChoreListDisplay = document.getElementById('masterChoreListDisplay');
+const assignKidSelect = document.getElementById('assignKidSelect');
+const assignChoreSelect = document.getElementById('assignChoreSelect');
+const assignFrequencySelect = document.getElementById('assignFrequencySelect');
+const assignTimeframeSelect = document.getElementById('assignTimeframeSelect');
+const assignChoreButton = document.getElementById('assignChoreButton');
+const currentAssignmentsList = document.getElementById('currentAssignmentsList');
+const bonusKidSelect = document.getElementById('bonusKidSelect');
+const bonusReasonInput = document.getElementById('bonusReason');
+const awardBonusStarButton = document.getElementById('awardBonusStarButton');
+const messageModal = document.getElementById('messageModal');
+const modalMessageText = document.getElementById('modalMessageText');
+const modalCloseButton = document.getElementById('modalCloseButton');
+const editAssignmentModal = document.getElementById('editAssignmentModal');
+const editingAssignmentIdInput = document.getElementById('editingAssignmentId');
+const editAssignmentFrequencySelect = document.getElementById('editAssignmentFrequencySelect');
+const editAssignmentTimeframeSelect = document.getElementById('editAssignmentTimeframeSelect');
+const editAssignmentCancelButton = document.getElementById('editAssignmentCancelButton');
+const editAssignmentSaveButton = document.getElementById('editAssignmentSaveButton');
+
+let masterChoresDataCache = [];
+const DEFAULT_CHORE_ICONS = [
+    { name: "Make Bed", icon: "🛏️" }, { name: "Feed Dog", icon: "🐕" },
+    { name: "Brush Teeth", icon: "🦷" }, { name: "Get Dressed", icon: "👕" },
+    { name: "Clean Room", icon: "🧹" }, { name: "Eat Breakfast", icon: "🥣" },
+    { name: "Homework", icon: "📚" }, { name: "Set Table", icon: "🍽️" },
+    { name: "Clear Table", icon: "🍽️" }, { name: "Tidy Toys", icon: "🧸" }, 
+    { name: "Read Book", icon: "📖" }, { name: "Water Plants", icon: "🪴" },
+    { name: "-- Manual Icon --", icon: "" } 
+];
+
+async function apiCall(endpoint, method = 'GET', body = null) {
+    const headers = { 'Content-Type': 'application/json' };
+    const options = { method, headers };
+    if (body) options.body = JSON.stringify(body);
+    try {
+        const response = await fetch(`${APP_ROOT}/api${endpoint}`, options);
+        const responseData = response.status === 204 ? true : await response.json().catch(() => null);
+        if (!response.ok) {
+            const errorMsg = responseData?.error || `Request failed: ${response.status}`;
+            showModal(errorMsg);
+            if (response.status === 401) {
+                 window.location.href = `${APP_ROOT}/login`; // Redirect to login on auth error
+            }
+            return null;
+        }
+        return responseData;
+    } catch (error) {
+        showModal('Network error or server unavailable.');
+        return null;
+    }
+}
+
+function showModal(message) { modalMessageText.textContent = message; messageModal.classList.add('active'); }
+function hideModal() { messageModal.classList.remove('active'); }
+function showEditAssignmentModal(assignmentId, currentFrequency, currentTimeframe) {
+    editingAssignmentIdInput.value = assignmentId;
+    editAssignmentFrequencySelect.value = currentFrequency;
+    editAssignmentTimeframeSelect.value = currentTimeframe;
+    editAssignmentModal.classList.add('active');
+}
+function hideEditAssignmentModal() { editAssignmentModal.classList.remove('active'); }
+
+function populateDefaultChoreIcons() {
+    newChoreIconSelect.innerHTML = '<option value="">-- Quick Icon --</option>'; 
+    DEFAULT_CHORE_ICONS.forEach(item => {
+        const option = document.createElement('option');
+        option.value = item.icon;
+        option.textContent = `${item.icon} ${item.name}`;
+        newChoreIconSelect.appendChild(option);
+    });
+}
+
+newChoreIconSelect.addEventListener('change', () => {
+    const selectedValue = newChoreIconSelect.value;
+    if (selectedValue) { 
+        newChoreIconManual.value = selectedValue; 
+        const selectedChore = DEFAULT_CHORE_ICONS.find(c => c.icon === selectedValue);
+        if (selectedChore && selectedChore.name !== "-- Manual Icon --" && !newChoreNameInput.value) {
+            newChoreNameInput.value = selectedChore.name;
+        }
+    } 
+});
+
+async function loadAndRenderAdminView() {
+    const kids = await apiCall('/kids');
+    masterChoresDataCache = await apiCall('/chores-master') || []; 
+    const assignments = await apiCall('/assignments');
+    if (!kids || !masterChoresDataCache || !assignments) return;
+    const adminKidListDiv = document.getElementById('adminKidList');
+    adminKidListDiv.innerHTML = '';
+    let kidOptionsHTML = '<option value="all">All Kids</option>';
+    kids.forEach(kid => {
+        const kidItem = document.createElement('div');
+        kidItem.className = 'p-3 bg-slate-100 rounded-lg shadow-sm space-y-2 kid-admin-item';
+        kidItem.dataset.kidId = kid.id;
+        kidItem.dataset.originalName = kid.name;
+        kidItem.dataset.originalTrackLength = kid.train_track_length;
+        
+        kidItem.innerHTML = `
+            <div class="kid-display-mode">
+                <div class="flex justify-between items-center">
+                    <span class="font-semibold text-md sm:text-lg kid-name-display">${kid.name || 'N/A'}</span>
+                    <span class="text-xs sm:text-sm">⭐ ${kid.stars_count || 0} | 🎈 ${kid.balloons || 0} | 🚂 Laps: ${kid.train_laps_completed || 0} (Track: <span class="kid-track-length-display">${kid.train_track_length || 10}</span>)</span>
+                </div>
+                <div class="flex flex-wrap gap-2 items-center mt-1">
+                     <button class="admin-edit-kid-btn px-2 py-1.5 text-xs sm:text-sm bg-blue-500 hover:bg-blue-600 text-white rounded-md">Edit Kid</button>
+                     <button class="admin-delete-kid-btn px-2 py-1.5 text-xs sm:text-sm bg-red-700 hover:bg-red-800 text-white rounded-md" data-kid-id="${kid.id}" data-kid-name="${kid.name || 'this kid'}">Delete Kid</button>
+                </div>
+                 <div class="grid grid-cols-3 gap-2 mt-1">
+                    <button class="admin-reset-chores-btn px-2 py-1.5 text-xs sm:text-sm bg-red-500 hover:bg-red-600 text-white rounded-md" data-kid-id="${kid.id}">Reset Day</button>
+                    <button class="admin-decrement-balloons-btn px-2 py-1.5 text-xs sm:text-sm bg-rose-500 hover:bg-rose-600 text-white rounded-md" data-kid-id="${kid.id}">-1 🎈</button>
+                    <button class="admin-decrement-stars-btn px-2 py-1.5 text-xs sm:text-sm bg-purple-500 hover:bg-purple-600 text-white rounded-md" data-kid-id="${kid.id}">-1 ⭐</button>
+                </div>
+            </div>
+            <div class="kid-edit-mode hidden space-y-2">
+                <input type="text" value="${kid.name || ''}" class="edit-kid-name-input p-2 border rounded-lg w-full shadow-sm text-sm sm:text-base">
+                <input type="number" value="${kid.train_track_length || 10}" min="1" class="edit-kid-track-input p-2 border rounded-lg w-full shadow-sm text-sm sm:text-base">
+                <div class="flex gap-2">
+                    <button class="admin-save-kid-btn px-3 py-1.5 text-xs sm:text-sm bg-green-500 hover:bg-green-600 text-white rounded-md">Save</button>
+                    <button class="admin-cancel-edit-kid-btn px-3 py-1.5 text-xs sm:text-sm bg-slate-400 hover:bg-slate-500 text-white rounded-md">Cancel</button>
+                </div>
+            </div>
+        `;
+        adminKidListDiv.appendChild(kidItem);
+        kidOptionsHTML += `<option value="${kid.id}">${kid.name || 'N/A'}</option>`;
+    });
+    assignKidSelect.innerHTML = kidOptionsHTML;
+    bonusKidSelect.innerHTML = kids.map(k => `<option value="${k.id}">${k.name || 'N/A'}</option>`).join('');
+
+    masterChoreListDisplay.innerHTML = '';
+    let choreOptionsHTML = '';
+    masterChoresDataCache.forEach(chore => {
+        const choreItem = document.createElement('li');
+        choreItem.className = 'p-1.5 bg-slate-50 rounded border border-slate-200 flex justify-between items-center chore-master-item';
+        choreItem.dataset.choreId = chore.id;
+        choreItem.dataset.originalName = chore.name;
+        choreItem.dataset.originalIcon = chore.icon || ''; 
+        choreItem.innerHTML = `
+            <div class="chore-master-display-mode">
+                <span>${chore.icon || '🔧'} ${chore.name || 'N/A'}</span>
+                <button class="admin-edit-master-chore-btn ml-2 px-2 py-1 text-xs bg-blue-500 hover:bg-blue-600 text-white rounded-md">Edit</button>
+            </div>
+            <div class="chore-master-edit-mode hidden flex-grow items-center gap-2">
+                <input type="text" value="${chore.name || ''}" class="edit-master-chore-name-input p-1 border rounded-md flex-grow text-sm">
+                <input type="text" value="${chore.icon || ''}" class="edit-master-chore-icon-input p-1 border rounded-md w-16 text-sm">
+                <button class="admin-save-master-chore-btn px-2 py-1 text-xs bg-green-500 text-white rounded-md">Save</button>
+                <button class="admin-cancel-edit-master-chore-btn px-2 py-1 text-xs bg-slate-400 text-white rounded-md">Cancel</button>
+            </div>
+        `;
+        masterChoreListDisplay.appendChild(choreItem);
+        choreOptionsHTML += `<option value="${chore.id}">${chore.name || 'N/A'}</option>`;
+    });
+    assignChoreSelect.innerHTML = choreOptionsHTML;
+    
+    renderCurrentAssignments(assignments);
+}
+function renderCurrentAssignments(assignmentsData) {  }
+
+document.addEventListener('DOMContentLoaded', () => {
+    populateDefaultChoreIcons();
+    loadAndRenderAdminView();
+});
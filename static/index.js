@@ -0,0 +1,624 @@
+// Mount point of the app ('' or /h/<household>), from <body data-root> in the page shell.
+const APP_ROOT = document.body.dataset.root;
+
+// --- DOM Elements ---
+const adminModeButton = document.getElementById('adminModeButton');
+const kidSelectionButton = document.getElementById('kidSelectionButton');
+const kidSelectionView = document.getElementById('kidSelectionView');
+const kidChoresView = document.getElementById('kidChoresView');
+const adminView = document.getElementById('adminView');
+const kidListDiv = document.getElementById('kidList');
+const noKidsMessage = document.getElementById('noKidsMessage');
+const kidChoresAvatar = document.getElementById('kidChoresAvatar');
+const kidNameDisplay = document.getElementById('kidNameDisplay');
+const kidStarsDisplay = document.getElementById('kidStarsDisplay');
+const kidBalloonsDisplay = document.getElementById('kidBalloonsDisplay');
+const currentDateDisplay = document.getElementById('currentDateDisplay');
+// Routine sections
+const morningRoutineSection = document.getElementById('morningRoutineSection');
+const anytimeRoutineSection = document.getElementById('anytimeRoutineSection');
+const nightRoutineSection = document.getElementById('nightRoutineSection');
+const morningChoresList = document.getElementById('morningChoresList');
+const anytimeChoresList = document.getElementById('anytimeChoresList');
+const nightChoresList = document.getElementById('nightChoresList');
+const allChoresDoneMessage = document.getElementById('allChoresDoneMessage');
+const newKidNameInput = document.getElementById('newKidName');
+const newKidTrainTrackLengthInput = document.getElementById('newKidTrainTrackLength');
+const addKidButton = document.getElementById('addKidButton');
+const adminKidListDiv = document.getElementById('adminKidList');
+const newChoreNameInput = document.getElementById('newChoreName');
+const newChoreIconSelect = document.getElementById('newChoreIconSelect');
+const newChoreIconManual = document.getElementById('newChoreIconManual');
+const addMasterChoreButton = document.getElementById('addMasterChoreButton');
+const masterChoreListDisplay = document.getElementById('masterChoreListDisplay');
+const assignKidSelect = document.getElementById('assignKidSelect');
+const assignChoreSelect = document.getElementById('assignChoreSelect');
+const assignFrequencySelect = document.getElementById('assignFrequencySelect');
+const assignTimeframeSelect = document.getElementById('assignTimeframeSelect'); // New
+const assignChoreButton = document.getElementById('assignChoreButton');
+const currentAssignmentsList = document.getElementById('currentAssignmentsList');
+const bonusKidSelect = document.getElementById('bonusKidSelect');
+const bonusReasonInput = document.getElementById('bonusReason');
+const awardBonusStarButton = document.getElementById('awardBonusStarButton');
+const messageModal = document.getElementById('messageModal');
+const modalMessageText = document.getElementById('modalMessageText');
+const modalCloseButton = document.getElementById('modalCloseButton');
+const adminLoginModal = document.getElementById('adminLoginModal');
+const adminPasswordInput = document.getElementById('adminPasswordInput');
+const adminLoginSubmitButton = document.getElementById('adminLoginSubmitButton');
+const adminLoginCancelButton = document.getElementById('adminLoginCancelButton');
+const editAssignmentModal = document.getElementById('editAssignmentModal');
+const editingAssignmentIdInput = document.getElementById('editingAssignmentId');
+const editAssignmentFrequencySelect = document.getElementById('editAssignmentFrequencySelect');
+const editAssignmentTimeframeSelect = document.getElementById('editAssignmentTimeframeSelect'); // New
+const editAssignmentCancelButton = document.getElementById('editAssignmentCancelButton');
+const editAssignmentSaveButton = document.getElementById('editAssignmentSaveButton');
+
+
+// --- State ---
+let currentKidId = null;
+let currentView = 'kidSelection';
+let adminPassword = null; 
+const KID_AVATAR_COLORS = ['bg-pink-500', 'bg-indigo-500', 'bg-emerald-500', 'bg-purple-500', 'bg-orange-500'];
+let masterChoresDataCache = []; 
+
+const DEFAULT_CHORE_ICONS = [
+    { name: "Make Bed", icon: "🛏️" }, { name: "Feed Dog", icon: "🐕" },
+    { name: "Brush Teeth", icon: "🦷" }, { name: "Get Dressed", icon: "👕" },
+    { name: "Clean Room", icon: "🧹" }, { name: "Eat Breakfast", icon: "🥣" },
+    { name: "Homework", icon: "📚" }, { name: "Set Table", icon: "🍽️" },
+    { name: "Clear Table", icon: "🍽️" }, { name: "Tidy Toys", icon: "🧸" }, 
+    { name: "Read Book", icon: "📖" }, { name: "Water Plants", icon: "🪴" },
+    { name: "-- Manual Icon --", icon: "" } 
+];
+
+// --- API Helper ---
+async function apiCall(endpoint, method = 'GET', body = null, requiresAdmin = false) {
+    console.log(`API Call: ${method} ${endpoint}`, body); 
+    const headers = { 'Content-Type': 'application/json' };
+    if (requiresAdmin && adminPassword) {
+        headers['X-Admin-Password'] = adminPassword;
+    }
+    const options = { method, headers };
+    if (body) options.body = JSON.stringify(body);
+    try {
+        const response = await fetch(`${APP_ROOT}/api${endpoint}`, options);
+        const responseData = response.status === 204 ? true : await response.json().catch(() => null); 
+        console.log(`API Response for ${method} ${endpoint}:`, { status: response.status, ok: response.ok, data: responseData }); 
+
+        if (!response.ok) {
+            const errorMsg = responseData?.error || `Request failed: ${response.status}`;
+            console.error('API Error:', errorMsg, response.status);
+            showModal(errorMsg);
+            if (response.status === 401 && requiresAdmin) {
+                adminPassword = null; switchView('kidSelection'); showAdminLogin();
+            }
+            return null;
+        }
+        return responseData;
+    } catch (error) {
+        console.error('Fetch Error for ' + endpoint + ':', error); 
+        showModal('Network error or server unavailable.');
+        return null;
+    }
+}
+
+// --- Modal Functions ---
+function showModal(message) { modalMessageText.textContent = message; messageModal.classList.add('active'); }
+function hideModal() { messageModal.classList.remove('active'); }
+function showAdminLogin() { adminPasswordInput.value = ''; adminLoginModal.classList.add('active'); }
+function hideAdminLogin() { adminLoginModal.classList.remove('active'); }
+function showEditAssignmentModal(assignmentId, currentFrequency, currentTimeframe) {
+    editingAssignmentIdInput.value = assignmentId;
+    editAssignmentFrequencySelect.value = currentFrequency;
+    editAssignmentTimeframeSelect.value = currentTimeframe;
+    editAssignmentModal.classList.add('active');
+}
+function hideEditAssignmentModal() {
+    editAssignmentModal.classList.remove('active');
+}
+
+
+// --- View Switching ---
+function switchView(viewName) {
+    console.log("Switching view to:", viewName); 
+    currentView = viewName;
+    [kidSelectionView, kidChoresView, adminView].forEach(v => v.classList.add('hidden'));
+    kidSelectionButton.classList.add('hidden');
+    adminModeButton.classList.remove('hidden');
+    if (viewName === 'kidSelection') {
+        kidSelectionView.classList.remove('hidden'); loadAndRenderKidSelectionView();
+    } else if (viewName === 'kidChores') {
+        kidChoresView.classList.remove('hidden'); kidSelectionButton.classList.remove('hidden');
+        loadAndRenderKidChoresView(currentKidId);
+    } else if (viewName === 'admin') {
+        if (!adminPassword) { showAdminLogin(); return; }
+        adminView.classList.remove('hidden'); kidSelectionButton.classList.remove('hidden');
+        adminModeButton.classList.add('hidden'); loadAndRenderAdminView();
+    }
+}
+
+function triggerBalloonAnimation(element) { /* ... (same as before) */ }
+
+function renderTrainTrack(kid) { /* ... (same as before) */ }
+
+function populateDefaultChoreIcons() {
+    newChoreIconSelect.innerHTML = '<option value="">-- Quick Icon --</option>'; 
+    DEFAULT_CHORE_ICONS.forEach(item => {
+        const option = document.createElement('option');
+        option.value = item.icon;
+        option.textContent = `${item.icon} ${item.name}`;
+        newChoreIconSelect.appendChild(option);
+    });
+}
+
+newChoreIconSelect.addEventListener('change', () => {
+    const selectedValue = newChoreIconSelect.value;
+    if (selectedValue) { 
+        newChoreIconManual.value = selectedValue; 
+        const selectedChore = DEFAULT_CHORE_ICONS.find(c => c.icon === selectedValue);
+        if (selectedChore && selectedChore.name !== "-- Manual Icon --" && !newChoreNameInput.value) {
+            newChoreNameInput.value = selectedChore.name;
+        }
+    } 
+});
+
+
+// --- Rendering Functions ---
+async function loadAndRenderKidSelectionView() { /* ... (same as before) */ }
+
+async function loadAndRenderKidChoresView(kidId) { 
+    console.log("loadAndRenderKidChoresView for kidId:", kidId); 
+    if (!kidId) { switchView('kidSelection'); return; }
+    const data = await apiCall(`/kids/${kidId}/chores-today`);
+    if (!data || !data.kid_info) { 
+        console.error("Failed to load kid chore data or kid_info missing for kidId:", kidId); 
+        switchView('kidSelection'); return; 
+    }
+    const { kid_info, chores, current_timeframe } = data;
+    console.log("Kid chore data:", data); 
+
+    kidNameDisplay.textContent = kid_info.name || 'Kid';
+    const avatarColor = kid_info.avatar_color || 'bg-pink-500';
+    kidChoresAvatar.className = `kid-avatar ${avatarColor} mr-3 sm:mr-4`;
+    kidChoresAvatar.textContent = kid_info.name ? kid_info.name.charAt(0).toUpperCase() : '?';
+    kidStarsDisplay.innerHTML = `⭐ ${kid_info.stars_count || 0} Star${(kid_info.stars_count || 0) === 1 ? '' : 's'}`;
+    kidBalloonsDisplay.innerHTML = `🎈 ${kid_info.balloons || 0} Balloon${(kid_info.balloons || 0) === 1 ? '' : 's'}`;
+    
+    // Function to render a list of chores into a target element
+    const renderChoreList = (targetElement, choreList) => {
+        targetElement.innerHTML = '';
+        if (!choreList || choreList.length === 0) {
+            targetElement.closest('.routine-section').querySelector('.no-chores-message').classList.remove('hidden');
+            return;
+        }
+        targetElement.closest('.routine-section').querySelector('.no-chores-message').classList.add('hidden');
+        
+        choreList.forEach(chore => {
+            const isCompleted = chore.completed_today;
+            const choreDiv = document.createElement('div');
+            choreDiv.className = `chore-item flex items-center justify-between p-3 sm:p-4 bg-slate-100 rounded-lg shadow ${isCompleted ? 'completed' : ''}`;
+            choreDiv.innerHTML = `
+                <div class="flex items-center">
+                    <span class="text-xl sm:text-2xl mr-2 sm:mr-3">${chore.chore_icon || '🔧'}</span>
+                    <span class="text-slate-700 text-sm sm:text-base">${chore.chore_name || 'Unnamed Chore'}</span>
+                </div>
+                <button data-assignment-id="${chore.assignment_id}" data-chore-id="${chore.chore_id}" 
+                        class="chore-action-btn px-3 py-1.5 sm:px-4 sm:py-2 rounded-lg text-white transition-colors text-xs sm:text-sm
+                               ${isCompleted ? 'bg-orange-500 hover:bg-orange-600' : 'bg-green-500 hover:bg-green-600'}">
+                    ${isCompleted ? 'Undo' : 'Mark Done'}
+                </button>
+            `;
+            targetElement.appendChild(choreDiv);
+        });
+    };
+
+    renderChoreList(morningChoresList, chores.morning);
+    renderChoreList(anytimeChoresList, chores.any);
+    renderChoreList(nightChoresList, chores.night);
+
+    // Highlight active timeframe
+    morningRoutineSection.classList.toggle('inactive', current_timeframe !== 'morning');
+    nightRoutineSection.classList.toggle('inactive', current_timeframe !== 'night');
+    // Anytime is never inactive
+    anytimeRoutineSection.classList.remove('inactive');
+
+    // Check if all chores for the entire day are done
+    const allChores = [...(chores.morning || []), ...(chores.any || []), ...(chores.night || [])];
+    if (allChores.length > 0 && allChores.every(c => c.completed_today)) {
+        allChoresDoneMessage.classList.remove('hidden');
+    } else {
+        allChoresDoneMessage.classList.add('hidden');
+    }
+}
+
+async function loadAndRenderAdminView() { 
+    console.log("loadAndRenderAdminView called"); 
+    const kids = await apiCall('/kids', 'GET', null, true);
+    masterChoresDataCache = await apiCall('/chores-master', 'GET', null, true) || []; 
+    const assignments = await apiCall('/assignments', 'GET', null, true);
+    
+    console.log("Admin data:", { kids, masterChores: masterChoresDataCache, assignments }); 
+
+    if (!kids || !masterChoresDataCache || !assignments) {
+        console.error("Failed to load all necessary admin data."); 
+        return;
+    }
+    
+    adminKidListDiv.innerHTML = '';
+    let kidOptionsHTML = '<option value="all">All Kids</option>';
+    kids.forEach(kid => {
+        const kidItem = document.createElement('div');
+        kidItem.className = 'p-3 bg-slate-100 rounded-lg shadow-sm space-y-2 kid-admin-item';
+        kidItem.dataset.kidId = kid.id;
+        kidItem.dataset.originalName = kid.name;
+        kidItem.dataset.originalTrackLength = kid.train_track_length;
+        
+        kidItem.innerHTML = `
+            <div class="kid-display-mode">
+                <div class="flex justify-between items-center">
+                    <span class="font-semibold text-md sm:text-lg kid-name-display">${kid.name || 'N/A'}</span>
+                    <span class="text-xs sm:text-sm">⭐ ${kid.stars_count || 0} | 🎈 ${kid.balloons || 0} | 🚂 Laps: ${kid.train_laps_completed || 0} (Track: <span class="kid-track-length-display">${kid.train_track_length || 10}</span>)</span>
+                </div>
+                <div class="flex flex-wrap gap-2 items-center mt-1">
+                     <button class="admin-edit-kid-btn px-2 py-1.5 text-xs sm:text-sm bg-blue-500 hover:bg-blue-600 text-white rounded-md">Edit Kid</button>
+                     <button class="admin-delete-kid-btn px-2 py-1.5 text-xs sm:text-sm bg-red-700 hover:bg-red-800 text-white rounded-md" data-kid-id="${kid.id}" data-kid-name="${kid.name || 'this kid'}">Delete Kid</button>
+                </div>
+                 <div class="grid grid-cols-3 gap-2 mt-1">
+                    <button class="admin-reset-chores-btn px-2 py-1.5 text-xs sm:text-sm bg-red-500 hover:bg-red-600 text-white rounded-md" data-kid-id="${kid.id}">Reset Day</button>
+                    <button class="admin-decrement-balloons-btn px-2 py-1.5 text-xs sm:text-sm bg-rose-500 hover:bg-rose-600 text-white rounded-md" data-kid-id="${kid.id}">-1 🎈</button>
+                    <button class="admin-decrement-stars-btn px-2 py-1.5 text-xs sm:text-sm bg-purple-500 hover:bg-purple-600 text-white rounded-md" data-kid-id="${kid.id}">-1 ⭐</button>
+                </div>
+            </div>
+            <div class="kid-edit-mode hidden space-y-2">
+                <input type="text" value="${kid.name || ''}" class="edit-kid-name-input p-2 border rounded-lg w-full shadow-sm text-sm sm:text-base">
+                <input type="number" value="${kid.train_track_length || 10}" min="1" class="edit-kid-track-input p-2 border rounded-lg w-full shadow-sm text-sm sm:text-base">
+                <div class="flex gap-2">
+                    <button class="admin-save-kid-btn px-3 py-1.5 text-xs sm:text-sm bg-green-500 hover:bg-green-600 text-white rounded-md">Save</button>
+                    <button class="admin-cancel-edit-kid-btn px-3 py-1.5 text-xs sm:text-sm bg-slate-400 hover:bg-slate-500 text-white rounded-md">Cancel</button>
+                </div>
+            </div>
+        `;
+        adminKidListDiv.appendChild(kidItem);
+        kidOptionsHTML += `<option value="${kid.id}">${kid.name || 'N/A'}</option>`;
+    });
+    assignKidSelect.innerHTML = kidOptionsHTML;
+    bonusKidSelect.innerHTML = kids.map(k => `<option value="${k.id}">${k.name || 'N/A'}</option>`).join('');
+
+    masterChoreListDisplay.innerHTML = '';
+    let choreOptionsHTML = '';
+    masterChoresDataCache.forEach(chore => {
+        const choreItem = document.createElement('li');
+        choreItem.className = 'p-1.5 bg-slate-50 rounded border border-slate-200 flex justify-between items-center chore-master-item';
+        choreItem.dataset.choreId = chore.id;
+        choreItem.dataset.originalName = chore.name;
+        choreItem.dataset.originalIcon = chore.icon || ''; 
+        choreItem.innerHTML = `
+            <div class="chore-master-display-mode">
+                <span>${chore.icon || '🔧'} ${chore.name || 'N/A'}</span>
+                <button class="admin-edit-master-chore-btn ml-2 px-2 py-1 text-xs bg-blue-500 hover:bg-blue-600 text-white rounded-md">Edit</button>
+            </div>
+            <div class="chore-master-edit-mode hidden flex-grow items-center gap-2">
+                <input type="text" value="${chore.name || ''}" class="edit-master-chore-name-input p-1 border rounded-md flex-grow text-sm">
+                <input type="text" value="${chore.icon || ''}" class="edit-master-chore-icon-input p-1 border rounded-md w-16 text-sm">
+                <button class="admin-save-master-chore-btn px-2 py-1 text-xs bg-green-500 text-white rounded-md">Save</button>
+                <button class="admin-cancel-edit-master-chore-btn px-2 py-1 text-xs bg-slate-400 text-white rounded-md">Cancel</button>
+            </div>
+        `;
+        masterChoreListDisplay.appendChild(choreItem);
+        choreOptionsHTML += `<option value="${chore.id}">${chore.name || 'N/A'}</option>`;
+    });
+    assignChoreSelect.innerHTML = choreOptionsHTML;
+    
+    renderCurrentAssignments(assignments);
+}
+
+function renderCurrentAssignments(assignmentsData) { 
+    currentAssignmentsList.innerHTML = '';
+    if (!assignmentsData || assignmentsData.length === 0) {
+        currentAssignmentsList.innerHTML = '<p class="text-slate-500">No chores assigned yet.</p>'; return;
+    }
+    assignmentsData.forEach(assignment => {
+        const div = document.createElement('div');
+        const isActive = assignment.is_active;
+        div.className = `p-1.5 sm:p-2 bg-slate-50 rounded border border-slate-200 flex flex-col sm:flex-row justify-between items-start sm:items-center ${!isActive ? 'opacity-50' : ''}`;
+        div.innerHTML = `
+            <div>
+                <span><strong>${assignment.kid_name || 'N/A'}</strong> - ${assignment.chore_name || 'N/A'}</span>
+                <span class="block sm:inline sm:ml-2 text-slate-600 text-xs">(${assignment.frequency || 'N/A'} / ${assignment.timeframe || 'any'}) ${!isActive ? '[DISABLED]' : ''}</span>
+            </div>
+            <div class="flex gap-1 sm:gap-2 mt-1 sm:mt-0">
+                <button data-assignment-id="${assignment.id}" data-current-frequency="${assignment.frequency}" data-current-timeframe="${assignment.timeframe}" class="admin-edit-assignment-btn px-2 py-1 text-xs bg-sky-500 hover:bg-sky-600 text-white rounded-md">Edit</button>
+                <button data-assignment-id="${assignment.id}" class="admin-toggle-assignment-active-btn px-2 py-1 text-xs ${isActive ? 'bg-yellow-500 hover:bg-yellow-600' : 'bg-green-500 hover:bg-green-600'} text-white rounded-md">${isActive ? 'Disable' : 'Enable'}</button>
+                <button data-assignment-id="${assignment.id}" class="remove-assignment-btn px-2 py-1 text-xs bg-red-500 hover:bg-red-600 text-white rounded-md">Remove</button>
+            </div>
+        `;
+        currentAssignmentsList.appendChild(div);
+    });
+}
+function renderTrainTrack(kid) {
+    const container = document.createElement('div');
+    container.className = 'train-track-container';
+    const trackLength = kid.train_track_length || 10; 
+    const currentStars = kid.stars_count || 0; 
+    const trainPosition = trackLength > 0 ? currentStars % trackLength : 0;
+
+    for (let i = 0; i < trackLength; i++) {
+        const segment = document.createElement('div');
+        segment.className = 'track-segment';
+        if (i === trainPosition) {
+            segment.classList.add('active');
+            segment.innerHTML = '<span class="train-icon">🚂</span>';
+        } else {
+            segment.classList.add('empty');
+        }
+        container.appendChild(segment);
+    }
+    const lapsDisplay = document.createElement('span');
+    lapsDisplay.className = 'laps-display';
+    lapsDisplay.textContent = `Laps: ${kid.train_laps_completed || 0}`; 
+    container.appendChild(lapsDisplay);
+    return container;
+}
+
+
+// --- Event Handlers ---
+adminLoginSubmitButton.onclick = async () => {
+    const passwordAttempt = adminPasswordInput.value;
+    if (!passwordAttempt) { showModal("Please enter the admin password."); return; }
+    const result = await apiCall('/admin/login', 'POST', { password: passwordAttempt });
+    if (result && result.success) {
+        adminPassword = passwordAttempt; 
+        hideAdminLogin();
+        switchView('admin');
+    } else {
+        adminPasswordInput.value = ''; 
+    }
+};
+adminLoginCancelButton.onclick = hideAdminLogin;
+
+addKidButton.onclick = async () => {
+    const name = newKidNameInput.value.trim();
+    const trackLength = parseInt(newKidTrainTrackLengthInput.value) || 10;
+    if (name && trackLength > 0) {
+        const avatarColor = KID_AVATAR_COLORS[document.querySelectorAll('#adminKidList > div').length % KID_AVATAR_COLORS.length];
+        const newKid = await apiCall('/kids', 'POST', { name, avatarColor, trainTrackLength: trackLength }, true);
+        if (newKid) {
+            newKidNameInput.value = ''; newKidTrainTrackLengthInput.value = '10';
+            loadAndRenderAdminView(); showModal(`${name} added!`);
+        }
+    } else { showModal('Kid name and positive track length required.'); }
+};
+
+addMasterChoreButton.onclick = async () => { 
+    const name = newChoreNameInput.value.trim();
+    let icon = newChoreIconSelect.value; 
+    if (!icon || DEFAULT_CHORE_ICONS.find(c => c.icon === icon)?.name === "-- Manual Icon --") { 
+        icon = newChoreIconManual.value.trim(); 
+    }
+    if (name) {
+        const newChore = await apiCall('/chores-master', 'POST', { name, icon: icon || '🔧' }, true); 
+        if (newChore) { 
+            newChoreNameInput.value = ''; newChoreIconManual.value = ''; newChoreIconSelect.value = ''; 
+            loadAndRenderAdminView(); showModal(`Chore "${name}" added!`);
+        }
+    } else { showModal('Chore name required.');}
+};
+
+assignChoreButton.onclick = async () => { 
+    const kidId = assignKidSelect.value; 
+    const choreId = parseInt(assignChoreSelect.value); 
+    const frequency = assignFrequencySelect.value;
+    const timeframe = assignTimeframeSelect.value; // Get timeframe
+    if (!choreId && assignChoreSelect.options.length > 0) { showModal('Please select a chore.'); return; }
+    else if (assignChoreSelect.options.length === 0) { showModal('No master chores to assign. Add some first.'); return; }
+    const result = await apiCall('/assignments', 'POST', { kidId, choreId, frequency, timeframe }, true); // Send timeframe
+    if (result) { loadAndRenderAdminView(); showModal(result.message || 'Chore assigned!');}
+};
+ awardBonusStarButton.onclick = async () => { 
+    const kidId = parseInt(bonusKidSelect.value); const reason = bonusReasonInput.value.trim();
+    if (!kidId && bonusKidSelect.options.length > 0) { showModal('Please select a kid.'); return; }
+    else if (bonusKidSelect.options.length === 0) { showModal('No kids to award stars.'); return; }
+    const result = await apiCall('/stars/bonus', 'POST', { kidId, reason }, true);
+    if (result) {
+        loadAndRenderAdminView(); 
+        if (currentView === 'kidChores' && currentKidId == kidId) loadAndRenderKidChoresView(kidId);
+        showModal(result.message || 'Bonus star awarded!'); bonusReasonInput.value = '';
+    }
+};
+
+choresForKidList.addEventListener('click', async (e) => {
+    const button = e.target.closest('.chore-action-btn');
+    if (button) {
+        const assignmentId = parseInt(button.dataset.assignmentId);
+        const choreId = parseInt(button.dataset.choreId); 
+        const isCompleted = button.textContent.trim().toLowerCase() === 'undo';
+        let result;
+        if (isCompleted) { 
+            result = await apiCall('/completions/uncheck', 'POST', { kidId: currentKidId, assignmentId });
+        } else { 
+            triggerBalloonAnimation(button);
+            result = await apiCall('/completions', 'POST', { kidId: currentKidId, assignmentId, choreId });
+        }
+        if (result) {
+            applyCompletionDelta(assignmentId, !isCompleted, result.updated_kid_stats);
+            if (result.daily_star_awarded) {
+                showModal("Great job! You earned a daily star! ⭐");
+            } else if (result.stars_from_balloons > 0) {
+                showModal(`Wow! You converted balloons into ${result.stars_from_balloons} star(s)! ⭐`);
+            } else if (result.daily_star_revoked) {
+                showModal("Daily star was un-earned.");
+            } else if (result.star_from_balloons_revoked) {
+                showModal("Balloon-star was un-earned and balloons returned.");
+            } else if (isCompleted && result.message) { 
+                 showModal(result.message);
+            }
+        }
+    }
+});
+
+adminKidListDiv.addEventListener('click', async (e) => {
+    const kidItem = e.target.closest('.kid-admin-item');
+    if (!kidItem) return;
+    const kidId = kidItem.dataset.kidId;
+    if (e.target.classList.contains('admin-edit-kid-btn')) {
+        kidItem.querySelector('.kid-display-mode').classList.add('hidden');
+        kidItem.querySelector('.kid-edit-mode').classList.remove('hidden');
+    } else if (e.target.classList.contains('admin-cancel-edit-kid-btn')) {
+        kidItem.querySelector('.kid-display-mode').classList.remove('hidden');
+        kidItem.querySelector('.kid-edit-mode').classList.add('hidden');
+        kidItem.querySelector('.edit-kid-name-input').value = kidItem.dataset.originalName;
+        kidItem.querySelector('.edit-kid-track-input').value = kidItem.dataset.originalTrackLength;
+    } else if (e.target.classList.contains('admin-save-kid-btn')) {
+        const newName = kidItem.querySelector('.edit-kid-name-input').value.trim();
+        const newTrackLength = parseInt(kidItem.querySelector('.edit-kid-track-input').value);
+        if (newName && newTrackLength > 0) {
+            const result = await apiCall(`/kids/${kidId}`, 'PUT', { name: newName, train_track_length: newTrackLength }, true);
+            if (result) {
+                showModal('Kid updated successfully!');
+                loadAndRenderAdminView(); 
+                if (currentView === 'kidChores' && currentKidId == kidId) loadAndRenderKidChoresView(kidId); 
+            }
+        } else { showModal('Valid name and positive track length required.'); }
+    } else if (e.target.classList.contains('admin-delete-kid-btn')) {
+        const kidName = e.target.dataset.kidName;
+        if (confirm(`Are you sure you want to permanently delete ${kidName}? This action cannot be undone.`)) {
+            const result = await apiCall(`/kids/${kidId}`, 'DELETE', null, true);
+            if (result) {
+                showModal(result.message || `${kidName} deleted.`);
+                loadAndRenderAdminView(); 
+                if (currentKidId == kidId) {
+                    switchView('kidSelection');
+                }
+            }
+        }
+    }
+    else if (e.target.classList.contains('admin-reset-chores-btn')) { 
+        if (confirm(`Reset all of today's chores for this kid?`)) {
+            const result = await apiCall(`/admin/kids/${kidId}/reset-daily-chores`, 'POST', null, true);
+            if (result) { showModal(result.message); loadAndRenderAdminView(); if(currentKidId == kidId && currentView == 'kidChores') loadAndRenderKidChoresView(kidId); }
+        }
+    } 
+    else if (e.target.classList.contains('admin-decrement-balloons-btn')) { 
+         const numToDecrement = parseInt(prompt("How many balloons to decrement?", "1")) || 0;
+         if (numToDecrement > 0) {
+            const result = await apiCall(`/admin/kids/${kidId}/decrement-balloons`, 'POST', { count: numToDecrement }, true);
+            if (result) { showModal(result.message); loadAndRenderAdminView(); if(currentKidId == kidId && currentView == 'kidChores') loadAndRenderKidChoresView(kidId); }
+         }
+    } 
+    else if (e.target.classList.contains('admin-decrement-stars-btn')) { 
+        const numToDecrement = parseInt(prompt("How many stars to decrement?", "1")) || 0;
+        if (numToDecrement > 0) {
+            const result = await apiCall(`/admin/kids/${kidId}/decrement-stars`, 'POST', { count: numToDecrement, type: 'any' }, true);
+            if (result) { showModal(result.message); loadAndRenderAdminView(); if(currentKidId == kidId && currentView == 'kidChores') loadAndRenderKidChoresView(kidId); }
+        }
+    }
+});
+
+masterChoreListDisplay.addEventListener('click', async (e) => {
+    const choreItem = e.target.closest('.chore-master-item');
+    if (!choreItem) return;
+    const choreId = choreItem.dataset.choreId;
+    if (e.target.classList.contains('admin-edit-master-chore-btn')) {
+        choreItem.querySelector('.chore-master-display-mode').classList.add('hidden');
+        choreItem.querySelector('.chore-master-edit-mode').classList.remove('hidden');
+    } else if (e.target.classList.contains('admin-cancel-edit-master-chore-btn')) {
+        choreItem.querySelector('.chore-master-display-mode').classList.remove('hidden');
+        choreItem.querySelector('.chore-master-edit-mode').classList.add('hidden');
+        choreItem.querySelector('.edit-master-chore-name-input').value = choreItem.dataset.originalName;
+        choreItem.querySelector('.edit-master-chore-icon-input').value = choreItem.dataset.originalIcon;
+    } else if (e.target.classList.contains('admin-save-master-chore-btn')) {
+        const newName = choreItem.querySelector('.edit-master-chore-name-input').value.trim();
+        const newIcon = choreItem.querySelector('.edit-master-chore-icon-input').value.trim();
+        if (newName) {
+            const result = await apiCall(`/chores-master/${choreId}`, 'PUT', { name: newName, icon: newIcon }, true);
+            if (result) { showModal('Master chore updated!'); loadAndRenderAdminView(); }
+        } else { showModal('Chore name cannot be empty.'); }
+    }
+});
+
+currentAssignmentsList.addEventListener('click', async (e) => {
+    const assignmentId = e.target.dataset.assignmentId;
+    if (!assignmentId) return;
+    if (e.target.classList.contains('remove-assignment-btn')) {
+        if (confirm('Are you sure you want to remove this assignment?')) {
+            if (await apiCall(`/assignments/${assignmentId}`, 'DELETE', null, true)) {
+                loadAndRenderAdminView(); showModal('Assignment removed.');
+            }
+        }
+    } else if (e.target.classList.contains('admin-toggle-assignment-active-btn')) {
+        const result = await apiCall(`/assignments/${assignmentId}/toggle-active`, 'POST', null, true);
+        if (result) { showModal(result.message); loadAndRenderAdminView(); }
+    } else if (e.target.classList.contains('admin-edit-assignment-btn')) {
+        const currentFrequency = e.target.dataset.currentFrequency;
+        const currentTimeframe = e.target.dataset.currentTimeframe;
+        showEditAssignmentModal(assignmentId, currentFrequency, currentTimeframe);
+    }
+});
+
+editAssignmentSaveButton.onclick = async () => {
+    const assignmentId = editingAssignmentIdInput.value;
+    const newFrequency = editAssignmentFrequencySelect.value;
+    const newTimeframe = editAssignmentTimeframeSelect.value;
+    if (assignmentId && newFrequency && newTimeframe) {
+        const result = await apiCall(`/assignments/${assignmentId}/edit`, 'PUT', { frequency: newFrequency, timeframe: newTimeframe }, true);
+        if (result) {
+            showModal(result.message); hideEditAssignmentModal(); loadAndRenderAdminView();
+        }
+    }
+};
+editAssignmentCancelButton.onclick = hideEditAssignmentModal;
+
+// --- Live Updates (Server-Sent Events) ---
+function renderKidStats(stats) {
+    kidStarsDisplay.innerHTML = `⭐ ${stats.stars_count || 0} Star${(stats.stars_count || 0) === 1 ? '' : 's'}`;
+    kidBalloonsDisplay.innerHTML = `🎈 ${stats.balloons || 0} Balloon${(stats.balloons || 0) === 1 ? '' : 's'}`;
+}
+
+function applyCompletionDelta(assignmentId, completed, stats) {
+    const button = kidChoresView.querySelector(`.chore-action-btn[data-assignment-id="${assignmentId}"]`);
+    if (button) {
+        button.closest('.chore-item').classList.toggle('completed', completed);
+        button.classList.toggle('bg-orange-500', completed); button.classList.toggle('hover:bg-orange-600', completed);
+        button.classList.toggle('bg-green-500', !completed); button.classList.toggle('hover:bg-green-600', !completed);
+        button.textContent = completed ? 'Undo' : 'Mark Done';
+    }
+    if (stats && Object.keys(stats).length) renderKidStats(stats);
+    const choreItems = [...kidChoresView.querySelectorAll('.chore-item')];
+    allChoresDoneMessage.classList.toggle('hidden', !(choreItems.length > 0 && choreItems.every(item => item.classList.contains('completed'))));
+}
+
+function refreshCurrentView() {
+    if (currentView === 'kidChores') loadAndRenderKidChoresView(currentKidId);
+    else if (currentView === 'kidSelection') loadAndRenderKidSelectionView();
+}
+
+function connectEventStream() {
+    if (!window.EventSource) return;
+    const stream = new EventSource(`${APP_ROOT}/api/stream`);
+    const isCurrentKid = (kidId) => currentView === 'kidChores' && currentKidId == kidId;
+    const on = (type, handler) => stream.addEventListener(type, (e) => handler(JSON.parse(e.data)));
+    on('completion', (event) => { if (isCurrentKid(event.kid_id)) applyCompletionDelta(event.assignment_id, event.completed, event.kid); });
+    on('kid_stats', (event) => { if (isCurrentKid(event.kid_id)) renderKidStats(event.kid); });
+    ['kid_added', 'kid_updated', 'kid_deleted'].forEach(type => on(type, (event) => {
+        if (currentView === 'kidSelection' || isCurrentKid(event.kid_id)) refreshCurrentView();
+    }));
+    ['assignments_changed', 'day_reset'].forEach(type => on(type, (event) => {
+        if (event.kid_ids.some(isCurrentKid)) refreshCurrentView();
+    }));
+    ['chores_changed', 'resync'].forEach(type => on(type, refreshCurrentView));
+    // Events sent while the connection was down are lost, so refetch after every reconnect.
+    let connectedOnce = false;
+    stream.onopen = () => { if (connectedOnce) refreshCurrentView(); connectedOnce = true; };
+}
+
+adminModeButton.onclick = () => switchView('admin');
+kidSelectionButton.onclick = () => { currentKidId = null; switchView('kidSelection'); };
+modalCloseButton.onclick = hideModal;
+document.addEventListener('DOMContentLoaded', () => {
+    console.log("DOM Content Loaded. Initializing app."); 
+    populateDefaultChoreIcons(); 
+    currentDateDisplay.textContent = new Date().toLocaleDateString('en-US', { weekday: 'long', month: 'long', day: 'numeric' });
+    switchView('kidSelection');
+    connectEventStream();
+});